@@ -0,0 +1,283 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# 人机对战AI：迭代加深的 alpha-beta（negamax）搜索
+# 直接在局面上 apply_move / unmake，不复制棋盘；置换表以 Zobrist 哈希为键
+
+import random
+import threading
+import time
+
+from bitboard import BitBoard
+from config import PLAYER_GRAY, PLAYER_GREEN
+from transposition import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+
+WIN_SCORE = 100000
+INFINITY = 1000000
+
+# 难度：(每步思考时间（秒）, 最大搜索深度)
+AI_LEVELS = {
+    'easy': (0.3, 1),
+    'normal': (1.0, 3),
+    'hard': (3.0, 64),
+}
+
+# 估值权重
+PIECE_VALUES = {'leaf': 10, 'branch': 15, 'trunk': 15}
+ROOT_BONUS = 40  # 每枚进入对方根源区域的棋子
+ADVANCE_BONUS = 1  # 每向对方根源前进一行
+MOBILITY_BONUS = 2  # 每个可落子格子
+
+QUIESCENCE_DEPTH = 4
+TIME_CHECK_INTERVAL = 64  # 每搜索这么多节点检查一次时间
+
+
+class RandomAI:
+    # 随机落子，作为对比基准
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def choose_move(self, state):
+        moves = state.legal_moves()
+        return self.rng.choice(moves) if moves else None
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+def evaluate(state):
+    # 静态估值，以当前行棋方视角给分
+    bitboard = BitBoard.from_state(state)
+    pieces = bitboard.pieces
+    score = 0
+    for prefix, player, enemy_root in (('gray', PLAYER_GRAY, bitboard.green_root),
+                                       ('green', PLAYER_GREEN, bitboard.gray_root)):
+        side = 0
+        own = 0
+        for piece_type, value in PIECE_VALUES.items():
+            mask = pieces[f'{prefix}_{piece_type}']
+            side += value * mask.bit_count()
+            own |= mask
+        side += ROOT_BONUS * (own & enemy_root).bit_count()
+        # 灰方向第0行前进，青方向最后一行前进
+        for y, row in enumerate(bitboard.rows):
+            advance = bitboard.height - 1 - y if player == PLAYER_GRAY else y
+            side += ADVANCE_BONUS * advance * (own & row).bit_count()
+        side += MOBILITY_BONUS * bitboard.legal_mask(player).bit_count()
+        score += side if player == PLAYER_GRAY else -side
+    return score if state.current_player == PLAYER_GRAY else -score
+
+
+class AlphaBetaAI:
+    def __init__(self, time_limit=1.0, max_depth=64, table=None, book=None):
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.table = table if table is not None else TranspositionTable()
+        self.book = book  # 开局库（book.OpeningBook），库中有的局面直接走库中着法
+        self.killers = {}  # 每层两个杀手着法
+        self.history_scores = {}  # 历史启发分值
+        self.state = None
+        self.deadline = 0
+        self.cancelled = threading.Event()  # 由 cancel 置位，搜索在下一次检查时间时结束；只由调用方在开始新搜索前清除
+        self.nodes = 0
+        # 最近一次搜索的统计信息
+        self.depth_reached = 0
+        self.best_score = 0
+        self.elapsed = 0
+        self.nodes_per_second = 0
+
+    @classmethod
+    def from_level(cls, level, table=None, book=None):
+        time_limit, max_depth = AI_LEVELS[level]
+        return cls(time_limit, max_depth, table, book)
+
+    def cancel(self):
+        # 可在其他线程中调用；与 deadline 不同，不会被随后开始（或尚未开始）的 choose_move 覆盖
+        self.cancelled.set()
+
+    def choose_move(self, state):
+        # 迭代加深搜索，超时后返回最后一次完整搜索的最佳着法
+        self.state = state
+        self.nodes = 0
+        self.depth_reached = 0
+        self.killers = {}
+        start = time.perf_counter()
+        self.deadline = start + self.time_limit
+        moves = state.legal_moves()
+        if not moves:
+            return None
+        if self.book is not None:
+            move = self.book.choose_move(state)
+            if move is not None:
+                self.elapsed = time.perf_counter() - start
+                return move
+        best_move = moves[0]
+        for depth in range(1, self.max_depth + 1):
+            try:
+                score, move = self.search_root(depth, moves, best_move)
+            except SearchTimeout:
+                break
+            best_move = move
+            self.best_score = score
+            self.depth_reached = depth
+            if abs(score) >= WIN_SCORE - 1000:
+                break  # 已找到必胜或必败
+        self.elapsed = time.perf_counter() - start
+        self.nodes_per_second = int(self.nodes / self.elapsed) if self.elapsed > 0 else 0
+        return best_move
+
+    def search_root(self, depth, moves, first_move):
+        state = self.state
+        alpha = -INFINITY
+        best_move = first_move
+        ordered = [first_move] + [move for move in self.order_moves(moves, 0, None) if move != first_move]
+        for move in ordered:
+            score = self.search_child(move, depth - 1, alpha, INFINITY, 1)
+            if score > alpha:
+                alpha = score
+                best_move = move
+        return alpha, best_move
+
+    def search_child(self, move, depth, alpha, beta, ply):
+        # 执行着法并搜索子节点，返回以本方视角的分值
+        # 子节点分值以子节点行棋方为视角；落子方直接获胜时不交换行棋方，分值无需取反
+        state = self.state
+        mover = state.current_player
+        state.apply_move(move)
+        try:
+            if state.current_player == mover:
+                return self.negamax(depth, alpha, beta, ply)
+            return -self.negamax(depth, -beta, -alpha, ply)
+        finally:
+            state.unmake()
+
+    def negamax(self, depth, alpha, beta, ply):
+        state = self.state
+        self.nodes += 1
+        if self.nodes % TIME_CHECK_INTERVAL == 0 and (time.perf_counter() > self.deadline or self.cancelled.is_set()):
+            raise SearchTimeout()
+
+        winner = state.winner()
+        if winner is not None:
+            return WIN_SCORE - ply if winner == state.current_player else ply - WIN_SCORE
+        if depth <= 0:
+            return self.quiesce(alpha, beta, ply, QUIESCENCE_DEPTH)
+
+        original_alpha = alpha
+        entry = self.table.probe(state.hash)
+        table_move = None
+        if entry is not None:
+            table_move = entry[4]
+            if entry[1] >= depth:
+                if entry[3] == EXACT:
+                    return entry[2]
+                if entry[3] == LOWER_BOUND:
+                    alpha = max(alpha, entry[2])
+                elif entry[3] == UPPER_BOUND:
+                    beta = min(beta, entry[2])
+                if alpha >= beta:
+                    return entry[2]
+
+        moves = state.legal_moves()
+        if not moves:
+            return 0  # 无子可落，按和局处理
+
+        best = -INFINITY
+        best_move = None
+        for move in self.order_moves(moves, ply, table_move):
+            score = self.search_child(move, depth - 1, alpha, beta, ply + 1)
+            if score > best:
+                best = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                self.record_cutoff(move, ply, depth)
+                break
+
+        if best <= original_alpha:
+            bound = UPPER_BOUND
+        elif best >= beta:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        self.table.store(state.hash, depth, best, bound, best_move)
+        return best
+
+    def quiesce(self, alpha, beta, ply, qdepth):
+        # 静态搜索：只展开能消除敌方棋子的推动着法
+        state = self.state
+        self.nodes += 1
+        if self.nodes % TIME_CHECK_INTERVAL == 0 and (time.perf_counter() > self.deadline or self.cancelled.is_set()):
+            raise SearchTimeout()
+
+        winner = state.winner()
+        if winner is not None:
+            return WIN_SCORE - ply if winner == state.current_player else ply - WIN_SCORE
+        stand_pat = evaluate(state)
+        if stand_pat >= beta or qdepth == 0:
+            return stand_pat
+        alpha = max(alpha, stand_pat)
+
+        mover = state.current_player
+        enemy = PLAYER_GREEN if mover == PLAYER_GRAY else PLAYER_GRAY
+        enemy_prefix = 'green' if enemy == PLAYER_GREEN else 'gray'
+        bitboard = BitBoard.from_state(state)
+        pushable = bitboard.pieces[f'{enemy_prefix}_leaf'] | bitboard.pieces[f'{enemy_prefix}_branch']
+        targets = state.legal_mask() & bitboard.neighbours(pushable)
+        for x, y in bitboard.cells(targets):
+            delta = state.apply_move((x, y, 'leaf'))
+            if delta is None:
+                continue
+            capture = state.winner() is not None or delta.eliminated.masks[enemy] != 0
+            if not capture:
+                state.unmake()
+                continue
+            try:
+                if state.current_player == mover:
+                    score = self.quiesce(alpha, beta, ply + 1, qdepth - 1)
+                else:
+                    score = -self.quiesce(-beta, -alpha, ply + 1, qdepth - 1)
+            finally:
+                state.unmake()
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        return alpha
+
+    def order_moves(self, moves, ply, table_move):
+        # 置换表着法优先，其次杀手着法，其余按历史启发分值排序
+        killers = self.killers.get(ply, ())
+        history_scores = self.history_scores
+
+        def key(move):
+            if move == table_move:
+                return -INFINITY
+            if move in killers:
+                return -INFINITY // 2
+            return -history_scores.get(move, 0)
+
+        return sorted(moves, key=key)
+
+    def record_cutoff(self, move, ply, depth):
+        killers = self.killers.setdefault(ply, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+        self.history_scores[move] = self.history_scores.get(move, 0) + depth * depth
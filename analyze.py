@@ -0,0 +1,139 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# 批量局面分析（无界面）：逐行读入局面记法（见 notation.py），每行输出一行结果，输出顺序与输入一致
+#   python analyze.py positions.txt --mode best --time 0.1 --workers 8 --output best.txt
+#   cat positions.txt | python analyze.py --mode eval
+# moves：全部合法着法（以空格分隔，没有时为 -）；eval：以行棋方视角的静态估值（evaluation.py）；best：alpha-beta 搜索的最佳着法
+# 空行原样输出为空行，无法解析的行输出 "error: 原因"
+# 输入按块分给工作进程，同时在途的块数有上限，内存占用与输入总量无关
+
+import argparse
+import multiprocessing
+import sys
+from collections import deque
+
+from ai import AlphaBetaAI
+from evaluation import evaluate_batch
+from notation import format_move, from_notation
+
+MODES = ['moves', 'eval', 'best']
+CHUNK_SIZE = 256  # 每个任务的行数；eval 模式下同一块内的局面合成一批估值
+MAX_PENDING = 4  # 每个工作进程最多同时在途的块数
+
+_worker_ai = {}  # 每个进程内缓存的AI实例（及其置换表）
+
+
+def analyze_chunk(task):
+    # 在工作进程中分析一块输入，返回与输入逐行对应的结果行
+    lines, mode, time_limit, depth = task
+    results = [''] * len(lines)
+    states = []  # [(行号, 局面)]
+    for index, line in enumerate(lines):
+        if not line.strip():
+            continue
+        try:
+            states.append((index, from_notation(line)))
+        except ValueError as error:
+            results[index] = f'error: {error}'
+    if mode == 'eval':
+        # 同样大小的局面合成一批估值
+        by_size = {}
+        for index, state in states:
+            by_size.setdefault((state.width, state.height), []).append((index, state))
+        for group in by_size.values():
+            scores = evaluate_batch([state for _, state in group])
+            for (index, _), score in zip(group, scores.tolist()):
+                results[index] = str(score)
+    elif mode == 'moves':
+        for index, state in states:
+            results[index] = ' '.join(format_move(move) for move in state.legal_moves()) or '-'
+    else:
+        ai = _worker_ai.get((time_limit, depth))
+        if ai is None:
+            ai = _worker_ai[(time_limit, depth)] = AlphaBetaAI(time_limit, depth)
+        for index, state in states:
+            move = ai.choose_move(state)
+            results[index] = format_move(move) if move is not None else '-'
+    return results
+
+
+def read_chunks(lines, chunk_size):
+    chunk = []
+    for line in lines:
+        chunk.append(line.rstrip('\r\n'))
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def analyze_stream(lines, output, mode, time_limit, depth, workers, chunk_size=CHUNK_SIZE):
+    # 逐块提交给进程池；在途的块达到上限时先按顺序取回最早的一块并写出，再读入下一块
+    # （不用 Pool.imap：它会在后台把整个输入一次读完）
+    tasks = ((chunk, mode, time_limit, depth) for chunk in read_chunks(lines, chunk_size))
+    count = 0
+    if workers == 1:
+        for task in tasks:
+            for result in analyze_chunk(task):
+                output.write(result + '\n')
+                count += 1
+        return count
+    with multiprocessing.Pool(workers) as pool:
+        pending = deque()
+        for task in tasks:
+            if len(pending) >= workers * MAX_PENDING:
+                results = pending.popleft().get()
+                output.write(''.join(result + '\n' for result in results))
+                count += len(results)
+            pending.append(pool.apply_async(analyze_chunk, (task,)))
+        while pending:
+            results = pending.popleft().get()
+            output.write(''.join(result + '\n' for result in results))
+            count += len(results)
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TreeGo 批量局面分析")
+    parser.add_argument('input', nargs='?', help="局面记法文件，每行一个局面；省略时读取标准输入")
+    parser.add_argument('--mode', choices=MODES, default='moves')
+    parser.add_argument('--time', type=float, default=0.1, help="best 模式每个局面的搜索时间（秒）")
+    parser.add_argument('--depth', type=int, default=64, help="best 模式的最大搜索深度")
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--output', help="结果文件，默认输出到标准输出")
+    args = parser.parse_args(argv)
+    if args.workers < 1 or args.chunk_size < 1:
+        parser.error("--workers 与 --chunk-size 须为正数")
+
+    source = open(args.input, encoding='utf-8') if args.input else sys.stdin
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        count = analyze_stream(source, output, args.mode, args.time, args.depth, args.workers, args.chunk_size)
+    finally:
+        if args.input:
+            source.close()
+        if args.output:
+            output.close()
+    if args.output:
+        print(f"{args.output}：{count} 行")
+
+
+if __name__ == "__main__":
+    main()
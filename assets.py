@@ -0,0 +1,65 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# 资源管理：图标、字体与格子图块在第一次使用时才加载并缓存
+# 路径相对于本程序所在目录解析，与启动时的工作目录无关
+# 本模块导入时不导入pygame，只做规则计算的代码（AI、比赛、模拟器）不会因此初始化pygame
+
+import os
+
+from config import ICON_PATH
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def asset_path(path):
+    # 相对路径按程序目录解析，绝对路径原样返回
+    return os.path.join(PACKAGE_DIR, path)
+
+
+class AssetManager:
+    def __init__(self):
+        self.images = {}
+
+    def image(self, path):
+        image = self.images.get(path)
+        if image is None:
+            import pygame
+            image = self.images[path] = pygame.image.load(asset_path(path))
+        return image
+
+    def icon(self):
+        return self.image(ICON_PATH)
+
+    def font(self, size):
+        from fonts import font_manager
+        return font_manager.font(size)
+
+    def sprites(self, grid_size, antialias=False):
+        from sprites import sprite_atlas
+        return sprite_atlas(grid_size, antialias)
+
+    def clear(self):
+        # pygame.quit() 之后已加载的资源失效
+        from fonts import font_manager
+        from sprites import clear_atlases
+        self.images = {}
+        font_manager.clear()
+        clear_atlases()
+
+
+assets = AssetManager()
@@ -0,0 +1,22 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# 性能基准：
+#   perft   —— 从初始局面与若干中局局面出发的着法树计数，报告节点/秒
+#   micro   —— is_valid_position、push_enemy_piece、eliminate_pieces、is_win 的微基准
+#   frames  —— SDL dummy 驱动下 Board.draw 与 Game.draw 的单帧耗时
+# 运行：python -m benchmarks --output bench.json
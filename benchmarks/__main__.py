@@ -0,0 +1,70 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# python -m benchmarks [--only perft micro frames] [--perft-depth N] [--output bench.json]
+# 结果为JSON，附带当前提交号，便于跨提交比较
+
+import argparse
+import json
+import platform
+import subprocess
+import time
+
+from benchmarks import frames, micro, perft
+
+SUITES = ['perft', 'micro', 'frames']
+
+
+def current_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TreeGo 性能基准")
+    parser.add_argument('--only', nargs='+', choices=SUITES, default=SUITES)
+    parser.add_argument('--perft-depth', type=int, default=2)
+    parser.add_argument('--min-time', type=float, default=micro.MIN_TIME, help="每项微基准至少运行的秒数")
+    parser.add_argument('--frames', type=int, default=frames.FRAMES)
+    parser.add_argument('--output', help="JSON输出文件，默认输出到标准输出")
+    args = parser.parse_args(argv)
+
+    report = {
+        'commit': current_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+    }
+    if 'perft' in args.only:
+        report['perft'] = perft.run(args.perft_depth)
+    if 'micro' in args.only:
+        report['micro'] = micro.run(args.min_time)
+    if 'frames' in args.only:
+        report['frames'] = frames.run(args.frames)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            output.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# 界面单帧耗时：在 SDL dummy 视频驱动下绘制 Board.draw 与 Game.draw
+# 绘制只重绘变化的格子，因此分三种帧计时：
+#   idle：没有任何变化的空闲帧；move：每帧前落一步或撤销一步；full：每帧前 invalidate() 整盘重绘（与早期逐帧整盘重绘可比）
+# 落子、撤销本身不计入帧耗时
+
+import os
+import time
+
+FRAMES = 200
+
+
+def frame_stats(samples):
+    samples = sorted(samples)
+    return {
+        'frames': len(samples),
+        'mean_ms': round(sum(samples) / len(samples) * 1000, 4),
+        'p50_ms': round(samples[len(samples) // 2] * 1000, 4),
+        'p95_ms': round(samples[int(len(samples) * 0.95)] * 1000, 4),
+    }
+
+
+def time_frames(draw, frames, prepare=None):
+    # prepare(i) 在第 i 帧计时开始前调用
+    samples = []
+    for index in range(frames):
+        if prepare is not None:
+            prepare(index)
+        start = time.perf_counter()
+        draw()
+        samples.append(time.perf_counter() - start)
+    return frame_stats(samples)
+
+
+def run(frames=FRAMES):
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')  # 避免欢迎信息混入标准输出的JSON
+    import pygame
+    from assets import assets
+    from benchmarks.positions import MIDGAME_POSITIONS
+    from game import Game
+
+    pygame.init()
+    results = {}
+    try:
+        game = Game()
+        for move in MIDGAME_POSITIONS['midgame_1']:
+            game.apply_move(move)
+        base_depth = len(game.state.history)
+        moves = game.state.legal_moves()
+
+        def move_frame(index):
+            # 偶数帧落子、奇数帧撤销，局面在两者之间往复
+            if len(game.state.history) > base_depth:
+                game.unmake()
+            else:
+                game.apply_move(moves[index // 2 % len(moves)])
+
+        def invalidate(index):
+            game.board.invalidate()
+            game.full_redraw = True
+
+        def board_frame():
+            game.board.draw(game.screen)
+
+        def game_frame():
+            # 与 Game.main_loop 相同：只把变化的矩形更新到屏幕，没有变化时不更新
+            rects = game.draw()
+            if rects:
+                pygame.display.update(rects)
+
+        game_frame()
+        for name, prepare in (('idle', None), ('move', move_frame), ('full', invalidate)):
+            results[f'board_draw_{name}'] = time_frames(board_frame, frames, prepare)
+            game_frame()  # 棋盘单独绘制后其余界面部分可能未更新，先同步一帧
+            results[f'game_draw_{name}'] = time_frames(game_frame, frames, prepare)
+    finally:
+        pygame.quit()
+        assets.clear()
+    return results
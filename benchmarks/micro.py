@@ -0,0 +1,128 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# 规则热点函数的微基准
+# push_enemy_piece 与 eliminate_pieces 会修改局面，因此每次调用前复制准备好的局面，
+# 并扣除单独测得的复制耗时
+
+import time
+
+from ai import evaluate
+from benchmarks.positions import load_positions
+from config import PLAYER_GRAY
+from evaluation import evaluate_batch
+
+MIN_TIME = 0.2  # 每项至少运行的时间（秒）
+EVAL_BATCH = 1024  # 批量估值每批的局面数
+
+
+def measure(func, min_time=MIN_TIME):
+    # 反复调用直到累计耗时超过 min_time，返回 (调用次数, 总耗时)
+    calls = 0
+    batch = 1
+    start = time.perf_counter()
+    while True:
+        for _ in range(batch):
+            func()
+        calls += batch
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return calls, elapsed
+        batch *= 2
+
+
+def prepare_scenarios(positions):
+    # 找出会发生推动、会发生消除的着法，返回落子后（推动、消除前）的局面
+    push_case = None
+    eliminate_case = None
+    for _, state in positions:
+        for move in state.legal_moves():
+            delta = state.apply_move(move)
+            pushes, eliminated = delta.pushes, delta.eliminated
+            state.unmake()
+            if push_case is None and pushes:
+                push_case = placed_state(state, move), pushes[0]
+            if eliminate_case is None and eliminated:
+                prepared = placed_state(state, move)
+                prepared.push_pieces(move[0], move[1])
+                eliminate_case = prepared
+            if push_case and eliminate_case:
+                return push_case, eliminate_case
+    return push_case, eliminate_case
+
+
+def placed_state(state, move):
+    x, y, piece_type = move
+    prepared = state.copy()
+    prepared.history = []
+    prefix = 'gray' if prepared.current_player == PLAYER_GRAY else 'green'
+    prepared.set_piece(x, y, f'{prefix}_{piece_type}')
+    return prepared
+
+
+def result(calls, seconds, overhead=0.0):
+    per_call = max(seconds / calls - overhead, 0.0)
+    return {'calls': calls, 'seconds': round(seconds, 6), 'per_call_us': round(per_call * 1e6, 3)}
+
+
+def run(min_time=MIN_TIME):
+    positions = load_positions()
+    results = {}
+
+    def valid_positions():
+        for _, state in positions:
+            for y in range(state.height):
+                for x in range(state.width):
+                    state.is_valid_position(x, y)
+
+    cells = sum(state.width * state.height for _, state in positions)
+    calls, seconds = measure(valid_positions, min_time)
+    results['is_valid_position'] = result(calls * cells, seconds)
+
+    def is_win():
+        for _, state in positions:
+            state.is_win()
+
+    calls, seconds = measure(is_win, min_time)
+    results['is_win'] = result(calls * len(positions), seconds)
+
+    def evaluate_all():
+        for _, state in positions:
+            evaluate(state)
+
+    calls, seconds = measure(evaluate_all, min_time)
+    results['evaluate'] = result(calls * len(positions), seconds)
+
+    # 批量估值按每个局面的平均耗时计（含由位掩码编码为数组）
+    batch = [state for _, state in positions] * (EVAL_BATCH // len(positions))
+    calls, seconds = measure(lambda: evaluate_batch(batch), min_time)
+    results['evaluate_batch'] = result(calls * len(batch), seconds)
+
+    push_case, eliminate_case = prepare_scenarios(positions)
+    if push_case is not None:
+        prepared, (push_chain, dx, dy) = push_case
+        x, y = push_chain[0]
+        calls, seconds = measure(prepared.copy, min_time)
+        copy_cost = seconds / calls
+        calls, seconds = measure(lambda: prepared.copy().push_enemy_piece(x, y, dx, dy), min_time)
+        results['push_enemy_piece'] = result(calls, seconds, copy_cost)
+    if eliminate_case is not None:
+        calls, seconds = measure(eliminate_case.copy, min_time)
+        copy_cost = seconds / calls
+        calls, seconds = measure(lambda: eliminate_case.copy().eliminate_pieces(), min_time)
+        results['eliminate_pieces'] = result(calls, seconds, copy_cost)
+    return results
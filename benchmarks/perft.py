@@ -0,0 +1,50 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# perft：统计给定深度内的着法树节点数，用于核对走法生成并衡量规则引擎的吞吐
+
+import time
+
+from benchmarks.positions import load_positions
+
+
+def perft(state, depth):
+    # 返回深度为 depth 的叶节点数，已分胜负的局面计为叶节点
+    if depth == 0 or state.winner() is not None:
+        return 1
+    nodes = 0
+    for move in state.legal_moves():
+        state.apply_move(move)
+        nodes += perft(state, depth - 1)
+        state.unmake()
+    return nodes
+
+
+def run(depth=2):
+    results = []
+    for name, state in load_positions():
+        start = time.perf_counter()
+        nodes = perft(state, depth)
+        seconds = time.perf_counter() - start
+        results.append({
+            'position': name,
+            'depth': depth,
+            'nodes': nodes,
+            'seconds': round(seconds, 6),
+            'nodes_per_second': int(nodes / seconds) if seconds > 0 else 0,
+        })
+    return results
@@ -0,0 +1,51 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# 基准测试使用的局面，中局局面以从初始局面出发的着法序列保存
+
+from engine import GameState
+
+MIDGAME_POSITIONS = {
+    'midgame_1': [
+        (4, 5, 'branch'), (3, 2, 'leaf'), (3, 4, 'trunk'), (4, 3, 'trunk'), (2, 5, 'leaf'), (5, 3, 'branch'),
+        (1, 4, 'leaf'), (5, 1, 'leaf'), (2, 3, 'leaf'), (2, 1, 'leaf'), (3, 5, 'leaf'), (7, 4, 'leaf'),
+        (5, 4, 'leaf'), (1, 1, 'leaf'), (0, 4, 'leaf'), (6, 3, 'leaf'),
+    ],
+    'midgame_2': [
+        (2, 5, 'trunk'), (5, 2, 'leaf'), (3, 5, 'leaf'), (2, 1, 'branch'), (1, 4, 'leaf'), (6, 1, 'leaf'),
+        (5, 5, 'branch'), (6, 3, 'leaf'), (1, 5, 'leaf'), (6, 2, 'trunk'), (0, 3, 'leaf'), (6, 2, 'leaf'),
+        (4, 5, 'trunk'), (6, 3, 'branch'), (3, 4, 'leaf'), (6, 4, 'trunk'),
+    ],
+    'midgame_3': [
+        (2, 5, 'branch'), (4, 2, 'branch'), (3, 5, 'trunk'), (4, 3, 'leaf'), (0, 4, 'leaf'), (4, 1, 'trunk'),
+        (1, 5, 'leaf'), (3, 2, 'branch'), (1, 5, 'leaf'), (4, 3, 'leaf'), (2, 4, 'branch'), (1, 1, 'leaf'),
+        (5, 6, 'trunk'), (1, 3, 'leaf'), (2, 3, 'leaf'), (2, 2, 'leaf'),
+    ],
+}
+
+
+def load_positions():
+    # 返回 [(名称, GameState)]，第一个为 Board.setup_board 的初始局面
+    positions = [('initial', GameState())]
+    for name, moves in MIDGAME_POSITIONS.items():
+        state = GameState()
+        for move in moves:
+            if not state.apply(move):
+                raise ValueError(f"{name} 中的着法 {move} 不合法")
+        state.history = []
+        positions.append((name, state))
+    return positions
@@ -0,0 +1,129 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# 位棋盘：每种（颜色, 棋子）用一个整数表示，第 y * width + x 位对应格子 (x, y)
+# 8x8 棋盘恰为64位整数，可落子区域通过移位与掩码一次算出；更大的棋盘同样适用，代价只随整数位数缓慢增长
+
+from config import BOARD_WIDTH, BOARD_HEIGHT, PLAYER_GRAY
+
+PIECE_NAMES = ['gray_leaf', 'gray_branch', 'gray_trunk', 'green_leaf', 'green_branch', 'green_trunk']
+
+
+_geometry = {}
+
+
+def board_geometry(width, height):
+    # 与棋盘大小有关的掩码，同一大小只计算一次
+    geometry = _geometry.get((width, height))
+    if geometry is not None:
+        return geometry
+    full = (1 << (width * height)) - 1
+    # 每行的第一列与最后一列，用于横向移位时防止跨行
+    first_file = 0
+    for y in range(height):
+        first_file |= 1 << (y * width)
+    not_first_file = full & ~first_file
+    not_last_file = full & ~(first_file << (width - 1))
+    # 根源区域
+    root_row = 0
+    for x in range(width // 4, width * 3 // 4):
+        root_row |= 1 << x
+    green_root = root_row
+    gray_root = root_row << ((height - 1) * width)
+    # 每一行的掩码，rows[y] 对应第 y 行
+    row = (1 << width) - 1
+    rows = [row << (y * width) for y in range(height)]
+    geometry = _geometry[(width, height)] = (full, not_first_file, not_last_file, green_root, gray_root, rows)
+    return geometry
+
+
+class BitBoard:
+    def __init__(self, width=BOARD_WIDTH, height=BOARD_HEIGHT):
+        self.width = width
+        self.height = height
+        (self.full, self.not_first_file, self.not_last_file, self.green_root, self.gray_root,
+         self.rows) = board_geometry(width, height)
+        self.pieces = {name: 0 for name in PIECE_NAMES}
+
+    @classmethod
+    def from_state(cls, state):
+        # 局面随落子增量维护每种棋子的位掩码，无需扫描棋盘
+        bitboard = cls(state.width, state.height)
+        bitboard.pieces.update(state.masks)
+        return bitboard
+
+    def bit(self, x, y):
+        return 1 << (y * self.width + x)
+
+    def occupied(self):
+        result = 0
+        for mask in self.pieces.values():
+            result |= mask
+        return result
+
+    def shift_east(self, mask):
+        return (mask << 1) & self.not_first_file
+
+    def shift_west(self, mask):
+        return (mask >> 1) & self.not_last_file
+
+    def shift_north(self, mask):
+        return mask >> self.width
+
+    def shift_south(self, mask):
+        return (mask << self.width) & self.full
+
+    def dilate(self, mask):
+        # 3x3 范围（含自身）
+        row = mask | self.shift_east(mask) | self.shift_west(mask)
+        return row | self.shift_north(row) | self.shift_south(row)
+
+    def neighbours(self, mask):
+        # 上下左右四个方向相邻的格子（不含自身），即落子可推动的范围
+        return self.shift_east(mask) | self.shift_west(mask) | self.shift_north(mask) | self.shift_south(mask)
+
+    def branch_zone(self, mask):
+        # 5x3 范围：横向左右各2格，纵向上下各1格
+        row = mask | self.shift_east(mask) | self.shift_west(mask)
+        row |= self.shift_east(self.shift_east(mask)) | self.shift_west(self.shift_west(mask))
+        return row | self.shift_north(row) | self.shift_south(row)
+
+    def legal_mask(self, player):
+        # 返回指定玩家所有可落子格子的掩码
+        if player == PLAYER_GRAY:
+            prefix, own_root, opponent_root = 'gray', self.gray_root, self.green_root
+        else:
+            prefix, own_root, opponent_root = 'green', self.green_root, self.gray_root
+
+        # 对方根源区域内的叶与干不能被攀附
+        growers = (self.pieces[f'{prefix}_leaf'] | self.pieces[f'{prefix}_trunk']) & ~opponent_root
+        zone = self.dilate(growers)
+
+        # 枝棋子只取第一枚（与逐格扫描时找到的枝一致）
+        branch = self.pieces[f'{prefix}_branch']
+        if branch:
+            zone |= self.branch_zone(branch & -branch)
+
+        return zone & ~self.occupied() & ~own_root & self.full
+
+    def cells(self, mask):
+        # 按行优先顺序遍历掩码中的格子
+        while mask:
+            low = mask & -mask
+            index = low.bit_length() - 1
+            yield index % self.width, index // self.width
+            mask ^= low
@@ -16,117 +16,130 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import pygame
-from config import GRID_SIZE, BOARD_WIDTH, BOARD_HEIGHT, WHITE, BLACK, LIGHT_GREEN, LIGHT_GRAY, DARK_GREEN, DARK_GRAY, PLAYER_GRAY, PLAYER_GREEN
+from engine import GameState
+from assets import assets
+from profiler import profiler
+from config import GRID_SIZE, MIN_GRID_SIZE, SCREEN_WIDTH, SCREEN_HEIGHT
 
 class Board:
-    def __init__(self):
-        self.grid_size = GRID_SIZE
-        self.width = BOARD_WIDTH
-        self.height = BOARD_HEIGHT
-        self.board = [[(None, None) for _ in range(self.width)] for _ in range(self.height)]  # 初始化为 (None, None)
-        self.game = None  # 添加对Game实例的引用
-        # 初始化棋盘状态
-        self.setup_board()
+    def __init__(self, state=None, view_width=SCREEN_WIDTH, view_height=SCREEN_HEIGHT):
+        self.state = state if state is not None else GameState()  # 规则引擎中的局面
+        self.width = self.state.width
+        self.height = self.state.height
+        # 格子按窗口缩放，缩放到下限仍放不下时通过滚动查看棋盘的其余部分
+        self.view_width = view_width
+        self.view_height = view_height
+        fit = min(view_width // self.width, view_height // self.height)
+        self.grid_size = max(MIN_GRID_SIZE, min(GRID_SIZE, fit))
+        self.scroll_x = 0  # 视图左上角在棋盘上的像素位置
+        self.scroll_y = 0
+        self.max_scroll_x = max(self.width * self.grid_size - view_width, 0)
+        self.max_scroll_y = max(self.height * self.grid_size - view_height, 0)
+        self.atlas = assets.sprites(self.grid_size)  # 预先绘制的格子图块
+        # 增量绘制：每帧只重绘发生变化的格子
+        self.dirty_cells = set()
+        self.full_redraw = True
+        self.drawn_legal_mask = 0  # 上一次绘制时的可落子格子
+        self.drawn_player = None
+
+    @property
+    def board(self):
+        # 与局面共享同一棋盘
+        return self.state.board
 
     def setup_board(self):
-        # 初始化根源区域
-        for y in range(self.height):
-            for x in range(self.width):
-                if y == 0 and (x >= self.width // 4 and x < self.width * 3 // 4):
-                    self.board[y][x] = ('green_root', None)  # 青方根源
-                elif y == self.height - 1 and (x >= self.width // 4 and x < self.width * 3 // 4):
-                    self.board[y][x] = ('gray_root', None)  # 灰方根源
-                else:
-                    self.board[y][x] = (None, None)  # 普通格子，无棋子
-
-        # 青方初始“叶”棋子
-        self.board[1][self.width // 2 - 1] = (None, 'green_leaf')
-        self.board[1][self.width // 2] = (None, 'green_leaf')
-        # 灰方初始“叶”棋子
-        self.board[self.height - 2][self.width // 2 - 1] = (None, 'gray_leaf')
-        self.board[self.height - 2][self.width // 2] = (None, 'gray_leaf')
+        # 初始化棋盘状态
+        self.state.setup_board()
+
+    def cell_rect(self, x, y):
+        return pygame.Rect(x * self.grid_size - self.scroll_x, y * self.grid_size - self.scroll_y,
+                           self.grid_size, self.grid_size)
+
+    def cell_at(self, pos):
+        # 屏幕坐标所在的格子，不在棋盘上时返回None
+        x = (pos[0] + self.scroll_x) // self.grid_size
+        y = (pos[1] + self.scroll_y) // self.grid_size
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return x, y
+        return None
+
+    def cells_in_rect(self, rect):
+        # 与屏幕矩形相交的所有格子
+        left = max((rect.left + self.scroll_x) // self.grid_size, 0)
+        right = min((rect.right - 1 + self.scroll_x) // self.grid_size, self.width - 1)
+        top = max((rect.top + self.scroll_y) // self.grid_size, 0)
+        bottom = min((rect.bottom - 1 + self.scroll_y) // self.grid_size, self.height - 1)
+        return {(x, y) for y in range(top, bottom + 1) for x in range(left, right + 1)}
+
+    def visible_cells(self):
+        return self.cells_in_rect(pygame.Rect(0, 0, self.view_width, self.view_height))
+
+    def scroll(self, dx, dy):
+        # 滚动视图，位置发生变化时返回True（此时整个视图需要重绘）
+        scroll_x = min(max(self.scroll_x + dx, 0), self.max_scroll_x)
+        scroll_y = min(max(self.scroll_y + dy, 0), self.max_scroll_y)
+        if (scroll_x, scroll_y) == (self.scroll_x, self.scroll_y):
+            return False
+        self.scroll_x, self.scroll_y = scroll_x, scroll_y
+        self.invalidate()
+        return True
+
+    def mark_dirty(self, cells):
+        self.dirty_cells.update(cells)
+
+    def mark_move(self, delta):
+        # 根据着法（或撤销）的变化记录需要重绘的格子：落子、推动链及其落点、被消除的格子
+        self.dirty_cells.add(delta.placed)
+        for push_chain, dx, dy in delta.pushes:
+            for x, y in push_chain:
+                self.dirty_cells.add((x, y))
+                self.dirty_cells.add((x + dx, y + dy))
+        for x, y, _ in delta.eliminated:
+            self.dirty_cells.add((x, y))
+
+    def invalidate(self):
+        # 下一帧整盘重绘
+        self.full_redraw = True
+
+    def collect_dirty(self):
+        # 本帧需要重绘的格子：被标记的格子，以及可落子预览发生变化的格子
+        legal_mask = self.state.legal_mask()  # 可落子格子在局面变化前只计算一次
+        if self.full_redraw:
+            return self.visible_cells()
+        changed = legal_mask ^ self.drawn_legal_mask
+        if self.state.current_player != self.drawn_player:
+            changed = legal_mask | self.drawn_legal_mask  # 预览圆点颜色随玩家变化
+        cells = set(self.dirty_cells)
+        while changed:
+            low = changed & -changed
+            index = low.bit_length() - 1
+            cells.add((index % self.width, index // self.width))
+            changed ^= low
+        if self.max_scroll_x or self.max_scroll_y:
+            cells &= self.visible_cells()  # 视图之外的格子滚动进来时会整体重绘
+        return cells
+
+    def draw_cells(self, screen, cells):
+        # 重绘指定格子，返回需要更新到屏幕的矩形列表
+        legal_mask = self.state.legal_mask()
+        rects = [self.cell_rect(x, y) for x, y in cells]
+        screen.blits([(self.cell_sprite(x, y, legal_mask), rect) for (x, y), rect in zip(cells, rects)], False)
+        self.dirty_cells = set()
+        self.full_redraw = False
+        self.drawn_legal_mask = legal_mask
+        self.drawn_player = self.state.current_player
+        return rects
 
     def draw(self, screen):
-        for y in range(self.height):
-            for x in range(self.width):
-                cell_type, piece = self.board[y][x]
-                # 绘制格子
-                color = WHITE
-                if cell_type == 'green_root':
-                    color = LIGHT_GREEN
-                elif cell_type == 'gray_root':
-                    color = LIGHT_GRAY
-                pygame.draw.rect(
-                    screen,
-                    color,
-                    (x * self.grid_size, y * self.grid_size, self.grid_size, self.grid_size)
-                )
-                pygame.draw.rect(
-                    screen,
-                    BLACK,
-                    (x * self.grid_size, y * self.grid_size, self.grid_size, self.grid_size),
-                    1
-                )
-                # 绘制棋子
-                if piece == 'gray_leaf':
-                    pygame.draw.circle(
-                        screen,
-                        DARK_GRAY,  # 灰方棋子颜色
-                        (x * self.grid_size + self.grid_size // 2, y * self.grid_size + self.grid_size // 2),
-                        self.grid_size // 2 - 5  # 留出边框
-                    )
-                elif piece == 'green_leaf':
-                    pygame.draw.circle(
-                        screen,
-                        DARK_GREEN,  # 青方棋子颜色
-                        (x * self.grid_size + self.grid_size // 2, y * self.grid_size + self.grid_size // 2),
-                        self.grid_size // 2 - 5
-                    )
-                elif piece == 'gray_trunk':
-                    # 绘制灰方干棋子（正方形）
-                    center_x = x * self.grid_size + self.grid_size // 2
-                    center_y = y * self.grid_size + self.grid_size // 2
-                    size = self.grid_size // 2 - 5
-                    rect_x = center_x - size
-                    rect_y = center_y - size
-                    pygame.draw.rect(screen, DARK_GRAY, (rect_x, rect_y, size * 2, size * 2))
-                elif piece == 'green_trunk':
-                    # 绘制青方干棋子（正方形）
-                    center_x = x * self.grid_size + self.grid_size // 2
-                    center_y = y * self.grid_size + self.grid_size // 2
-                    size = self.grid_size // 2 - 5
-                    rect_x = center_x - size
-                    rect_y = center_y - size
-                    pygame.draw.rect(screen, DARK_GREEN, (rect_x, rect_y, size * 2, size * 2))
-                elif piece == 'gray_branch':
-                    # 绘制灰方枝棋子（三角形）
-                    center_x = x * self.grid_size + self.grid_size // 2
-                    center_y = y * self.grid_size + self.grid_size // 2
-                    size = self.grid_size // 2 - 5
-                    points = [
-                        (center_x, center_y - size),  # 顶点
-                        (center_x - size, center_y + size),  # 左下
-                        (center_x + size, center_y + size)   # 右下
-                    ]
-                    pygame.draw.polygon(screen, DARK_GRAY, points)
-                elif piece == 'green_branch':
-                    # 绘制青方枝棋子（三角形）
-                    center_x = x * self.grid_size + self.grid_size // 2
-                    center_y = y * self.grid_size + self.grid_size // 2
-                    size = self.grid_size // 2 - 5
-                    points = [
-                        (center_x, center_y - size),  # 顶点
-                        (center_x - size, center_y + size),  # 左下
-                        (center_x + size, center_y + size)   # 右下
-                    ]
-                    pygame.draw.polygon(screen, DARK_GREEN, points)
-                
-                # 绘制可落子区域预览
-                if piece is None and self.game.is_valid_position(x, y):
-                    preview_color = DARK_GRAY if self.game.current_player == PLAYER_GRAY else DARK_GREEN
-                    pygame.draw.circle(
-                        screen,
-                        preview_color,
-                        (x * self.grid_size + self.grid_size // 2, y * self.grid_size + self.grid_size // 2),
-                        5  # 小圆点大小
-                    )
\ No newline at end of file
+        start = profiler.start()
+        cells = self.collect_dirty()
+        start = profiler.lap('render.collect', start)
+        rects = self.draw_cells(screen, cells)
+        profiler.lap('render.cells', start)
+        return rects
+
+    def cell_sprite(self, x, y, legal_mask):
+        # 格子、棋子与预览圆点合成的图块
+        cell_type, piece = self.board[y][x]
+        preview_player = self.state.current_player if legal_mask >> (y * self.width + x) & 1 else None
+        return self.atlas.sprite(cell_type, piece, preview_player)
@@ -0,0 +1,172 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# 开局库：由棋谱库中各局的前若干步统计得到，以局面的 Zobrist 哈希为键
+#   python book.py build games.tgdb --output opening.book --max-ply 16 --min-count 3
+#   python book.py show opening.book
+# 文件结构（小端）：文件头 HEADER 之后为按 (哈希, -次数) 排序的定长条目 ENTRY，
+# 查询时 mmap 映射文件并二分查找，不载入内存
+
+import argparse
+import mmap
+import os
+import struct
+
+from assets import asset_path
+from config import BOOK_PATH
+from engine import GameState
+from records import GameDatabase, decode_move, encode_move
+
+MAGIC = b'TGBK'
+VERSION = 1
+HEADER = struct.Struct('<4sHBBI')  # 魔数, 版本, 棋盘宽, 棋盘高, 条目数
+ENTRY = struct.Struct('<QHII')  # 局面哈希, 着法编码, 出现次数, 得分（胜2分、和1分，以落子方计）
+MAX_PLY = 16
+MIN_SAMPLES = 5  # 出现次数少于该值的着法胜率样本太少：生成时不写入开局库，查库时也不予采用
+MIN_WIN_RATE = 0.45  # 查库时落子方胜率低于该值的着法不予采用
+
+
+def collect(database, max_ply=MAX_PLY):
+    # 统计前 max_ply 步中每个 (局面, 着法) 的出现次数与得分
+    stats = {}
+    for index in range(len(database)):
+        result = database.result(index)
+        for ply, (state, move) in enumerate(database.replay(index)):
+            if ply >= max_ply:
+                break
+            key = (state.hash, encode_move(move, state.width))
+            entry = stats.get(key)
+            if entry is None:
+                entry = stats[key] = [0, 0]
+            entry[0] += 1
+            entry[1] += 1 if result is None else 2 if result == state.current_player else 0
+    return stats
+
+
+def write_book(path, stats, width, height, min_count=MIN_SAMPLES):
+    entries = sorted((key_hash, -count, code, score) for (key_hash, code), (count, score) in stats.items()
+                     if count >= min_count)
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, width, height, len(entries)))
+        for key_hash, count, code, score in entries:
+            file.write(ENTRY.pack(key_hash, code, -count, score))
+    return len(entries)
+
+
+class OpeningBook:
+    def __init__(self, path, min_samples=MIN_SAMPLES, min_win_rate=MIN_WIN_RATE):
+        self.min_samples = min_samples
+        self.min_win_rate = min_win_rate
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.width, self.height, self.count = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"不是TreeGo开局库文件：{path}")
+
+    def __len__(self):
+        return self.count
+
+    def entry(self, index):
+        return ENTRY.unpack_from(self.data, HEADER.size + ENTRY.size * index)
+
+    def lookup(self, state):
+        # 返回该局面下的 [(着法, 次数, 落子方胜率)]，按次数从多到少
+        if (state.width, state.height) != (self.width, self.height):
+            return []
+        key_hash = state.hash
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.entry(middle)[0] < key_hash:
+                low = middle + 1
+            else:
+                high = middle
+        moves = []
+        for index in range(low, self.count):
+            entry_hash, code, count, score = self.entry(index)
+            if entry_hash != key_hash:
+                break
+            moves.append((decode_move(code, self.width), count, score / (2 * count)))
+        return moves
+
+    def choose_move(self, state):
+        # 在样本足够、胜率达标的合法着法（防止哈希冲突）中选择胜率最高的，胜率相同时取次数多的
+        # 没有符合条件的着法时返回None，由调用方转为搜索
+        best = None
+        for move, count, win_rate in self.lookup(state):
+            if count < self.min_samples or win_rate < self.min_win_rate:
+                continue
+            x, y, piece_type = move
+            if not (state.is_legal_position(x, y) and state.can_use(piece_type)):
+                continue
+            if best is None or (win_rate, count) > best[1:]:
+                best = (move, win_rate, count)
+        return best[0] if best is not None else None
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+
+_books = {}
+
+
+def load_book(path=None):
+    # 同一文件只打开一次；文件不存在时返回None。默认使用程序目录下的 BOOK_PATH
+    if path is None:
+        path = asset_path(BOOK_PATH)
+    if path not in _books:
+        _books[path] = OpeningBook(path) if os.path.exists(path) else None
+    return _books[path]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TreeGo 开局库")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help="由棋谱库生成开局库")
+    build.add_argument('records', nargs='+', help="棋谱库文件（见 records.py）")
+    build.add_argument('--output', default=asset_path(BOOK_PATH))
+    build.add_argument('--max-ply', type=int, default=MAX_PLY)
+    build.add_argument('--min-count', type=int, default=MIN_SAMPLES)
+    show = subparsers.add_parser('show', help="显示开局库中初始局面的着法")
+    show.add_argument('book', nargs='?', default=asset_path(BOOK_PATH))
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        stats = {}
+        width = height = None
+        for path in args.records:
+            with GameDatabase(path) as database:
+                if width is not None and (database.width, database.height) != (width, height):
+                    parser.error(f"棋盘大小不一致：{path}")
+                width, height = database.width, database.height
+                for key, (count, score) in collect(database, args.max_ply).items():
+                    entry = stats.setdefault(key, [0, 0])
+                    entry[0] += count
+                    entry[1] += score
+        count = write_book(args.output, stats, width, height, args.min_count)
+        print(f"{args.output}：{count} 条着法")
+    else:
+        book = OpeningBook(args.book)
+        state = GameState(book.width, book.height)
+        print(f"{args.book}：{len(book)} 条着法")
+        for move, count, win_rate in book.lookup(state):
+            print(f"{move}  次数 {count}  胜率 {win_rate:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# 联机对战客户端：后台线程接收服务器消息，并以 pygame 事件的形式投递给界面主循环
+# 主循环阻塞等待事件时，收到网络消息也会被唤醒
+
+import socket
+import threading
+
+import pygame
+
+from config import SERVER_HOST, SERVER_PORT
+from protocol import MSG_JOIN, MSG_MOVE, MSG_WATCH, MessageBuffer, ProtocolError, encode_move, pack_message
+
+NETWORK_EVENT = pygame.event.custom_type()  # 事件属性：message_type, payload；断开连接时 message_type 为None
+CONNECT_TIMEOUT = 5  # 连接服务器的超时时间（秒）
+
+
+class OnlineClient:
+    def __init__(self, host=SERVER_HOST, port=SERVER_PORT, room='', watch=False):
+        self.host = host
+        self.port = port
+        self.room = room  # 房间名，空表示自动匹配
+        self.watch = watch  # 观战：只接收关键帧与每步的变化
+        self.sock = None
+        self.thread = None
+        self.width = None  # 收到 JOINED 后由界面设置
+
+    def connect(self):
+        # 连接失败时抛出 OSError
+        self.sock = socket.create_connection((self.host, self.port), timeout=CONNECT_TIMEOUT)
+        self.sock.settimeout(None)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.sendall(pack_message(MSG_WATCH if self.watch else MSG_JOIN, self.room.encode('utf-8')))
+        self.thread = threading.Thread(target=self.receive_loop, daemon=True)
+        self.thread.start()
+
+    def send_move(self, move):
+        try:
+            self.sock.sendall(pack_message(MSG_MOVE, encode_move(move, self.width)))
+        except OSError:
+            pass  # 连接已断开，接收线程会投递断开事件
+
+    def receive_loop(self):
+        buffer = MessageBuffer()
+        try:
+            while True:
+                data = self.sock.recv(4096)
+                if not data:
+                    break
+                for message_type, payload in buffer.feed(data):
+                    pygame.event.post(pygame.event.Event(NETWORK_EVENT, message_type=message_type, payload=payload))
+        except (OSError, ProtocolError):
+            pass
+        pygame.event.post(pygame.event.Event(NETWORK_EVENT, message_type=None, payload=b''))
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self.sock.close()
+            self.sock = None
@@ -15,23 +15,27 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-import pygame
-
 # 棋盘单元格结构：(cell_type, piece_type)
 # cell_type: green_root, gray_root, None
 # piece_type: gray_piece, green_piece, None
 
 # 游戏窗体
 TITLE = "树棋TreeGo"  # 标题
-ICON = pygame.image.load("assets/ICON.jpg")  # 图标
+ICON_PATH = "assets/ICON.jpg"  # 图标，相对于程序目录（由 assets 在第一次使用时加载，规则代码无需pygame）
+BOOK_PATH = "assets/opening.book"  # 开局库，存在时人机对战的AI先查库再搜索（见 book.py）
+FONT_PATH = r"c:\Windows\Fonts\msyh.ttc"  # 微软雅黑字体
+FALLBACK_FONTS = "microsoftyahei,notosanscjksc,notosanscjk,sourcehansans,wenquanyimicrohei,wenquanyizenhei,pingfangsc,simhei"  # 找不到微软雅黑时依次尝试的系统字体
 
 # 游戏配置
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 800
 FPS = 60
+PERF_HUD_INTERVAL = 500  # 性能面板（F3）的刷新间隔（毫秒）
 
-# 棋盘大小
-GRID_SIZE = 100
+# 棋盘大小（默认值，可在启动时用 --size 指定）
+GRID_SIZE = 100  # 格子边长上限，棋盘按窗口大小缩放
+MIN_GRID_SIZE = 40  # 格子边长下限，缩放到此仍放不下时棋盘可滚动
+SCROLL_STEP = 40  # 方向键、滚轮每次滚动的像素
 BOARD_WIDTH = 8
 BOARD_HEIGHT = 8
 
@@ -55,6 +59,10 @@ BUTTON_HOVER = (100, 149, 237)  # 矢车菊蓝
 BUTTON_SHADOW = (47, 79, 79)    # 深青灰色
 BUTTON_TEXT = (255, 255, 255)   # 白色
 
+# 联机对战服务器地址
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 7788
+
 # 玩家编码
 PLAYER_GRAY = 1
 PLAYER_GREEN = 2
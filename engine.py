@@ -0,0 +1,611 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# 规则引擎：不依赖pygame，可在无显示环境下模拟对局
+# 着法格式：(x, y, piece_type)，piece_type 为 'leaf', 'branch', 'trunk'
+
+from bitboard import PIECE_NAMES, BitBoard
+from config import BOARD_WIDTH, BOARD_HEIGHT, PLAYER_GRAY, PLAYER_GREEN
+from zobrist import ZOBRIST_FLAGS, zobrist_keys
+
+PIECE_TYPES = ['leaf', 'branch', 'trunk']
+MIN_BOARD_SIZE = 4  # 根源区域与初始棋子所需的最小边长
+MAX_BOARD_SIZE = 64  # 联机协议与棋谱格式所能表示的最大边长
+PIECE_SIDES = {
+    'gray_leaf': PLAYER_GRAY, 'gray_branch': PLAYER_GRAY, 'gray_trunk': PLAYER_GRAY,
+    'green_leaf': PLAYER_GREEN, 'green_branch': PLAYER_GREEN, 'green_trunk': PLAYER_GREEN,
+}
+
+# 撤销着法时需要恢复的全部局面标志
+FLAG_NAMES = [
+    'current_player', 'result',
+    'gray_branch_used', 'green_branch_used', 'gray_branch_cooldown', 'green_branch_cooldown',
+    'gray_trunk_used', 'green_trunk_used', 'gray_trunk_cooldown', 'green_trunk_cooldown',
+    'legal_mask_cache', 'hash',
+    'gray_count', 'green_count', 'gray_count_in_green_root', 'green_count_in_gray_root',
+]
+
+
+def board_size(text):
+    # 命令行参数 "12" 或 "12x16" -> (宽, 高)
+    width, _, height = text.lower().partition('x')
+    width = int(width)
+    height = int(height) if height else width
+    if not (MIN_BOARD_SIZE <= width <= MAX_BOARD_SIZE and MIN_BOARD_SIZE <= height <= MAX_BOARD_SIZE):
+        raise ValueError(f"棋盘边长须在 {MIN_BOARD_SIZE} 到 {MAX_BOARD_SIZE} 之间")
+    return width, height
+
+
+class MoveDelta:
+    # 一步着法造成的全部变化，撤销时按相反顺序恢复
+    __slots__ = ('move', 'placed', 'pushes', 'eliminated', 'flags')
+
+    def __init__(self, move, placed, flags):
+        self.move = move  # (x, y, piece_type)
+        self.placed = placed  # 落子格子 (x, y)
+        self.pushes = []  # [(push_chain, dx, dy)]，push_chain 为推动前的格子列表
+        self.eliminated = []  # EliminationEvent，可按 (x, y, piece) 遍历
+        self.flags = flags  # 落子前的 FLAG_NAMES 各项取值
+
+
+class EliminationEvent:
+    # 一次消除的结果，界面重绘、联机广播与搜索可直接使用，无需重新扫描棋盘
+    __slots__ = ('cells', 'cooldowns', 'masks')
+
+    def __init__(self):
+        self.cells = []  # [(x, y, piece)]，按消除顺序记录
+        self.cooldowns = []  # 因被消除而进入冷却的枝/干棋子
+        self.masks = {PLAYER_GRAY: 0, PLAYER_GREEN: 0}  # 每方被消除格子的位掩码
+
+    def __iter__(self):
+        return iter(self.cells)
+
+    def __reversed__(self):
+        return reversed(self.cells)
+
+    def __len__(self):
+        return len(self.cells)
+
+
+class EliminationLines:
+    # 在位掩码上寻找三连，第 y * width + x 位对应格子 (x, y)
+    # 根源规则：同一连线中遇到第二个根源格子时计数清零（该格不计入），
+    # 只有含两个及以上根源格子的线才会出现这种中断，预先列出这些线逐格处理，其余线用移位一次求出
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.geometry = BitBoard(width, height)
+        root_columns = range(width // 4, width * 3 // 4)
+
+        def is_root(x, y):
+            return (y == 0 or y == height - 1) and x in root_columns
+
+        # 每条线为 (根源格子掩码, [(位, 是否根源格子)])，按扫描顺序排列
+        columns = [[(x, y) for y in range(height)] for x in range(width)]
+        rows = [[(x, y) for x in range(width)] for y in range(height)]
+        self.vertical_root_lines = self.root_lines(columns, is_root)
+        self.horizontal_root_lines = self.root_lines(rows, is_root)
+
+    def root_lines(self, lines, is_root):
+        root_lines = []
+        for line in lines:
+            cells = [(1 << (y * self.width + x), is_root(x, y)) for x, y in line]
+            root_mask = sum(bit for bit, root in cells if root)
+            if root_mask.bit_count() > 1:
+                root_lines.append((root_mask, cells))
+        return root_lines
+
+    def root_breaks(self, mask, lines):
+        # 连线因根源规则中断的格子
+        breaks = 0
+        for root_mask, cells in lines:
+            if (mask & root_mask).bit_count() < 2:
+                continue
+            root_count = 0
+            for bit, is_root in cells:
+                if not mask & bit:
+                    root_count = 0
+                elif is_root:
+                    root_count += 1
+                    if root_count > 1:
+                        breaks |= bit
+                        root_count = 0
+        return breaks
+
+    def vertical_runs(self, mask):
+        # 纵向连续三枚及以上的棋子（整段消除）
+        width = self.width
+        mask &= ~self.root_breaks(mask, self.vertical_root_lines)
+        triples = mask & (mask >> width) & (mask >> 2 * width)
+        return triples | (triples << width) | (triples << 2 * width)
+
+    def horizontal_runs(self, mask):
+        geometry = self.geometry
+        mask &= ~self.root_breaks(mask, self.horizontal_root_lines)
+        triples = mask & geometry.shift_west(mask) & geometry.shift_west(geometry.shift_west(mask))
+        return triples | geometry.shift_east(triples) | geometry.shift_east(geometry.shift_east(triples))
+
+    def cells(self, mask, row_first=False):
+        # 返回掩码中的格子 (x, y)；row_first 时返回 (y, x)
+        cells = []
+        while mask:
+            low = mask & -mask
+            index = low.bit_length() - 1
+            x, y = index % self.width, index // self.width
+            cells.append((y, x) if row_first else (x, y))
+            mask ^= low
+        return cells
+
+
+_lines_by_size = {}
+
+
+def elimination_lines(width, height):
+    # 同一棋盘大小共用一份
+    lines = _lines_by_size.get((width, height))
+    if lines is None:
+        lines = _lines_by_size[(width, height)] = EliminationLines(width, height)
+    return lines
+
+
+class GameState:
+    def __init__(self, width=BOARD_WIDTH, height=BOARD_HEIGHT):
+        self.width = width
+        self.height = height
+        self.board = [[(None, None) for _ in range(self.width)] for _ in range(self.height)]  # 初始化为 (None, None)
+        self.current_player = PLAYER_GRAY  # 灰方先行
+        self.result = None  # 胜者，未分胜负时为None
+        # 胜负判定用的计数器，随 set_piece 增量维护
+        self.gray_count = 0  # 灰方棋子总数
+        self.green_count = 0  # 青方棋子总数
+        self.green_count_in_gray_root = 0
+        self.gray_count_in_green_root = 0
+        self.root_left = self.width // 4  # 根源区域的列范围 [root_left, root_right)
+        self.root_right = self.width * 3 // 4
+        self.masks = {name: 0 for name in PIECE_NAMES}  # 每种棋子所在格子的位掩码，随 set_piece 增量维护
+        self.gray_branch_used = False  # 灰方枝棋子是否已使用
+        self.green_branch_used = False  # 青方枝棋子是否已使用
+        self.gray_branch_cooldown = False  # 灰方枝棋子是否在冷却中
+        self.green_branch_cooldown = False  # 青方枝棋子是否在冷却中
+        self.gray_trunk_used = False  # 灰方干棋子是否已使用
+        self.green_trunk_used = False  # 青方干棋子是否已使用
+        self.gray_trunk_cooldown = False  # 灰方干棋子是否在冷却中
+        self.green_trunk_cooldown = False  # 青方干棋子是否在冷却中
+        self.legal_mask_cache = None  # 当前局面可落子格子的缓存，局面变化时置为None
+        self.history = []  # 已执行着法的 MoveDelta 栈，用于撤销
+        self.zobrist = zobrist_keys(self.width * self.height)
+        self.hash = 0  # 局面的 Zobrist 哈希，随落子、推动、消除增量更新
+        # 初始化棋盘状态
+        self.setup_board()
+
+    def setup_board(self):
+        # 初始化根源区域
+        for y in range(self.height):
+            for x in range(self.width):
+                if y == 0 and (x >= self.width // 4 and x < self.width * 3 // 4):
+                    self.board[y][x] = ('green_root', None)  # 青方根源
+                elif y == self.height - 1 and (x >= self.width // 4 and x < self.width * 3 // 4):
+                    self.board[y][x] = ('gray_root', None)  # 灰方根源
+                else:
+                    self.board[y][x] = (None, None)  # 普通格子，无棋子
+
+        # 青方初始“叶”棋子
+        self.board[1][self.width // 2 - 1] = (None, 'green_leaf')
+        self.board[1][self.width // 2] = (None, 'green_leaf')
+        # 灰方初始“叶”棋子
+        self.board[self.height - 2][self.width // 2 - 1] = (None, 'gray_leaf')
+        self.board[self.height - 2][self.width // 2] = (None, 'gray_leaf')
+        self.legal_mask_cache = None
+        self.hash = self.compute_hash()
+        self.count_pieces()
+
+    def count_pieces(self):
+        # 从头统计胜负判定用的计数器与棋子位掩码，仅在初始化时使用，之后均为增量更新
+        self.gray_count = self.green_count = 0
+        self.green_count_in_gray_root = self.gray_count_in_green_root = 0
+        self.masks = {name: 0 for name in PIECE_NAMES}
+        for y in range(self.height):
+            for x in range(self.width):
+                piece = self.board[y][x][1]
+                if piece is not None:
+                    self.count_piece(piece, x, y, 1)
+                    self.masks[piece] |= 1 << (y * self.width + x)
+
+    def count_piece(self, piece, x, y, step):
+        # 棋子出现（step=1）或离开（step=-1）格子 (x, y) 时更新计数器
+        in_root_columns = self.root_left <= x < self.root_right
+        if PIECE_SIDES[piece] == PLAYER_GRAY:
+            self.gray_count += step
+            if y == 0 and in_root_columns:
+                self.gray_count_in_green_root += step
+        else:
+            self.green_count += step
+            if y == self.height - 1 and in_root_columns:
+                self.green_count_in_gray_root += step
+
+    def compute_hash(self):
+        # 从头计算整个局面的哈希，仅在初始化时使用，之后均为增量更新
+        value = 0
+        for y in range(self.height):
+            for x in range(self.width):
+                piece = self.board[y][x][1]
+                if piece is not None:
+                    value ^= self.zobrist.pieces[piece][y * self.width + x]
+        if self.current_player == PLAYER_GREEN:
+            value ^= self.zobrist.side
+        for name in ZOBRIST_FLAGS:
+            if getattr(self, name):
+                value ^= self.zobrist.flags[name]
+        return value
+
+    def set_piece(self, x, y, piece):
+        # 修改格子上的棋子并同步更新哈希、计数器与位掩码
+        cell_type, old_piece = self.board[y][x]
+        index = y * self.width + x
+        if old_piece is not None:
+            self.hash ^= self.zobrist.pieces[old_piece][index]
+            self.count_piece(old_piece, x, y, -1)
+            self.masks[old_piece] ^= 1 << index
+        if piece is not None:
+            self.hash ^= self.zobrist.pieces[piece][index]
+            self.count_piece(piece, x, y, 1)
+            self.masks[piece] ^= 1 << index
+        self.board[y][x] = (cell_type, piece)
+
+    def set_flag(self, name, value):
+        # 修改枝/干的使用、冷却标志并同步更新哈希
+        if getattr(self, name) != value:
+            self.hash ^= self.zobrist.flags[name]
+            setattr(self, name, value)
+
+    def copy(self):
+        # 复制当前局面（棋盘格子为不可变元组，逐行浅拷贝即可）
+        state = GameState.__new__(GameState)
+        state.__dict__.update(self.__dict__)
+        state.board = [row[:] for row in self.board]
+        state.masks = dict(self.masks)
+        state.history = self.history[:]
+        return state
+
+    def legal_moves(self):
+        # 返回当前玩家所有合法着法
+        moves = []
+        if self.result is not None:
+            return moves
+        piece_types = [piece_type for piece_type in PIECE_TYPES if self.can_use(piece_type)]
+        mask = self.legal_mask()
+        while mask:
+            low = mask & -mask
+            index = low.bit_length() - 1
+            for piece_type in piece_types:
+                moves.append((index % self.width, index // self.width, piece_type))
+            mask ^= low
+        return moves
+
+    def legal_mask(self):
+        # 当前玩家可落子格子的位掩码（第 y * width + x 位），每个局面只计算一次
+        if self.legal_mask_cache is None:
+            bitboard = BitBoard.from_state(self)
+            self.legal_mask_cache = bitboard.legal_mask(self.current_player)
+        return self.legal_mask_cache
+
+    def is_legal_position(self, x, y):
+        # 查询缓存的可落子格子（已包含格子为空的判断）
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return False
+        return bool(self.legal_mask() >> (y * self.width + x) & 1)
+
+    def can_use(self, piece_type):
+        # 检查特殊棋子的使用限制
+        piece_prefix = 'gray' if self.current_player == PLAYER_GRAY else 'green'
+        if piece_type == 'branch':
+            return not (getattr(self, f'{piece_prefix}_branch_used') or getattr(self, f'{piece_prefix}_branch_cooldown'))
+        if piece_type == 'trunk':
+            return not (getattr(self, f'{piece_prefix}_trunk_used') or getattr(self, f'{piece_prefix}_trunk_cooldown'))
+        return True
+
+    def apply(self, move):
+        # 执行一步着法，成功落子返回True
+        return self.apply_move(move) is not None
+
+    def apply_move(self, move, profiler=None):
+        # 执行一步着法并压入撤销栈，返回 MoveDelta；着法非法时返回None
+        # 传入 profiler 时记录各阶段耗时（界面落子时使用，AI搜索不传入）
+        start = profiler.start() if profiler is not None else None
+        x, y, selected_piece_type = move
+        if self.result is not None:
+            return None
+        # 检查是否可落子
+        if not self.is_legal_position(x, y):
+            return None
+
+        piece_prefix = 'gray' if self.current_player == PLAYER_GRAY else 'green'
+        piece_type = f'{piece_prefix}_{selected_piece_type}'
+
+        # 检查特殊棋子的使用限制
+        if not self.can_use(selected_piece_type):
+            return None  # 已使用过枝/干棋子或在冷却中
+        delta = MoveDelta(move, (x, y), tuple([getattr(self, name) for name in FLAG_NAMES]))
+        self.history.append(delta)
+        if selected_piece_type == 'branch':
+            self.set_flag(f'{piece_prefix}_branch_used', True)
+        elif selected_piece_type == 'trunk':
+            self.set_flag(f'{piece_prefix}_trunk_used', True)
+
+        # 放置棋子
+        self.set_piece(x, y, piece_type)
+        self.legal_mask_cache = None
+
+        # 更新冷却
+        self.update_cooldown()
+        if start is not None:
+            start = profiler.lap('rules.validate', start)
+
+        # 推动逻辑
+        delta.pushes = self.push_pieces(x, y)
+        if start is not None:
+            start = profiler.lap('rules.push', start)
+
+        # 消除逻辑
+        delta.eliminated = self.eliminate_pieces()
+        if start is not None:
+            start = profiler.lap('rules.eliminate', start)
+
+        # 判定胜利
+        if self.is_win():
+            self.result = self.current_player
+        else:
+            # 切换玩家
+            self.switch_player()
+
+            # 判定胜利
+            if self.is_win():
+                self.result = self.current_player
+        if start is not None:
+            profiler.lap('rules.win', start)
+        return delta
+
+    def unmake(self):
+        # 撤销最近一步着法，恢复到落子前的局面，返回被撤销的 MoveDelta
+        delta = self.history.pop()
+        board = self.board
+        masks = self.masks
+        width = self.width
+        # 恢复被消除的棋子
+        for x, y, piece in reversed(delta.eliminated):
+            board[y][x] = (board[y][x][0], piece)
+            masks[piece] ^= 1 << (y * width + x)
+        # 反向推回被推动的棋子
+        for push_chain, dx, dy in reversed(delta.pushes):
+            for x, y in push_chain:
+                piece = board[y + dy][x + dx][1]
+                board[y][x] = (board[y][x][0], piece)
+                board[y + dy][x + dx] = (board[y + dy][x + dx][0], None)
+                masks[piece] ^= 1 << (y * width + x) | 1 << ((y + dy) * width + x + dx)
+        # 移除落下的棋子
+        x, y = delta.placed
+        masks[board[y][x][1]] ^= 1 << (y * width + x)
+        board[y][x] = (board[y][x][0], None)
+        # 恢复冷却、使用状态与当前玩家
+        for name, value in zip(FLAG_NAMES, delta.flags):
+            setattr(self, name, value)
+        return delta
+
+    def winner(self):
+        return self.result
+
+    def update_cooldown(self):
+        if self.current_player == PLAYER_GRAY:
+            self.set_flag('gray_branch_cooldown', False)
+            self.set_flag('gray_trunk_cooldown', False)
+        else:
+            self.set_flag('green_branch_cooldown', False)
+            self.set_flag('green_trunk_cooldown', False)
+
+    def switch_player(self):
+        # 切换玩家
+        self.current_player = PLAYER_GREEN if self.current_player == PLAYER_GRAY else PLAYER_GRAY
+        self.hash ^= self.zobrist.side
+        self.legal_mask_cache = None
+
+    def eliminate_pieces(self):
+        # 在双方棋子的位掩码上同时求出所有连线，返回 EliminationEvent
+        # 先当前玩家后敌方玩家，每方优先纵向消除：横向只在纵向消除后剩下的棋子中寻找
+        masks = {PLAYER_GRAY: 0, PLAYER_GREEN: 0}
+        for name, mask in self.masks.items():
+            masks[PIECE_SIDES[name]] |= mask
+
+        event = EliminationEvent()
+        enemy = PLAYER_GREEN if self.current_player == PLAYER_GRAY else PLAYER_GRAY
+        lines = elimination_lines(self.width, self.height)
+        for player in (self.current_player, enemy):
+            mask = masks[player]
+            vertical = lines.vertical_runs(mask)
+            horizontal = lines.horizontal_runs(mask & ~vertical)
+            if vertical or horizontal:
+                # 纵向按列、横向按行的顺序消除，与逐格扫描的顺序一致
+                self.remove_cells(sorted(lines.cells(vertical)), event)
+                self.remove_cells([(x, y) for y, x in sorted(lines.cells(horizontal, True))], event)
+                event.masks[player] = vertical | horizontal
+        return event
+
+    def remove_cells(self, cells, event):
+        for x, y in cells:
+            piece_type = self.board[y][x][1]
+            self.set_piece(x, y, None)
+            if self.set_cooldown(piece_type) and piece_type not in event.cooldowns:
+                event.cooldowns.append(piece_type)
+            event.cells.append((x, y, piece_type))
+
+    def set_cooldown(self, piece_type):
+        # 枝或干被消除后进入冷却，返回是否触发了冷却
+        prefix, _, kind = piece_type.partition('_')
+        if kind == 'leaf':
+            return False
+        self.set_flag(f'{prefix}_{kind}_used', False)
+        self.set_flag(f'{prefix}_{kind}_cooldown', True)
+        return True
+
+    def push_pieces(self, x, y):
+        # 获取当前玩家的敌方玩家
+        if self.current_player == PLAYER_GRAY:
+            enemy_pieces = ['green_leaf', 'green_branch']
+        else:
+            enemy_pieces = ['gray_leaf', 'gray_branch']
+
+        # 检查四个方向是否有敌方棋子，返回实际发生的推动 [(push_chain, dx, dy)]
+        pushes = []
+        directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]  # 上、下、左、右
+        for dx, dy in directions:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < self.width and 0 <= ny < self.height:
+                if self.board[ny][nx][1] in enemy_pieces:
+                    # 推动敌方棋子
+                    push_chain = self.push_enemy_piece(nx, ny, dx, dy)
+                    if push_chain:
+                        pushes.append((push_chain, dx, dy))
+        return pushes
+
+    def push_enemy_piece(self, x, y, dx, dy):
+        # 获取当前玩家的敌方棋子颜色
+        if self.current_player == PLAYER_GRAY:
+            enemy_pieces = ['green_leaf', 'green_branch']
+        else:
+            enemy_pieces = ['gray_leaf', 'gray_branch']
+
+        # 检查敌方棋子是否存在
+        if self.board[y][x][1] not in enemy_pieces:
+            return None
+
+        # 创建一个列表来存储需要推动的棋子的位置
+        push_chain = []
+        current_x, current_y = x, y
+        while True:
+            # 添加当前棋子到链式移动列表中
+            push_chain.append((current_x, current_y))
+            # 计算下一个位置
+            next_x = current_x + dx
+            next_y = current_y + dy
+            # 检查是否超出棋盘范围
+            if next_x < 0 or next_x >= self.width or next_y < 0 or next_y >= self.height:
+                break
+            # 检查下一个位置是否有敌方棋子
+            if self.board[next_y][next_x][1] in enemy_pieces:
+                current_x, current_y = next_x, next_y
+            else:
+                break  # 无法继续推动
+
+        # 计算最后一位棋子的新位置
+        new_y, new_x = current_y + dy, current_x + dx
+        # 检查新位置是否在对方根源区域
+        if self.is_in_opponent_root(new_x, new_y):
+            # 不能把对方的棋子推到对方根源区域
+            return None
+
+        # 检查新位置是否在棋盘内且为空，否则整条链式移动失败
+        if 0 <= new_x < self.width and 0 <= new_y < self.height and self.board[new_y][new_x][1] is None:
+            # 从链尾开始逐个后移，保留根源区域信息
+            for cx, cy in reversed(push_chain):
+                self.set_piece(cx + dx, cy + dy, self.board[cy][cx][1])
+                self.set_piece(cx, cy, None)
+            return push_chain
+        return None
+
+    def is_in_opponent_root(self, x, y):
+        if self.current_player == PLAYER_GRAY:
+            # 灰方玩家检查是否在青方根源区域
+            return self.is_green_root_area(y, x)
+        else:
+            # 青方玩家检查是否在灰方根源区域
+            return self.is_gray_root_area(y, x)
+
+    def is_win(self):
+        # 计数器随落子、推动、消除增量维护，胜负判定只需比较
+        if self.current_player == PLAYER_GRAY:
+            # 一般胜利条件：占满对方根源区域；特殊胜利条件：己方根源区域外没有敌方棋子
+            return (self.gray_count_in_green_root == self.root_right - self.root_left
+                    or self.green_count == self.green_count_in_gray_root)
+        return (self.green_count_in_gray_root == self.root_right - self.root_left
+                or self.gray_count == self.gray_count_in_green_root)
+
+    def is_valid_position(self, x, y):
+        # 检查是否在棋盘内
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return False
+
+        # 检查是否在自己的根源区域
+        if self.current_player == PLAYER_GRAY:
+            # 灰方玩家不能在自己的根源区域落子
+            if self.is_gray_root_area(y, x):
+                return False
+            leaf_color = 'gray_leaf'
+            trunk_color = 'gray_trunk'
+        else:
+            # 青方玩家不能在自己的根源区域落子
+            if self.is_green_root_area(y, x):
+                return False
+            leaf_color = 'green_leaf'
+            trunk_color = 'green_trunk'
+
+        # 检查是否在枝棋子的5x3范围内
+        if self.is_branch_valid_position(x, y):
+            return True
+
+        # 检查周围八个格子是否有"叶"棋子或“干”棋子
+        for dx in [-1, 0, 1]:
+            for dy in [-1, 0, 1]:
+                if dx == 0 and dy == 0:
+                    continue
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < self.width and 0 <= ny < self.height:
+                    # 检查周围格子是否在根源区域
+                    if not self.is_growable(nx, ny):
+                        continue  # 如果在根源区域，跳过该格子
+                    if self.board[ny][nx][1] == leaf_color or self.board[ny][nx][1] == trunk_color:
+                        return True
+        return False
+
+    def is_branch_valid_position(self, x, y):
+        # 检查是否可以放置枝棋子
+        if self.current_player == PLAYER_GRAY:
+            branch_color = 'gray_branch'
+        else:
+            branch_color = 'green_branch'
+
+        # 按行优先顺序的第一枚枝棋子，即位掩码的最低位
+        branch = self.masks[branch_color]
+        if not branch:
+            return False
+        index = (branch & -branch).bit_length() - 1
+        branch_x, branch_y = index % self.width, index // self.width
+
+        # 检查是否在枝棋子的5x3范围内
+        dx = abs(x - branch_x)
+        dy = abs(y - branch_y)
+        return dx <= 2 and dy <= 1  # 5x3范围（中心点左右各2格，上下各1格）
+
+    def is_growable(self, x, y):
+        # 检查棋子是否在对方的根源区域
+        return not self.is_in_opponent_root(x, y)
+
+    def is_green_root_area(self, y, x):
+        # 检查是否在青方根源区域内
+        return y == 0 and (x >= self.width // 4 and x < self.width * 3 // 4)
+
+    def is_gray_root_area(self, y, x):
+        # 检查是否在灰方根源区域内
+        return y == self.height - 1 and (x >= self.width // 4 and x < self.width * 3 // 4)
@@ -0,0 +1,151 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# 批量静态估值：N 个局面编码为 N x H x W 的棋子编码数组（与 simulator 相同），以 NumPy 数组运算一次打分
+# 邻域统计用补零后的平移切片求和（等价于与全1卷积核做卷积），不再逐格循环
+# 估值项：子力、进入及逼近对方根源、向对方根源前进、可生长区域大小、可被推动的棋子、自身的二连（被推成三连即被消除）
+# 前四项与 ai.evaluate 一致；分值以各局面行棋方的视角给出
+
+import numpy as np
+
+from ai import ADVANCE_BONUS, MOBILITY_BONUS, PIECE_VALUES, ROOT_BONUS
+from bitboard import PIECE_NAMES
+from config import PLAYER_GRAY, PLAYER_GREEN
+from simulator import BRANCH, COLOR_OF, EMPTY, KIND_OF, PIECE_CODES, TRUNK
+
+NEAR_ROOT_BONUS = 8  # 每枚与对方根源区域相邻（尚未进入）的棋子
+PUSH_EXPOSURE = 3  # 每枚可被对方落子推动的叶、枝
+ELIMINATION_THREAT = 4  # 每个"两枚己方棋子加一个空格"的三格窗口
+
+# 编码 -> 子力分值
+VALUE_OF = np.zeros(len(PIECE_CODES) + 1, dtype=np.int16)
+for _name, _code in PIECE_CODES.items():
+    VALUE_OF[_code] = PIECE_VALUES[_name.split('_')[1]]
+# PIECE_NAMES 中的顺序 -> 编码
+NAME_CODES = np.array([PIECE_CODES[name] for name in PIECE_NAMES], dtype=np.int8)
+
+
+def window_sum(mask, reach_x, reach_y):
+    # 每格周围 (2 * reach_x + 1) x (2 * reach_y + 1) 范围内（含自身）的计数，越界部分按0计
+    counts = mask.astype(np.int8)  # 5x3 范围内最多15枚
+    height, width = counts.shape[1], counts.shape[2]
+    padded = np.pad(counts, ((0, 0), (0, 0), (reach_x, reach_x)))
+    row = sum(padded[:, :, dx:dx + width] for dx in range(2 * reach_x + 1))
+    padded = np.pad(row, ((0, 0), (reach_y, reach_y), (0, 0)))
+    return sum(padded[:, dy:dy + height, :] for dy in range(2 * reach_y + 1))
+
+
+def orthogonal_neighbours(mask):
+    # 上下左右四个方向相邻的格子（不含自身）
+    padded = np.pad(mask, ((0, 0), (1, 1), (1, 1)))
+    return padded[:, :-2, 1:-1] | padded[:, 2:, 1:-1] | padded[:, 1:-1, :-2] | padded[:, 1:-1, 2:]
+
+
+def line_windows(mask):
+    # 横向与纵向所有连续三格窗口内的计数，返回 (横向 N x H x (W-2), 纵向 N x (H-2) x W)
+    counts = mask.astype(np.int8)
+    horizontal = counts[:, :, :-2] + counts[:, :, 1:-1] + counts[:, :, 2:]
+    vertical = counts[:, :-2, :] + counts[:, 1:-1, :] + counts[:, 2:, :]
+    return horizontal, vertical
+
+
+class BatchEvaluator:
+    def __init__(self, width, height, near_root=NEAR_ROOT_BONUS, push_exposure=PUSH_EXPOSURE,
+                 elimination_threat=ELIMINATION_THREAT):
+        self.width = width
+        self.height = height
+        self.cells = width * height
+        self.mask_bytes = (self.cells + 7) // 8
+        self.push_exposure = push_exposure
+        self.elimination_threat = elimination_threat
+        # 根源区域
+        green_root = np.zeros((height, width), dtype=bool)
+        green_root[0, width // 4:width * 3 // 4] = True
+        gray_root = np.zeros((height, width), dtype=bool)
+        gray_root[height - 1, width // 4:width * 3 // 4] = True
+        self.roots = {PLAYER_GRAY: (gray_root, green_root), PLAYER_GREEN: (green_root, gray_root)}  # (己方, 对方)
+        # 只与位置有关的估值合成每方一张权重图：进入对方根源、与对方根源相邻、向对方根源前进
+        rows = np.arange(height, dtype=np.int32)[:, None]
+        advance = {PLAYER_GRAY: height - 1 - rows, PLAYER_GREEN: rows}  # 灰方向第0行前进，青方向最后一行前进
+        self.weights = {}
+        for player, (_, enemy_root) in self.roots.items():
+            near_enemy_root = orthogonal_neighbours(enemy_root[None])[0] & ~enemy_root
+            self.weights[player] = (ROOT_BONUS * enemy_root + near_root * near_enemy_root
+                                    + ADVANCE_BONUS * np.broadcast_to(advance[player], (height, width))).astype(np.int16)
+
+    def encode(self, positions):
+        # positions 为 [(PIECE_NAMES 顺序的六个位掩码, 行棋方)]，返回 (N x H x W 棋子编码, 行棋方数组)
+        # 全部位掩码拼成一段字节后一次展开，不逐格循环
+        data = b''.join(mask.to_bytes(self.mask_bytes, 'little') for masks, _ in positions for mask in masks)
+        bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8), bitorder='little')
+        bits = bits.reshape(len(positions), len(PIECE_NAMES), self.mask_bytes * 8)[:, :, :self.cells]
+        boards = (bits * NAME_CODES[None, :, None]).sum(axis=1, dtype=np.int8)
+        players = np.array([player for _, player in positions], dtype=np.int8)
+        return boards.reshape(len(positions), self.height, self.width), players
+
+    def evaluate_states(self, states):
+        return self.evaluate(*self.encode([(tuple(state.masks[name] for name in PIECE_NAMES), state.current_player)
+                                           for state in states]))
+
+    def evaluate(self, boards, players):
+        # 返回每个局面以行棋方视角的分值（int32 数组）
+        color = COLOR_OF[boards]
+        kind = KIND_OF[boards]
+        values = VALUE_OF[boards]
+        empty = boards == EMPTY
+        empty_h, empty_v = line_windows(empty)
+        own = {}
+        legal = {}
+        cell_scores = {}
+        threats = {}
+        for player, (own_root, enemy_root) in self.roots.items():
+            own[player] = mine = color == player
+            # 可生长区域：叶/干的3x3范围、枝的5x3范围，排除己方根源与已占格子（对方根源内的叶与干不能被攀附）
+            growers = mine & (kind != BRANCH) & ~enemy_root
+            zone = (window_sum(growers, 1, 1) > 0) | (window_sum(mine & (kind == BRANCH), 2, 1) > 0)
+            legal[player] = zone & empty & ~own_root
+            cell_scores[player] = np.where(mine, values + self.weights[player], np.int16(0)) + \
+                np.int16(MOBILITY_BONUS) * legal[player]
+            # 己方两枚棋子加一个空格的三格窗口：对方可借推动凑成三连，使己方棋子被消除
+            own_h, own_v = line_windows(mine)
+            threats[player] = ((own_h == 2) & (empty_h == 1)).sum(axis=(1, 2)) + \
+                ((own_v == 2) & (empty_v == 1)).sum(axis=(1, 2))
+        # 可被推动的叶、枝：与对方可落子格子上下左右相邻
+        for player, enemy in ((PLAYER_GRAY, PLAYER_GREEN), (PLAYER_GREEN, PLAYER_GRAY)):
+            exposed = own[player] & (kind != TRUNK) & orthogonal_neighbours(legal[enemy])
+            cell_scores[player] -= np.int16(self.push_exposure) * exposed
+        score = (cell_scores[PLAYER_GRAY] - cell_scores[PLAYER_GREEN]).sum(axis=(1, 2), dtype=np.int32)
+        score -= (self.elimination_threat * (threats[PLAYER_GRAY] - threats[PLAYER_GREEN])).astype(np.int32)
+        return np.where(players == PLAYER_GRAY, score, -score)
+
+
+_evaluators = {}
+
+
+def batch_evaluator(width, height):
+    # 同一棋盘大小共用一个（默认权重的）估值器
+    evaluator = _evaluators.get((width, height))
+    if evaluator is None:
+        evaluator = _evaluators[(width, height)] = BatchEvaluator(width, height)
+    return evaluator
+
+
+def evaluate_batch(states):
+    # 一批同样大小的局面，返回以各自行棋方视角的分值数组
+    if not states:
+        return np.zeros(0, dtype=np.int32)
+    return batch_evaluator(states[0].width, states[0].height).evaluate_states(states)
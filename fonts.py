@@ -0,0 +1,81 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# 字体与文字缓存：每个字号的字体只从磁盘加载一次，渲染好的文字按 (文字, 字号, 颜色) 放入LRU缓存
+# 优先使用微软雅黑，找不到时依次尝试系统中的中文字体，最后退回pygame默认字体
+
+import os
+import warnings
+from collections import OrderedDict
+
+import pygame
+
+from config import FONT_PATH, FALLBACK_FONTS
+
+TEXT_CACHE_SIZE = 256  # 最多缓存的文字图像数量
+
+
+class FontManager:
+    def __init__(self, cache_size=TEXT_CACHE_SIZE):
+        self.cache_size = cache_size
+        self.path = None
+        self.path_resolved = False
+        self.fonts = {}  # 字号 -> pygame.font.Font
+        self.texts = OrderedDict()  # (文字, 字号, 颜色) -> Surface，按最近使用排序
+        self.hits = 0
+        self.misses = 0
+
+    def font_path(self):
+        # 字体文件只查找一次；返回 None 表示使用pygame默认字体
+        if not self.path_resolved:
+            if os.path.exists(FONT_PATH):
+                self.path = FONT_PATH
+            else:
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore')  # 部分平台缺少 fc-list 时会发出警告
+                    self.path = pygame.font.match_font(FALLBACK_FONTS)
+            self.path_resolved = True
+        return self.path
+
+    def font(self, size):
+        font = self.fonts.get(size)
+        if font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            font = self.fonts[size] = pygame.font.Font(self.font_path(), size)
+        return font
+
+    def render(self, text, size, color):
+        key = (text, size, color)
+        surface = self.texts.get(key)
+        if surface is not None:
+            self.texts.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = self.texts[key] = self.font(size).render(text, True, color)
+        if len(self.texts) > self.cache_size:
+            self.texts.popitem(last=False)
+        return surface
+
+    def clear(self):
+        # pygame.quit() 之后字体对象失效，需要清空
+        self.fonts = {}
+        self.texts.clear()
+
+
+font_manager = FontManager()
@@ -15,52 +15,144 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import itertools
+import threading
+import time
+
 import pygame
 from board import Board
-from config import SCREEN_WIDTH, SCREEN_HEIGHT, FPS, PLAYER_GRAY, PLAYER_GREEN, VICTORY_CONDITION, BOARD_WIDTH, \
-    BOARD_HEIGHT, WHITE, BLACK, GRID_SIZE, LIGHT_GRAY, LIGHT_GREEN, DARK_GRAY, DARK_GREEN, GREEN, RED
+from engine import GameState
+from ai import AlphaBetaAI
+from book import load_book
+from fonts import font_manager
+from profiler import profiler
+from scheduler import wait_events, remaining_time
+from client import NETWORK_EVENT
+from protocol import (JOINED, KEYFRAME, MSG_JOINED, MSG_START, MSG_MOVED, MSG_REJECT, MSG_LEFT, MSG_KEYFRAME,
+                      MSG_DELTA, REJECT_MESSAGES, apply_delta, decode_keyframe, decode_moved)
+from config import (SCREEN_WIDTH, SCREEN_HEIGHT, FPS, PLAYER_GRAY, PLAYER_GREEN, WHITE, BLACK, GREEN, BOARD_WIDTH,
+                    BOARD_HEIGHT, SCROLL_STEP, PERF_HUD_INTERVAL)
+
+SCROLL_KEYS = {pygame.K_LEFT: (-1, 0), pygame.K_RIGHT: (1, 0), pygame.K_UP: (0, -1), pygame.K_DOWN: (0, 1)}  # 方向键滚动棋盘
+# 性能面板显示的阶段：(阶段名, 显示名)
+PERF_PHASES = [('rules.validate', "落子校验"), ('rules.push', "推动"), ('rules.eliminate', "消除"), ('rules.win', "胜负判定"),
+               ('render.collect', "收集脏格"), ('render.cells', "绘制格子"), ('render.hud', "绘制界面"),
+               ('render.update', "更新屏幕"), ('ai.search', "AI搜索")]
+PERF_LINE_HEIGHT = 18
+AI_MOVE_EVENT = pygame.event.custom_type()  # AI后台搜索结束，事件属性：token, hash, move, elapsed（纳秒）
+_ai_tokens = itertools.count(1)  # 每次搜索的编号，跨对局唯一，用于识别过期的搜索结果
 
 
 class Game:
-    def __init__(self):
+    def __init__(self, ai_level=None, client=None, width=BOARD_WIDTH, height=BOARD_HEIGHT):
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         self.clock = pygame.time.Clock()
-        self.board = Board()
-        self.board.game = self  # 设置Board实例的game引用
-        self.current_player = PLAYER_GRAY  # 灰方先行
         self.game_over = False
         self.winner = None
-        self.victory_conditions_met = False
-        self.width = self.board.width  # 添加棋盘宽度
-        self.height = self.board.height  # 添加棋盘高度
-        self.green_count_in_gray_root = 0
-        self.gray_count_in_green_root = 0
-        self.gray_branch_used = False  # 灰方枝棋子是否已使用
-        self.green_branch_used = False  # 青方枝棋子是否已使用
-        self.gray_branch_cooldown = False  # 灰方枝棋子是否在冷却中
-        self.green_branch_cooldown = False  # 青方枝棋子是否在冷却中
-        self.gray_trunk_used = False  # 灰方干棋子是否已使用
-        self.green_trunk_used = False  # 青方干棋子是否已使用
-        self.gray_trunk_cooldown = False  # 灰方干棋子是否在冷却中
-        self.green_trunk_cooldown = False  # 青方干棋子是否在冷却中
+        self.new_board(width, height)
         self.selected_piece_type = 'leaf'  # 当前选择的棋子类型：'leaf', 'branch', 'trunk'
-        self.gray_pieces = ['gray_leaf', 'gray_branch', 'gray_trunk']
-        self.green_pieces = ['green_leaf', 'green_branch', 'green_trunk']
+        self.redo_moves = []  # 已撤销、可重做的着法
         self.victory_display_timer = 0  # 胜利显示计时器
         self.victory_display_duration = 3000  # 胜利显示持续时间（毫秒）
+        # 人机对战：玩家执灰方先行，AI执青方
+        self.ai = AlphaBetaAI.from_level(ai_level, book=load_book()) if ai_level else None
+        self.ai_player = PLAYER_GREEN
+        # AI在后台线程中搜索，期间界面照常响应；同一时间只有一个搜索（AI实例不可并发使用）
+        self.ai_thinking = False
+        self.ai_token = None
+        # 联机对战：着法发给服务器，收到服务器确认后才执行
+        self.client = client
+        self.online_player = None  # 服务器分配的本方玩家
+        self.online_started = False
+        self.online_status = "正在连接服务器" if client else None
+        # 界面按钮位置
+        self.back_button_rect = pygame.Rect(10, 40, 80, 30)
+        self.undo_button_rect = pygame.Rect(100, 40, 80, 30)
+        self.redo_button_rect = pygame.Rect(190, 40, 80, 30)
+        button_y = SCREEN_HEIGHT - 60
+        self.piece_button_rects = [pygame.Rect(10 + i * 120, button_y, 100, 40) for i in range(3)]
+        # 增量绘制状态：界面文字区域及其覆盖的格子
+        self.hud_rects = [pygame.Rect(10, 10, 260, 28), pygame.Rect(10, 80, 400, 28), self.back_button_rect,
+                          self.undo_button_rect, self.redo_button_rect] + self.piece_button_rects
+        # 性能面板（F3 切换）：显示帧耗时、帧率与各阶段耗时，定期刷新
+        self.show_perf = False
+        self.perf_rect = pygame.Rect(SCREEN_WIDTH - 330, 10, 320, PERF_LINE_HEIGHT * (len(PERF_PHASES) + 2) + 8)
+        self.drawn_perf_lines = None
+        self.perf_drawn_at = 0
+        self.perf_only = False  # 本帧只重绘了性能面板（不计入帧统计）
+        self.update_hud_cells()
+        self.drawn_hud_key = None
+        self.full_redraw = True
+        self.victory_drawn = False
+
+    def new_board(self, width, height):
+        # 创建指定大小的局面与棋盘视图（联机时以服务器的棋盘大小为准）
+        self.state = GameState(width, height)  # 规则引擎，负责全部落子、推动、消除与胜负判定
+        self.board = Board(self.state)
+        self.width = width  # 添加棋盘宽度
+        self.height = height  # 添加棋盘高度
+        self.full_redraw = True
+
+    def update_hud_cells(self):
+        # 界面文字下方的格子，随棋盘大小与滚动位置变化
+        self.hud_cells = set()
+        for rect in self.hud_rects:
+            self.hud_cells |= self.board.cells_in_rect(rect)
+        self.perf_cells = self.board.cells_in_rect(self.perf_rect)
+
+    @property
+    def current_player(self):
+        return self.state.current_player
 
     def run(self):
+        try:
+            self.main_loop()
+        finally:
+            self.cancel_ai_search()  # 退出对局时让后台搜索尽快结束
+
+    def main_loop(self):
         while True:  # 修改为无限循环
-            for event in pygame.event.get():
+            # 没有需要重绘的内容、也不在等待AI或胜利画面时，阻塞直到有输入
+            events = wait_events(self.idle_timeout())
+            frame_start = profiler.start()
+            for event in events:
                 if event.type == pygame.QUIT:
                     self.game_over = True
                     return
+                if event.type == NETWORK_EVENT:
+                    self.handle_network(event.message_type, event.payload)
+                if event.type == AI_MOVE_EVENT:
+                    self.handle_ai_move(event)
                 if event.type == pygame.MOUSEBUTTONDOWN and not self.game_over:  # 如果按下鼠标
                     self.handle_click(event.pos)  # 尝试进行落子
-
-            self.draw()
-            pygame.display.flip()
-            self.clock.tick(FPS)
+                if event.type == pygame.KEYDOWN and not self.game_over and event.mod & pygame.KMOD_CTRL:
+                    if event.key == pygame.K_z:
+                        self.undo()
+                    elif event.key == pygame.K_y:
+                        self.redo()
+                elif event.type == pygame.KEYDOWN and event.key in SCROLL_KEYS:
+                    self.scroll(*SCROLL_KEYS[event.key])
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    self.toggle_perf()
+                if event.type == pygame.MOUSEWHEEL:
+                    # 滚轮纵向滚动，按住 Shift 或横向滚轮时横向滚动
+                    if event.x or pygame.key.get_mods() & pygame.KMOD_SHIFT:
+                        self.scroll(-(event.x or event.y), 0)
+                    else:
+                        self.scroll(0, -event.y)
+
+            dirty_rects = self.draw()
+            if dirty_rects:
+                start = profiler.start()
+                pygame.display.update(dirty_rects)
+                if not self.perf_only:
+                    profiler.lap('render.update', start)
+                    profiler.frame(frame_start)
+                self.clock.tick(FPS)  # 连续重绘时限制帧率
+
+            # 轮到AI时在后台开始搜索，搜索结束时以 AI_MOVE_EVENT 唤醒主循环
+            if self.is_ai_turn() and not self.ai_thinking:
+                self.start_ai_search()
             
             # 检查游戏结束条件
             if self.game_over:
@@ -75,12 +167,47 @@ class Game:
                     # 如果是点击返回按钮结束，直接返回
                     return
 
+    def scroll(self, dx, dy):
+        # 棋盘大于窗口时滚动视图，dx, dy 以 SCROLL_STEP 为单位
+        if self.board.scroll(dx * SCROLL_STEP, dy * SCROLL_STEP):
+            self.update_hud_cells()
+            self.full_redraw = True
+
+    def toggle_perf(self):
+        self.show_perf = not self.show_perf
+        self.drawn_perf_lines = None
+        self.full_redraw = True  # 关闭时需要重绘面板下方的格子
+
+    def idle_timeout(self):
+        # 下一次等待事件的最长时间（毫秒），None 表示一直等到有输入
+        if self.full_redraw or self.board.full_redraw or self.board.dirty_cells:
+            return 0
+        if self.is_ai_turn() and not self.ai_thinking:
+            return 0
+        timeout = None
+        if self.game_over and self.winner:
+            if self.victory_display_timer == 0:
+                return 0
+            timeout = remaining_time(self.victory_display_timer, self.victory_display_duration)
+        if self.show_perf:
+            # 显示性能面板时定期醒来刷新（内容不变时不重绘）
+            perf_timeout = remaining_time(self.perf_drawn_at, PERF_HUD_INTERVAL)
+            timeout = perf_timeout if timeout is None else min(timeout, perf_timeout)
+        return timeout
+
     def handle_click(self, pos):
         x, y = pos
         # 检查是否点击了返回按钮
-        if hasattr(self, 'back_button_rect') and self.back_button_rect.collidepoint(pos):
+        if self.back_button_rect.collidepoint(pos):
             self.game_over = True
             return
+        # 检查是否点击了悔棋、重做按钮
+        if self.undo_button_rect.collidepoint(pos):
+            self.undo()
+            return
+        if self.redo_button_rect.collidepoint(pos):
+            self.redo()
+            return
             
         # 检查是否点击了棋子选择按钮
         button_y = SCREEN_HEIGHT - 60
@@ -92,488 +219,278 @@ class Game:
                     self.selected_piece_type = piece_types[button_x]
                 return
         
-        # 转换为棋盘坐标并尝试落子
-        grid_x = x // GRID_SIZE
-        grid_y = y // GRID_SIZE
-        if 0 <= grid_x < self.width and 0 <= grid_y < self.height:
-            self.place_piece(grid_x, grid_y)
+        # 转换为棋盘坐标（考虑缩放与滚动）并尝试落子
+        cell = self.board.cell_at(pos)
+        if cell is not None:
+            self.place_piece(*cell)
 
     def place_piece(self, x, y):
-        # 检查是否可落子
-        if self.board.board[y][x][1] is None and self.is_valid_position(x, y):
-            piece_prefix = 'gray' if self.current_player == PLAYER_GRAY else 'green'
-            piece_type = f'{piece_prefix}_{self.selected_piece_type}'
-            
-            # 检查特殊棋子的使用限制
-            if self.selected_piece_type == 'branch':
-                if piece_prefix == 'gray':
-                    if self.gray_branch_used or self.gray_branch_cooldown:
-                        return  # 已使用过枝棋子或在冷却中
-                    self.gray_branch_used = True
-                else:
-                    if self.green_branch_used or self.green_branch_cooldown:
-                        return  # 已使用过枝棋子或在冷却中
-                    self.green_branch_used = True
-            elif self.selected_piece_type == 'trunk':
-                if piece_prefix == 'gray':
-                    if self.gray_trunk_used or self.gray_trunk_cooldown:
-                        return  # 已使用过干棋子或在冷却中
-                    self.gray_trunk_used = True
-                else:
-                    if self.green_trunk_used or self.green_trunk_cooldown:
-                        return  # 已使用过干棋子或在冷却中
-                    self.green_trunk_used = True
-            
-            # 放置棋子
-            self.board.board[y][x] = (self.board.board[y][x][0], piece_type)
-
-            # 更新冷却
-            self.update_cooldown()
-
-            # 推动逻辑
-            self.push_pieces(x, y)
-
-            # 消除逻辑
-            self.eliminate_pieces()
-
-            # 判定胜利
-            if self.is_win():
-                self.game_over = True
-                self.winner = self.current_player
-                return
-
-            # 切换玩家
-            self.switch_player()
-
-            # 判定胜利
-            if self.is_win():
-                self.game_over = True
-                self.winner = self.current_player
-                return
-
-    def update_cooldown(self):
-        if self.current_player == PLAYER_GRAY:
-            self.gray_branch_cooldown = False
-            self.gray_trunk_cooldown = False
-        else:
-            self.green_branch_cooldown = False
-            self.green_trunk_cooldown = False
-
-    def switch_player(self):
-        # 切换玩家
-        self.current_player = PLAYER_GREEN if self.current_player == PLAYER_GRAY else PLAYER_GRAY
-
-    def eliminate_pieces(self):
-        # 获取当前玩家和敌方玩家的棋子颜色，根源颜色
-        if self.current_player == PLAYER_GRAY:
-            player_pieces = ['gray_leaf', 'gray_branch', 'gray_trunk']
-            enemy_pieces = ['green_leaf', 'green_branch', 'green_trunk']
-            player_root = "gray_root"
-            enemy_root = "green_root"
-        else:
-            player_pieces = ['green_leaf', 'green_branch', 'green_trunk']
-            enemy_pieces = ['gray_leaf', 'gray_branch', 'gray_trunk']
-            player_root = "green_root"
-            enemy_root = "gray_root"
-
-        # 检查纵向消除（当前玩家）
-        for x in range(self.width):
-            count = 0
-            root_count = 0
-            for y in range(self.height):
-                if self.board.board[y][x][1] in player_pieces:
-                    count += 1
-                    if self.is_in_root(x, y):
-                        root_count += 1
-
-                else:
-                    count = 0
-                    root_count = 0
-
-                if root_count > 1:
-                    count = 0
-                    root_count = 0
-
-                if count >= 3:
-                    # 消除从 y-2 到 y 的棋子
-                    for i in range(y - 2, y + 1):
-                        piece_type = self.board.board[i][x][1]
-                        self.board.board[i][x] = (self.board.board[i][x][0], None)
-                        # 设置冷却状态
-                        if piece_type == 'gray_branch':
-                            self.gray_branch_used = False
-                            self.gray_branch_cooldown = True
-                        elif piece_type == 'green_branch':
-                            self.green_branch_used = False
-                            self.green_branch_cooldown = True
-                        elif piece_type == 'gray_trunk':
-                            self.gray_trunk_used = False
-                            self.gray_trunk_cooldown = True
-                        elif piece_type == 'green_trunk':
-                            self.green_trunk_used = False
-                            self.green_trunk_cooldown = True
-
-        # 检查横向消除（当前玩家）
-        for y in range(self.height):
-            count = 0
-            root_count = 0
-            for x in range(self.width):
-                if self.board.board[y][x][1] in player_pieces:
-                    count += 1
-                    if self.is_in_root(x, y):
-                        root_count += 1
-
-                else:
-                    count = 0
-                    root_count = 0
-
-                if root_count > 1:
-                    count = 0
-                    root_count = 0
-
-                if count >= 3:
-                    # 消除从 x-2 到 x 的棋子
-                    for i in range(x - 2, x + 1):
-                        piece_type = self.board.board[y][i][1]
-                        self.board.board[y][i] = (self.board.board[y][i][0], None)
-                        # 设置冷却状态
-                        if piece_type == 'gray_branch':
-                            self.gray_branch_used = False
-                            self.gray_branch_cooldown = True
-                        elif piece_type == 'green_branch':
-                            self.green_branch_used = False
-                            self.green_branch_cooldown = True
-                        elif piece_type == 'gray_trunk':
-                            self.gray_trunk_used = False
-                            self.gray_trunk_cooldown = True
-                        elif piece_type == 'green_trunk':
-                            self.green_trunk_used = False
-                            self.green_trunk_cooldown = True
-
-        # 检查纵向消除（敌方玩家）
-        for x in range(self.width):
-            count = 0
-            root_count = 0
-            for y in range(self.height):
-                if self.board.board[y][x][1] in enemy_pieces:
-                    count += 1
-                    if self.is_in_root(x, y):
-                        root_count += 1
-
-                else:
-                    count = 0
-                    root_count = 0
-
-                if root_count > 1:
-                    count = 0
-                    root_count = 0
-
-                if count >= 3:
-                    # 消除从 y-2 到 y 的棋子
-                    for i in range(y - 2, y + 1):
-                        piece_type = self.board.board[i][x][1]
-                        self.board.board[i][x] = (self.board.board[i][x][0], None)
-                        # 设置冷却状态
-                        if piece_type == 'gray_branch':
-                            self.gray_branch_used = False
-                            self.gray_branch_cooldown = True
-                        elif piece_type == 'green_branch':
-                            self.green_branch_used = False
-                            self.green_branch_cooldown = True
-                        elif piece_type == 'gray_trunk':
-                            self.gray_trunk_used = False
-                            self.gray_trunk_cooldown = True
-                        elif piece_type == 'green_trunk':
-                            self.green_trunk_used = False
-                            self.green_trunk_cooldown = True
-
-        # 检查横向消除（敌方玩家）
-        for y in range(self.height):
-            count = 0
-            root_count = 0
-            for x in range(self.width):
-                if self.board.board[y][x][1] in enemy_pieces:
-                    count += 1
-                    if self.is_in_root(x, y):
-                        root_count += 1
-
-                else:
-                    count = 0
-                    root_count = 0
-
-                if root_count > 1:
-                    count = 0
-                    root_count = 0
-
-                if count >= 3:
-                    # 消除从 x-2 到 x 的棋子
-                    for i in range(x - 2, x + 1):
-                        piece_type = self.board.board[y][i][1]
-                        self.board.board[y][i] = (self.board.board[y][i][0], None)
-                        # 设置冷却状态
-                        if piece_type == 'gray_branch':
-                            self.gray_branch_used = False
-                            self.gray_branch_cooldown = True
-                        elif piece_type == 'green_branch':
-                            self.green_branch_used = False
-                            self.green_branch_cooldown = True
-                        elif piece_type == 'gray_trunk':
-                            self.gray_trunk_used = False
-                            self.gray_trunk_cooldown = True
-                        elif piece_type == 'green_trunk':
-                            self.green_trunk_used = False
-                            self.green_trunk_cooldown = True
-
-    def push_pieces(self, x, y):
-        # 获取当前玩家的敌方玩家
-        if self.current_player == PLAYER_GRAY:
-            enemy_pieces = ['green_leaf', 'green_branch']
-        else:
-            enemy_pieces = ['gray_leaf', 'gray_branch']
-
-        # 检查四个方向是否有敌方棋子
-        directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]  # 上、下、左、右
-        for dx, dy in directions:
-            nx, ny = x + dx, y + dy
-            if 0 <= nx < self.width and 0 <= ny < self.height:
-                if self.board.board[ny][nx][1] in enemy_pieces:
-                    # 推动敌方棋子
-                    self.push_enemy_piece(nx, ny, dx, dy)
-
-    def push_enemy_piece(self, x, y, dx, dy):
-        # 获取当前玩家的敌方棋子颜色
-        if self.current_player == PLAYER_GRAY:
-            enemy_pieces = ['green_leaf', 'green_branch']
-        else:
-            enemy_pieces = ['gray_leaf', 'gray_branch']
-
-        # 检查敌方棋子是否存在
-        if self.board.board[y][x][1] not in enemy_pieces:
+        if self.client is not None:
+            # 联机对战：只在本方回合把着法发给服务器
+            move = (x, y, self.selected_piece_type)
+            if (self.online_started and self.current_player == self.online_player
+                    and self.state.is_legal_position(x, y) and self.state.can_use(self.selected_piece_type)):
+                self.client.send_move(move)
             return
-
-        # 创建一个列表来存储需要推动的棋子的位置
-        push_chain = []
-        current_x, current_y = x, y
-        while True:
-            # 添加当前棋子到链式移动列表中
-            push_chain.append((current_x, current_y))
-            # 计算下一个位置
-            next_x = current_x + dx
-            next_y = current_y + dy
-            # 检查是否超出棋盘范围
-            if next_x < 0 or next_x >= self.width or next_y < 0 or next_y >= self.height:
-                break
-            # 检查下一个位置是否有敌方棋子
-            if self.board.board[next_y][next_x][1] in enemy_pieces:
-                current_x, current_y = next_x, next_y
-            else:
-                break  # 无法继续推动
-
-        # 如果链式移动列表为空，直接返回
-        if not push_chain:
-            return
-
-        # 计算最后一位棋子的新位置
-        new_y, new_x = current_y + dy, current_x + dx
-        # 检查新位置是否在对方根源区域
-        if self.is_in_opponent_root(new_x, new_y):
-            # 不能把对方的棋子推到对方根源区域
+        if self.is_ai_turn():
+            return  # AI思考期间不能替AI落子
+        # 落子、推动、消除与胜负判定均交由规则引擎处理
+        if self.apply_move((x, y, self.selected_piece_type)):
+            self.redo_moves = []  # 新的落子使重做记录失效
+            self.check_winner()
+
+    def handle_network(self, message_type, payload):
+        # 处理服务器消息，message_type 为None表示连接已断开
+        if message_type == MSG_JOINED:
+            self.online_player, width, height = JOINED.unpack(payload)
+            self.client.width = width
+            if (width, height) != (self.width, self.height):
+                self.new_board(width, height)
+                self.update_hud_cells()
+            self.online_status = "等待对手加入"
+        elif message_type == MSG_START:
+            self.online_started = True
+            if self.online_player is not None:
+                self.online_status = f"你执{'灰方' if self.online_player == PLAYER_GRAY else '青方'}"
+        elif message_type == MSG_KEYFRAME:
+            # 观战：关键帧给出完整局面，之后只按变化重绘
+            width, height = KEYFRAME.unpack_from(payload)[:2]
+            if (width, height) != (self.width, self.height):
+                self.new_board(width, height)
+                self.update_hud_cells()
+            decode_keyframe(payload, self.state)
+            self.board.invalidate()
+            self.online_status = "观战中"
+            self.check_winner()
+        elif message_type == MSG_DELTA:
+            self.board.mark_dirty(apply_delta(self.state, payload))
+            self.check_winner()
+        elif message_type == MSG_MOVED:
+            move, _, _ = decode_moved(payload, self.width)
+            self.apply_move(move)
+            self.check_winner()
+        elif message_type == MSG_REJECT:
+            self.online_status = REJECT_MESSAGES.get(payload[0], "着法被拒绝")
+        elif message_type == MSG_LEFT:
+            self.online_started = False
+            self.online_status = "对手已离开" if self.online_player is not None else "玩家已离开"
+        elif message_type is None and not self.game_over:
+            self.online_started = False
+            self.online_status = "与服务器断开连接"
+
+    def check_winner(self):
+        if self.state.winner() is not None:
+            self.game_over = True
+            self.winner = self.state.winner()
+
+    def apply_move(self, move):
+        # 执行着法，并把发生变化的格子交给棋盘重绘
+        delta = self.state.apply_move(move, profiler if profiler.enabled else None)
+        if delta is not None:
+            self.board.mark_move(delta)
+        return delta
+
+    def is_ai_turn(self):
+        return self.ai is not None and not self.game_over and self.current_player == self.ai_player
+
+    def start_ai_search(self):
+        # 对局面副本搜索，主线程中的局面不受影响
+        state = self.state.copy()
+        state.history = []
+        self.ai_token = next(_ai_tokens)
+        self.ai_thinking = True
+        self.ai.cancelled.clear()  # 上一次搜索已结束（其结果已由 handle_ai_move 处理），此后的取消只作用于本次搜索
+        threading.Thread(target=self.search_worker, args=(state, self.ai_token), daemon=True).start()
+
+    def search_worker(self, state, token):
+        start = time.perf_counter_ns()
+        move = self.ai.choose_move(state)
+        pygame.event.post(pygame.event.Event(AI_MOVE_EVENT, token=token, hash=state.hash, move=move,
+                                             elapsed=time.perf_counter_ns() - start))
+
+    def cancel_ai_search(self):
+        # 让正在进行的搜索在下一次检查时间时结束，其结果随后因局面已变化而被丢弃
+        # 搜索线程尚未进入 choose_move 时取消同样有效
+        if self.ai_thinking:
+            self.ai.cancel()
+
+    def handle_ai_move(self, event):
+        if event.token != self.ai_token:
+            return  # 已结束的对局遗留的搜索
+        self.ai_thinking = False
+        if profiler.enabled:
+            profiler.record('ai.search', event.elapsed)
+        # 搜索期间悔棋等操作改变了局面时丢弃结果，由主循环重新搜索
+        if not self.is_ai_turn() or event.hash != self.state.hash:
             return
-
-        # 检查新位置是否在棋盘内且为空
-        if 0 <= new_x < self.width and 0 <= new_y < self.height and self.board.board[new_y][new_x][1] is None:
-            # 更新最后一个棋子的位置，保留根源区域信息
-            self.board.board[new_y][new_x] = (self.board.board[new_y][new_x][0], self.board.board[current_y][current_x][1])
-            self.board.board[current_y][current_x] = (self.board.board[current_y][current_x][0], None)
-            # 更新其他棋子的位置
-            for i in range(len(push_chain) - 1, -1, -1):
-                if i == 0:
-                    prev_x, prev_y = x, y
-                else:
-                    prev_x, prev_y = push_chain[i - 1]
-                current_x, current_y = push_chain[i]
-                self.board.board[current_y][current_x] = (self.board.board[current_y][current_x][0], self.board.board[prev_y][prev_x][1])
-                self.board.board[prev_y][prev_x] = (self.board.board[prev_y][prev_x][0], None)
-        else:
-            # 如果无法推动到最后一个位置，整条链式移动失败
-            pass
-
-    def is_in_opponent_root(self, x, y):
-        if self.current_player == PLAYER_GRAY:
-            # 灰方玩家检查是否在青方根源区域
-            return y == 0 and (x >= self.width // 4 and x < self.width * 3 // 4)
-        else:
-            # 青方玩家检查是否在灰方根源区域
-            return y == self.height - 1 and (x >= self.width // 4 and x < self.width * 3 // 4)
-
-    def is_in_root(self, x, y):
-        return (y == 0 and (x >= self.width // 4 and x < self.width * 3 // 4)) or (y == self.height - 1 and (x >= self.width // 4 and x < self.width * 3 // 4))
-
-    def is_win(self):
-        # 检查一般胜利条件：占领对方根源区域
-        if self.current_player == PLAYER_GRAY:
-            for x in range(self.width // 4, self.width * 3 // 4):
-                if self.board.board[0][x][1] not in self.gray_pieces:
-                    break
-            else:
-                return True
-        else:
-            for x in range(self.width // 4, self.width * 3 // 4):
-                if self.board.board[BOARD_HEIGHT-1][x][1] not in self.green_pieces:
-                    break
-            else:
-                return True
-
-        # 检查特殊胜利条件：根源区域外没有敌方棋子
-        enemy_pieces = self.green_pieces if self.current_player == PLAYER_GRAY else self.gray_pieces
-        for y in range(self.height):
-            for x in range(self.width):
-                # 跳过自己的根源区域
-                if self.current_player == PLAYER_GRAY and y == self.height - 1 and (x >= self.width // 4 and x < self.width * 3 // 4):
-                    continue
-                if self.current_player == PLAYER_GREEN and y == 0 and (x >= self.width // 4 and x < self.width * 3 // 4):
-                    continue
-                # 检查是否存在敌方棋子
-                if self.board.board[y][x][1] in enemy_pieces:
-                    return False
-        return True
+        if event.move is not None and self.apply_move(event.move):
+            self.redo_moves = []
+            self.check_winner()
+
+    def undo(self):
+        # 悔棋：撤销最近一步着法（联机对战不可悔棋）
+        if self.client is None and self.state.history:
+            self.cancel_ai_search()
+            self.redo_moves.append(self.unmake())
+            # 人机对战时连同AI的着法一起撤销，回到玩家的回合
+            while self.ai is not None and self.current_player == self.ai_player and self.state.history:
+                self.redo_moves.append(self.unmake())
+
+    def unmake(self):
+        # 撤销一步，返回被撤销的着法
+        delta = self.state.unmake()
+        self.board.mark_move(delta)
+        return delta.move
+
+    def redo(self):
+        # 重做最近一次撤销的着法
+        if self.client is None and self.redo_moves:
+            self.apply_move(self.redo_moves.pop())
+            while self.ai is not None and self.current_player == self.ai_player and self.redo_moves:
+                self.apply_move(self.redo_moves.pop())
+            self.check_winner()
 
     def is_valid_position(self, x, y):
-        # 检查是否在棋盘内
-        if not (0 <= x < self.width and 0 <= y < self.height):
-            return False
-
-        # 检查是否在自己的根源区域
-        if self.current_player == PLAYER_GRAY:
-            # 灰方玩家不能在自己的根源区域落子
-            if y == self.height - 1 and (x >= self.width // 4 and x < self.width * 3 // 4):
-                return False
-        else:
-            # 青方玩家不能在自己的根源区域落子
-            if y == 0 and (x >= self.width // 4 and x < self.width * 3 // 4):
-                return False
-
-        # 定义本方颜色
-        if self.current_player == PLAYER_GRAY:
-            leaf_color = 'gray_leaf'
-            branch_color = 'gray_branch'
-            trunk_color = 'gray_trunk'
-        else:
-            leaf_color = 'green_leaf'
-            branch_color = 'green_branch'
-            trunk_color = 'green_trunk'
-
-        # 检查是否在枝棋子的5x3范围内
-        if self.is_branch_valid_position(x, y):
-            return True
-
-        # 检查周围八个格子是否有"叶"棋子或“干”棋子
-        for dx in [-1, 0, 1]:
-            for dy in [-1, 0, 1]:
-                if dx == 0 and dy == 0:
-                    continue
-                nx, ny = x + dx, y + dy
-                if 0 <= nx < self.width and 0 <= ny < self.height:
-                    # 检查周围格子是否在根源区域
-                    if not self.is_growable(nx, ny):
-                        continue  # 如果在根源区域，跳过该格子
-                    if self.board.board[ny][nx][1] == leaf_color or self.board.board[ny][nx][1] == trunk_color:
-                        return True
-        return False
-
-    def is_branch_valid_position(self, x, y):
-        # 检查是否可以放置枝棋子
-        if self.current_player == PLAYER_GRAY:
-            branch_color = 'gray_branch'
-        else:
-            branch_color = 'green_branch'
-
-        # 遍历棋盘寻找枝棋子
-        branch_x = None
-        branch_y = None
-        for i in range(self.height):
-            for j in range(self.width):
-                if self.board.board[i][j][1] == branch_color:
-                    branch_y = i
-                    branch_x = j
-                    break
-            if branch_x is not None:
-                break
-
-        if branch_x is None:
-            return False
-
-        # 检查是否在枝棋子的5x3范围内
-        dx = abs(x - branch_x)
-        dy = abs(y - branch_y)
-        return dx <= 2 and dy <= 1  # 5x3范围（中心点左右各2格，上下各1格）
-
-    def is_growable(self, x, y):
-        # 检查棋子是否在对方的根源区域
-        if self.current_player == PLAYER_GRAY:
-            return not (y == 0 and (x >= self.width // 4 and x < self.width * 3 // 4))
-        else:
-            return not (y == self.height - 1 and (x >= self.width // 4 and x < self.width * 3 // 4))
-
-    def is_green_root_area(self, y, x):
-        # 检查是否在青方根源区域内
-        return y == 0 and (x >= self.width // 4 and x < self.width * 3 // 4)
+        return self.state.is_valid_position(x, y)
 
-    def is_gray_root_area(self, y, x):
-        # 检查是否在灰方根源区域内
-        return y == self.height - 1 and (x >= self.width // 4 and x < self.width * 3 // 4)
+    def status_text(self):
+        # 显示AI最近一次搜索的深度与速度，或联机对战的状态
+        if self.ai_thinking:
+            return "AI思考中…"
+        if self.ai is not None and self.ai.depth_reached:
+            return f"AI：深度 {self.ai.depth_reached}，{self.ai.nodes_per_second} 节点/秒"
+        return self.online_status
 
     def draw(self):
-        self.screen.fill(WHITE)
-        self.board.draw(self.screen)
-        
+        # 增量绘制：只重绘发生变化的格子与界面文字，返回本帧需要更新到屏幕的矩形
+        start = profiler.start()
+        timings = []  # 本帧各阶段耗时，只重绘性能面板时丢弃
+        full = self.full_redraw
+        if full:
+            self.screen.fill(WHITE)
+            self.board.invalidate()
+        hud_key = (self.current_player, self.selected_piece_type, self.status_text())
+        cells = self.board.collect_dirty()
+        start = profiler.lap('render.collect', start, timings)
+        # 界面文字绘制在棋盘之上，其下方格子重绘时文字也要重绘，反之亦然
+        hud_dirty = full or hud_key != self.drawn_hud_key or not cells.isdisjoint(self.hud_cells)
+        victory_dirty = self.game_over and self.winner and (full or not self.victory_drawn)
+        content_dirty = bool(cells) or hud_dirty or victory_dirty
+        if hud_dirty:
+            cells |= self.hud_cells
+        # 性能面板同样绘制在棋盘之上；面板与界面文字可能覆盖同一格子，此时两者都要重绘
+        perf_lines = self.perf_lines_due(full, cells)
+        perf_dirty = perf_lines is not None
+        if perf_dirty:
+            cells |= self.perf_cells
+            if not hud_dirty and not self.perf_cells.isdisjoint(self.hud_cells):
+                hud_dirty = True
+                cells |= self.hud_cells
+        dirty_rects = self.board.draw_cells(self.screen, cells)
+        start = profiler.lap('render.cells', start, timings)
+        if hud_dirty:
+            self.draw_hud()
+            dirty_rects.extend(self.hud_rects)
+            self.drawn_hud_key = hud_key
+
+        # 显示胜利信息（半透明背景只叠加一次）
+        if victory_dirty:
+            dirty_rects.append(self.draw_victory())
+            self.victory_drawn = True
+        if perf_dirty:
+            self.draw_perf(perf_lines)
+            dirty_rects.append(self.perf_rect)
+        profiler.lap('render.hud', start, timings)
+        self.perf_only = perf_dirty and not content_dirty
+        if content_dirty:
+            profiler.commit(timings)
+        self.full_redraw = False
+        return dirty_rects
+
+    def perf_lines_due(self, full, cells):
+        # 需要重绘性能面板时返回面板内容，否则返回None
+        # 面板下方的格子被重绘时必须重绘；否则每隔 PERF_HUD_INTERVAL 检查一次内容是否变化
+        if not self.show_perf:
+            return None
+        overlapped = full or not cells.isdisjoint(self.perf_cells)
+        if not overlapped and remaining_time(self.perf_drawn_at, PERF_HUD_INTERVAL) > 0:
+            return None
+        self.perf_drawn_at = pygame.time.get_ticks()
+        lines = self.perf_lines()
+        if not overlapped and lines == self.drawn_perf_lines:
+            return None
+        return lines
+
+    def perf_lines(self):
+        # 每行为若干列文字：首行为帧耗时与帧率，其后为各阶段的调用次数、平均与p95耗时
+        frame = profiler.phases.get('frame')
+        if frame is None:
+            lines = [("帧耗时", "-", "", f"FPS {profiler.fps():.0f}")]
+        else:
+            lines = [("帧耗时(ms)", f"{frame.mean() / 1e6:.2f}", f"{frame.percentile(0.95) / 1e6:.2f}",
+                      f"FPS {profiler.fps():.0f}")]
+        lines.append(("阶段(µs)", "平均", "p95", "次数"))
+        for name, label in PERF_PHASES:
+            histogram = profiler.phases.get(name)
+            if histogram is None:
+                lines.append((label, "-", "-", "0"))
+            else:
+                lines.append((label, f"{histogram.mean() / 1e3:.0f}", f"{histogram.percentile(0.95) / 1e3:.0f}",
+                              str(histogram.count)))
+        return lines
+
+    def draw_perf(self, lines):
+        overlay = pygame.Surface(self.perf_rect.size, pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 180))
+        self.screen.blit(overlay, self.perf_rect)
+        for row, columns in enumerate(lines):
+            y = self.perf_rect.top + 4 + row * PERF_LINE_HEIGHT
+            for column, text in zip((8, 120, 190, 250), columns):
+                if text:
+                    self.screen.blit(font_manager.render(text, 14, WHITE), (self.perf_rect.left + column, y))
+        self.drawn_perf_lines = lines
+
+    def draw_hud(self):
         # 显示当前玩家和选择的棋子类型
-        font = pygame.font.Font("c:\Windows\Fonts\msyh.ttc", 18)  # 使用微软雅黑字体
         player_text = f"当前玩家：{'灰方' if self.current_player == PLAYER_GRAY else '青方'}"
-        # # 已被棋子选择系统代替
-        # piece_text = f"当前棋子：{'叶' if self.selected_piece_type == 'leaf' else '枝' if self.selected_piece_type == 'branch' else '干'}"
-        
-        player_surface = font.render(player_text, True, BLACK)
-        # piece_surface = font.render(piece_text, True, BLACK)
-        
+        player_surface = font_manager.render(player_text, 18, BLACK)
         self.screen.blit(player_surface, (10, 10))
-        
-        # 绘制返回按钮
-        back_button_rect = pygame.Rect(10, 40, 80, 30)
-        pygame.draw.rect(self.screen, WHITE, back_button_rect)
-        pygame.draw.rect(self.screen, BLACK, back_button_rect, 2)
-        back_text = font.render("返回", True, BLACK)
-        back_text_rect = back_text.get_rect(center=back_button_rect.center)
-        self.screen.blit(back_text, back_text_rect)
-        self.back_button_rect = back_button_rect  # 存储返回按钮位置供点击检测使用
-        
+
+        status_text = self.status_text()
+        if status_text:
+            self.screen.blit(font_manager.render(status_text, 18, BLACK), (10, 80))
+
+        # 绘制返回、悔棋、重做按钮
+        for button_rect, label in ((self.back_button_rect, "返回"), (self.undo_button_rect, "悔棋"),
+                                   (self.redo_button_rect, "重做")):
+            pygame.draw.rect(self.screen, WHITE, button_rect)
+            pygame.draw.rect(self.screen, BLACK, button_rect, 2)
+            text = font_manager.render(label, 18, BLACK)
+            self.screen.blit(text, text.get_rect(center=button_rect.center))
+
         # 绘制棋子选择按钮
-        button_y = SCREEN_HEIGHT - 60
-        for i, piece_type in enumerate(['leaf', 'branch', 'trunk']):
-            button_rect = pygame.Rect(10 + i * 120, button_y, 100, 40)
+        for button_rect, piece_type in zip(self.piece_button_rects, ['leaf', 'branch', 'trunk']):
             color = GREEN if self.selected_piece_type == piece_type else WHITE
             pygame.draw.rect(self.screen, color, button_rect)
             pygame.draw.rect(self.screen, BLACK, button_rect, 2)
-            
+
             piece_name = '叶' if piece_type == 'leaf' else '枝' if piece_type == 'branch' else '干'
-            text = font.render(piece_name, True, BLACK)
+            text = font_manager.render(piece_name, 18, BLACK)
             text_rect = text.get_rect(center=button_rect.center)
             self.screen.blit(text, text_rect)
-        
-        # 显示胜利信息
-        if self.game_over and self.winner:
-            # 创建半透明背景
-            overlay = pygame.Surface((300, 100), pygame.SRCALPHA)
-            pygame.draw.rect(overlay, (0, 0, 0, 128), overlay.get_rect())
-            overlay_rect = overlay.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
-            self.screen.blit(overlay, overlay_rect)
-            
-            # 绘制边框
-            pygame.draw.rect(self.screen, BLACK, overlay_rect, 2)
-            
-            # 显示胜利文本
-            font = pygame.font.Font("c:\Windows\Fonts\msyh.ttc", 36)  # 使用更大的字体
-            text = font.render(f"{'灰方' if self.winner == PLAYER_GRAY else '青方'} 胜利!", True, WHITE)
-            text_rect = text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
-            self.screen.blit(text, text_rect)
-            # 删除多余的渲染代码
+
+    def draw_victory(self):
+        # 创建半透明背景
+        overlay = pygame.Surface((300, 100), pygame.SRCALPHA)
+        pygame.draw.rect(overlay, (0, 0, 0, 128), overlay.get_rect())
+        overlay_rect = overlay.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
+        self.screen.blit(overlay, overlay_rect)
+
+        # 绘制边框
+        pygame.draw.rect(self.screen, BLACK, overlay_rect, 2)
+
+        # 显示胜利文本
+        text = font_manager.render(f"{'灰方' if self.winner == PLAYER_GRAY else '青方'} 胜利!", 36, WHITE)  # 使用更大的字体
+        text_rect = text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
+        self.screen.blit(text, text_rect)
+        return overlay_rect
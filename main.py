@@ -15,22 +15,53 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import argparse
+
 import pygame
 from game import Game
 from menu import Menu
-from config import TITLE, ICON
+from client import OnlineClient
+from scheduler import wait_events
+from assets import assets
+from engine import board_size
+from profiler import profiler
+from config import TITLE, FPS, BOARD_WIDTH, BOARD_HEIGHT
+
+def run_online(screen, menu, client):
+    # 连接服务器进行联机对战或观战，返回之后显示的菜单
+    try:
+        client.connect()
+    except OSError:
+        menu.show_notice("无法连接服务器")
+        return menu
+    Game(client=client).run()
+    client.close()
+    return Menu(screen)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=TITLE)
+    parser.add_argument('--watch', metavar='ROOM', help="观战联机对战中的指定房间")
+    parser.add_argument('--size', type=board_size, default=(BOARD_WIDTH, BOARD_HEIGHT), metavar='WxH',
+                        help="本地对战与人机对战的棋盘大小，如 12 或 16x12")
+    parser.add_argument('--profile', metavar='PATH', help="退出时把各阶段的性能统计写入JSON文件（游戏中按F3显示性能面板）")
+    args = parser.parse_args(argv)
+    width, height = args.size
 
-def main():
     pygame.init()
     pygame.display.set_caption(TITLE)
-    pygame.display.set_icon(ICON)
+    pygame.display.set_icon(assets.icon())
     screen = pygame.display.set_mode((800, 800))
     menu = Menu(screen)
     game = None
     
+    clock = pygame.time.Clock()
+    if args.watch:
+        menu = run_online(screen, menu, OnlineClient(room=args.watch, watch=True))
+    
     running = True
     while running:
-        for event in pygame.event.get():
+        # 菜单画面不变时阻塞等待输入，不再空转重绘
+        for event in wait_events(menu.idle_timeout()):
             if event.type == pygame.QUIT:
                 running = False
             elif event.type == pygame.MOUSEBUTTONDOWN and not game:
@@ -38,16 +69,27 @@ def main():
                 if selected_option == "quit":
                     running = False
                 elif selected_option == "local_multiplayer":
-                    game = Game()
+                    game = Game(width=width, height=height)
                     game.run()
                     game = None  # 游戏结束后重置game变量
                     menu = Menu(screen)  # 重新创建菜单实例
+                elif selected_option and selected_option.startswith("ai_"):
+                    game = Game(ai_level=selected_option[3:], width=width, height=height)  # 人机对战
+                    game.run()
+                    game = None
+                    menu = Menu(screen)
+                elif selected_option == "online":
+                    menu = run_online(screen, menu, OnlineClient())  # 联机对战，自动匹配对手
         
-        if not game:
+        if not game and menu.needs_redraw():
             menu.draw()
             pygame.display.flip()
+            clock.tick(FPS)
     
     pygame.quit()
+    assets.clear()
+    if args.profile:
+        profiler.dump(args.profile)
 
 if __name__ == "__main__":
     main()
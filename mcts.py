@@ -0,0 +1,235 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# 蒙特卡洛树搜索（UCT）AI，采用根并行：
+# 每个进程独立建树，每个时间片结束时合并根节点各着法的访问次数与胜场，
+# 合并结果作为下一时间片的先验，最终选择访问次数最多的着法
+# policy='eval' 时不做模拟对局：扩展节点时一次生成全部子节点，用 evaluation 的批量静态估值为整批子节点打分
+
+import math
+import multiprocessing
+import random
+import time
+
+from bitboard import BitBoard, PIECE_NAMES
+from config import PLAYER_GRAY
+from evaluation import batch_evaluator
+
+EXPLORATION = 1.4  # UCB1 探索系数
+MAX_PLAYOUT_MOVES = 200  # 模拟对局最长步数，超过按和局处理
+EVAL_SCALE = 40.0  # 估值换算为胜率：1 / (1 + exp(-分值 / EVAL_SCALE))
+
+
+class MCTSNode:
+    def __init__(self, parent, move, player, moves):
+        self.parent = parent
+        self.move = move  # 进入该节点的着法
+        self.player = player  # 执行该着法的玩家
+        self.untried_moves = moves
+        self.children = []
+        self.visits = 0
+        self.wins = 0.0  # 以 self.player 视角累计的得分
+
+    def select_child(self):
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child: child.wins / child.visits
+                   + EXPLORATION * math.sqrt(log_visits / child.visits))
+
+
+def playout_move(state, moves, policy, rng):
+    # 模拟对局的着法选择：random 为均匀随机，light 优先选择能推动敌方棋子的格子
+    if policy == 'light':
+        enemy_prefix = 'green' if state.current_player == PLAYER_GRAY else 'gray'
+        bitboard = BitBoard.from_state(state)
+        pushable = bitboard.pieces[f'{enemy_prefix}_leaf'] | bitboard.pieces[f'{enemy_prefix}_branch']
+        targets = bitboard.neighbours(pushable)
+        pushing = [move for move in moves if targets >> (move[1] * state.width + move[0]) & 1]
+        if pushing and rng.random() < 0.5:
+            return rng.choice(pushing)
+    return rng.choice(moves)
+
+
+def expand_all(node, state, evaluator):
+    # 一次扩展节点的全部着法，各子节点局面合成一批静态估值；每个子节点计一次访问
+    # 返回以 node.player 视角的得分（对方会选择对其最有利的子节点）
+    player = state.current_player
+    positions = []
+    for move in node.untried_moves:
+        state.apply_move(move)
+        child = MCTSNode(node, move, player, None)  # 着法在首次选中时生成
+        child.visits = 1
+        winner = state.winner()
+        if winner is not None:
+            child.untried_moves = []
+            child.wins = 1.0 if winner == player else 0.0
+        else:
+            positions.append((child, (tuple(state.masks[name] for name in PIECE_NAMES), state.current_player)))
+        state.unmake()
+        node.children.append(child)
+    node.untried_moves = []
+    if positions:
+        scores = evaluator.evaluate(*evaluator.encode([position for _, position in positions]))
+        for (child, _), score in zip(positions, scores.tolist()):
+            # 分值以子节点局面的行棋方（对手）为视角
+            child.wins = 1.0 / (1.0 + math.exp(max(-50.0, min(50.0, score / EVAL_SCALE))))
+    return 1.0 - max(child.wins for child in node.children)
+
+
+def search(root_state, time_limit, seed, policy='random', priors=None):
+    # 单进程UCT搜索，返回 ({move: (visits, wins)}, 模拟次数)
+    rng = random.Random(seed)
+    root = MCTSNode(None, None, None, root_state.legal_moves())
+    # 以合并后的根节点统计作为先验
+    if priors:
+        for move, (visits, wins) in priors.items():
+            if move in root.untried_moves and visits > 0:
+                root.untried_moves.remove(move)
+                child = MCTSNode(root, move, root_state.current_player, None)
+                child.visits = visits
+                child.wins = wins
+                root.children.append(child)
+                root.visits += visits
+
+    evaluator = batch_evaluator(root_state.width, root_state.height) if policy == 'eval' else None
+    deadline = time.perf_counter() + time_limit
+    playouts = 0
+    while time.perf_counter() < deadline:
+        state = root_state.copy()
+        state.history = []
+        node = root
+        # 选择
+        while not node.untried_moves and node.children:
+            node = node.select_child()
+            state.apply(node.move)
+            if node.untried_moves is None:
+                # 由先验或批量扩展创建的节点首次到达时生成着法
+                node.untried_moves = state.legal_moves() if state.winner() is None else []
+        if evaluator is not None:
+            # 批量扩展并以估值代替模拟对局；终局节点直接按结果计分
+            winner = state.winner()
+            if node.untried_moves:
+                value = expand_all(node, state, evaluator)
+            elif winner is not None:
+                value = 1.0 if winner == node.player else 0.0
+            else:
+                value = 0.5
+            # 回传：value 以 node.player 视角，父节点落子方不同时换算
+            player = node.player
+            while node is not None:
+                node.visits += 1
+                node.wins += value if node.player == player else 1.0 - value
+                node = node.parent
+            playouts += 1
+            continue
+        # 扩展
+        if node.untried_moves:
+            move = node.untried_moves.pop(rng.randrange(len(node.untried_moves)))
+            player = state.current_player
+            state.apply(move)
+            child = MCTSNode(node, move, player, state.legal_moves())
+            node.children.append(child)
+            node = child
+        # 模拟
+        steps = 0
+        while state.winner() is None and steps < MAX_PLAYOUT_MOVES:
+            moves = state.legal_moves()
+            if not moves:
+                break
+            state.apply(playout_move(state, moves, policy, rng))
+            steps += 1
+        winner = state.winner()
+        # 回传
+        while node is not None:
+            node.visits += 1
+            if winner is None:
+                node.wins += 0.5
+            elif winner == node.player:
+                node.wins += 1
+            node = node.parent
+        playouts += 1
+
+    stats = {child.move: (child.visits, child.wins) for child in root.children}
+    return stats, playouts
+
+
+def search_worker(args):
+    return search(*args)
+
+
+def merge_stats(results):
+    merged = {}
+    for stats in results:
+        for move, (visits, wins) in stats.items():
+            total_visits, total_wins = merged.get(move, (0, 0.0))
+            merged[move] = (total_visits + visits, total_wins + wins)
+    return merged
+
+
+class MCTSAI:
+    def __init__(self, time_limit=1.0, workers=None, slices=4, policy='random', seed=None, book=None):
+        self.time_limit = time_limit
+        self.book = book  # 开局库（book.OpeningBook），库中有的局面直接走库中着法
+        self.workers = workers or multiprocessing.cpu_count()
+        self.slices = slices  # 每步思考时间分成的时间片数，每片结束时合并一次
+        self.policy = policy
+        self.rng = random.Random(seed)
+        self.pool = None  # 进程池在首次搜索时创建，并在多步之间复用
+        # 最近一次搜索的统计信息
+        self.playouts = 0
+        self.elapsed = 0
+        self.playouts_per_second = 0
+        self.root_stats = {}
+
+    def choose_move(self, state):
+        moves = state.legal_moves()
+        if not moves:
+            return None
+        if self.book is not None:
+            move = self.book.choose_move(state)
+            if move is not None:
+                return move
+        start = time.perf_counter()
+        slice_time = self.time_limit / self.slices
+        merged = {}
+        self.playouts = 0
+        # 只向子进程传递局面本身，不传递撤销栈
+        snapshot = state.copy()
+        snapshot.history = []
+        for _ in range(self.slices):
+            # 每个进程获得均分的先验，各进程先验之和恰为上一时间片的合并结果
+            priors = {move: (visits / self.workers, wins / self.workers) for move, (visits, wins) in merged.items()}
+            tasks = [(snapshot, slice_time, self.rng.getrandbits(32), self.policy, priors) for _ in range(self.workers)]
+            if self.workers == 1:
+                results = [search_worker(tasks[0])]
+            else:
+                if self.pool is None:
+                    self.pool = multiprocessing.Pool(self.workers)
+                results = self.pool.map(search_worker, tasks)
+            self.playouts += sum(playouts for _, playouts in results)
+            merged = merge_stats([stats for stats, _ in results])
+        self.root_stats = merged
+        self.elapsed = time.perf_counter() - start
+        self.playouts_per_second = int(self.playouts / self.elapsed) if self.elapsed > 0 else 0
+        if not merged:
+            return moves[0]
+        return max(merged, key=lambda move: merged[move][0])
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
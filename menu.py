@@ -16,12 +16,14 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import pygame
+from fonts import font_manager
+from scheduler import remaining_time
 from config import SCREEN_WIDTH, SCREEN_HEIGHT, WHITE, BLACK, BUTTON_BG, BUTTON_HOVER, BUTTON_SHADOW, BUTTON_TEXT
 
 class Menu:
     def __init__(self, screen):
         self.screen = screen
-        self.font = pygame.font.Font("c:\Windows\Fonts\msyh.ttc", 36)  # 使用微软雅黑字体
+        self.font_size = 36
         self.selected_option = None
         
         # 定义菜单选项
@@ -35,17 +37,27 @@ class Menu:
             "人机对战",
             "返回"
         ]
-        self.current_menu = "main"  # 当前显示的菜单：'main' 或 'local'
+        self.ai_options = [
+            "简单",
+            "中等",
+            "困难",
+            "返回"
+        ]
+        self.ai_levels = ["easy", "normal", "hard"]  # 与 ai.AI_LEVELS 对应
+        self.current_menu = "main"  # 当前显示的菜单：'main'、'local' 或 'ai'
         
         # 计算菜单项的位置
         self.main_menu_positions = []
         self.local_menu_positions = []
+        self.ai_menu_positions = []
         self.calculate_positions()
         
         # 提示文本相关
         self.show_coming_soon = False
         self.coming_soon_timer = 0
         self.coming_soon_duration = 1500  # 显示时间（毫秒）
+        self.coming_soon_text = "敬请期待"
+        self.drawn_key = None  # 上一次绘制时的画面状态
     
     def calculate_positions(self):
         # 主菜单选项位置
@@ -65,47 +77,72 @@ class Menu:
             rect.centerx = SCREEN_WIDTH // 2
             rect.centery = start_y + i * 100
             self.local_menu_positions.append(rect)
+
+        # 人机对战难度子菜单位置
+        for i in range(len(self.ai_options)):
+            rect = pygame.Rect(0, 0, button_width, button_height)
+            rect.centerx = SCREEN_WIDTH // 2
+            rect.centery = start_y + i * 100
+            self.ai_menu_positions.append(rect)
     
+    def current_options(self):
+        if self.current_menu == "main":
+            return self.main_options, self.main_menu_positions
+        if self.current_menu == "local":
+            return self.local_options, self.local_menu_positions
+        return self.ai_options, self.ai_menu_positions
+
+    def show_notice(self, text):
+        # 以半透明提示框显示一条消息，例如无法连接服务器
+        self.coming_soon_text = text
+        self.show_coming_soon = True
+        self.coming_soon_timer = pygame.time.get_ticks()
+
+    def coming_soon_visible(self):
+        return self.show_coming_soon and pygame.time.get_ticks() - self.coming_soon_timer < self.coming_soon_duration
+
+    def view_key(self):
+        # 菜单画面只取决于当前菜单、悬停的按钮和提示是否显示
+        mouse_pos = pygame.mouse.get_pos()
+        hovered = None
+        for i, rect in enumerate(self.current_options()[1]):
+            if rect.collidepoint(mouse_pos):
+                hovered = i
+        return self.current_menu, hovered, self.coming_soon_visible() and self.coming_soon_text
+
+    def needs_redraw(self):
+        return self.view_key() != self.drawn_key
+
+    def idle_timeout(self):
+        # 下一次等待事件的最长时间（毫秒）：提示显示期间等到提示消失，否则一直等到有输入
+        if self.needs_redraw():
+            return 0
+        if self.coming_soon_visible():
+            return remaining_time(self.coming_soon_timer, self.coming_soon_duration)
+        return None
+
     def draw(self):
+        self.drawn_key = self.view_key()
         self.screen.fill(WHITE)
         mouse_pos = pygame.mouse.get_pos()
-        
-        if self.current_menu == "main":
-            # 绘制主菜单
-            for i, rect in enumerate(self.main_menu_positions):
-                # 检查鼠标悬停
-                button_color = BUTTON_HOVER if rect.collidepoint(mouse_pos) else BUTTON_BG
-                
-                # 绘制按钮阴影
-                shadow_rect = rect.copy()
-                shadow_rect.y += 4
-                pygame.draw.rect(self.screen, BUTTON_SHADOW, shadow_rect, border_radius=10)
-                
-                # 绘制按钮主体
-                pygame.draw.rect(self.screen, button_color, rect, border_radius=10)
-                
-                # 绘制按钮文字
-                text = self.font.render(self.main_options[i], True, BUTTON_TEXT)
-                text_rect = text.get_rect(center=rect.center)
-                self.screen.blit(text, text_rect)
-        else:
-            # 绘制本地游戏子菜单
-            for i, rect in enumerate(self.local_menu_positions):
-                # 检查鼠标悬停
-                button_color = BUTTON_HOVER if rect.collidepoint(mouse_pos) else BUTTON_BG
-                
-                # 绘制按钮阴影
-                shadow_rect = rect.copy()
-                shadow_rect.y += 4
-                pygame.draw.rect(self.screen, BUTTON_SHADOW, shadow_rect, border_radius=10)
-                
-                # 绘制按钮主体
-                pygame.draw.rect(self.screen, button_color, rect, border_radius=10)
-                
-                # 绘制按钮文字
-                text = self.font.render(self.local_options[i], True, BUTTON_TEXT)
-                text_rect = text.get_rect(center=rect.center)
-                self.screen.blit(text, text_rect)
+        options, positions = self.current_options()
+
+        for i, rect in enumerate(positions):
+            # 检查鼠标悬停
+            button_color = BUTTON_HOVER if rect.collidepoint(mouse_pos) else BUTTON_BG
+
+            # 绘制按钮阴影
+            shadow_rect = rect.copy()
+            shadow_rect.y += 4
+            pygame.draw.rect(self.screen, BUTTON_SHADOW, shadow_rect, border_radius=10)
+
+            # 绘制按钮主体
+            pygame.draw.rect(self.screen, button_color, rect, border_radius=10)
+
+            # 绘制按钮文字
+            text = font_manager.render(options[i], self.font_size, BUTTON_TEXT)
+            text_rect = text.get_rect(center=rect.center)
+            self.screen.blit(text, text_rect)
     
         # 显示"敬请期待"提示
         if self.show_coming_soon:
@@ -116,8 +153,8 @@ class Menu:
                 pygame.draw.rect(overlay, (0, 0, 0, 128), overlay.get_rect())
                 self.screen.blit(overlay, (0, 0))
 
-                # 渲染"敬请期待"文本
-                coming_soon_text = self.font.render("敬请期待", True, WHITE)
+                # 渲染提示文本
+                coming_soon_text = font_manager.render(self.coming_soon_text, self.font_size, WHITE)
                 text_rect = coming_soon_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
                 self.screen.blit(coming_soon_text, text_rect)
 
@@ -132,7 +169,7 @@ class Menu:
                 # 绘制关闭按钮背景
                 pygame.draw.rect(self.screen, BUTTON_BG, close_button_rect, border_radius=5)
                 # 绘制叉号
-                close_text = self.font.render("×", True, BUTTON_TEXT)
+                close_text = font_manager.render("×", self.font_size, BUTTON_TEXT)
                 close_text_rect = close_text.get_rect(center=close_button_rect.center)
                 self.screen.blit(close_text, close_text_rect)
                 # 存储关闭按钮位置供点击检测使用
@@ -153,22 +190,28 @@ class Menu:
                     if i == 0:  # 点击"本地游戏"
                         self.current_menu = "local"
                     elif i == 1:  # 点击"联机对战"
-                        self.show_coming_soon = True
-                        self.coming_soon_timer = pygame.time.get_ticks()
+                        return "online"
                     elif i == 2:  # 点击"退出游戏"
                         return "quit"
                     return None
-        else:
+        elif self.current_menu == "local":
             # 检查本地游戏子菜单点击
             for i, rect in enumerate(self.local_menu_positions):
                 if rect.collidepoint(pos):
                     if i == 0:  # 点击"双人对战"
                         return "local_multiplayer"
                     elif i == 1:  # 点击"人机对战"
-                        self.show_coming_soon = True
-                        self.coming_soon_timer = pygame.time.get_ticks()
+                        self.current_menu = "ai"
                         return None
                     elif i == 2:  # 点击"返回"
                         self.current_menu = "main"
                         return None
+        elif self.current_menu == "ai":
+            # 检查难度子菜单点击
+            for i, rect in enumerate(self.ai_menu_positions):
+                if rect.collidepoint(pos):
+                    if i < len(self.ai_levels):  # 点击难度，返回 "ai_<level>"
+                        return f"ai_{self.ai_levels[i]}"
+                    self.current_menu = "local"  # 点击"返回"
+                    return None
         return None
\ No newline at end of file
@@ -0,0 +1,144 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# 单行局面记法：棋盘 行棋方 已使用 冷却，四段以空格分隔，例如8x8初始局面：
+#   8/3LL3/8/8/8/8/3ll3/8 g - -
+# 棋盘：自第0行（青方根源一侧）起逐行以 / 分隔，小写为灰方、大写为青方，l/b/t 为叶/枝/干，数字为连续空格数
+#   棋盘大小由行数与行长决定，根源区域由棋盘大小决定，不必写出
+# 行棋方：g 为灰方，G 为青方
+# 已使用、冷却：b/t 为灰方的枝/干，B/T 为青方的枝/干，均没有时为 -
+# 胜负不单独记录：已分胜负的局面中行棋方即为胜者，解析时由计数器判定
+
+import re
+
+from config import PLAYER_GRAY, PLAYER_GREEN
+from engine import GameState, MAX_BOARD_SIZE, MIN_BOARD_SIZE
+
+PIECE_CHARS = {
+    'gray_leaf': 'l', 'gray_branch': 'b', 'gray_trunk': 't',
+    'green_leaf': 'L', 'green_branch': 'B', 'green_trunk': 'T',
+}
+CHAR_PIECES = {char: piece for piece, char in PIECE_CHARS.items()}
+PLAYER_CHARS = {PLAYER_GRAY: 'g', PLAYER_GREEN: 'G'}
+CHAR_PLAYERS = {char: player for player, char in PLAYER_CHARS.items()}
+# 标志字母 -> 局面属性，按书写顺序
+USED_FLAGS = {'b': 'gray_branch_used', 't': 'gray_trunk_used', 'B': 'green_branch_used', 'T': 'green_trunk_used'}
+COOLDOWN_FLAGS = {'b': 'gray_branch_cooldown', 't': 'gray_trunk_cooldown',
+                  'B': 'green_branch_cooldown', 'T': 'green_trunk_cooldown'}
+
+ROW_TOKEN = re.compile(r'[1-9][0-9]*|.')
+EMPTY_RUN = re.compile(r'\.+')
+
+
+def format_flags(state, flags):
+    return ''.join(char for char, name in flags.items() if getattr(state, name)) or '-'
+
+
+def to_notation(state):
+    # 由各棋子的位掩码填入字符，不逐格读取棋盘；空格子先记为 '.'，最后合并为数字
+    width = state.width
+    chars = ['.'] * (width * state.height)
+    for piece, mask in state.masks.items():
+        char = PIECE_CHARS[piece]
+        while mask:
+            low = mask & -mask
+            chars[low.bit_length() - 1] = char
+            mask ^= low
+    text = ''.join(chars)
+    board = '/'.join(text[start:start + width] for start in range(0, len(text), width))
+    board = EMPTY_RUN.sub(lambda run: str(run.end() - run.start()), board)
+    return ' '.join([board, PLAYER_CHARS[state.current_player],
+                     format_flags(state, USED_FLAGS), format_flags(state, COOLDOWN_FLAGS)])
+
+
+def parse_row(text):
+    # 返回 (行长, [(x, 棋子)])，只列出有棋子的格子
+    x = 0
+    pieces = []
+    for token in ROW_TOKEN.findall(text):
+        if token[0].isdigit():
+            x += int(token)
+        else:
+            piece = CHAR_PIECES.get(token)
+            if piece is None:
+                raise ValueError(f"无法识别的棋子：{token!r}")
+            pieces.append((x, piece))
+            x += 1
+    return x, pieces
+
+
+def parse_flags(state, text, flags):
+    if text == '-':
+        return
+    for char in text:
+        name = flags.get(char)
+        if name is None:
+            raise ValueError(f"无法识别的标志：{char!r}")
+        state.set_flag(name, True)
+
+
+_empty_states = {}
+
+
+def empty_state(width, height):
+    # 返回没有棋子的局面（根源区域、行棋方与标志同初始局面）的副本；每种棋盘大小只构造一次
+    state = _empty_states.get((width, height))
+    if state is None:
+        state = _empty_states[(width, height)] = GameState(width, height)
+        for y, row in enumerate(state.board):
+            for x, (_, piece) in enumerate(row):
+                if piece is not None:
+                    state.set_piece(x, y, None)
+    state = state.copy()
+    state.history = []
+    return state
+
+
+def from_notation(text):
+    # 解析单行记法，返回 GameState（撤销栈为空）；格式错误时抛出 ValueError
+    fields = text.split()
+    if len(fields) != 4:
+        raise ValueError(f"局面记法应有4段，实际为{len(fields)}段")
+    board_text, player, used, cooldown = fields
+    rows = [parse_row(row) for row in board_text.split('/')]
+    width, height = rows[0][0], len(rows)
+    if not (MIN_BOARD_SIZE <= width <= MAX_BOARD_SIZE and MIN_BOARD_SIZE <= height <= MAX_BOARD_SIZE):
+        raise ValueError(f"棋盘边长须在 {MIN_BOARD_SIZE} 到 {MAX_BOARD_SIZE} 之间")
+    if any(length != width for length, _ in rows):
+        raise ValueError("各行长度不一致")
+    if player not in CHAR_PLAYERS:
+        raise ValueError(f"无法识别的行棋方：{player!r}")
+
+    # 复制同样大小的空棋盘后只放置有棋子的格子，计数器、位掩码与哈希随 set_piece 增量更新，不扫描整个棋盘
+    state = empty_state(width, height)
+    for y, (_, pieces) in enumerate(rows):
+        for x, piece in pieces:
+            state.set_piece(x, y, piece)
+    state.legal_mask_cache = None
+    if CHAR_PLAYERS[player] != state.current_player:
+        state.switch_player()
+    parse_flags(state, used, USED_FLAGS)
+    parse_flags(state, cooldown, COOLDOWN_FLAGS)
+    if state.is_win():
+        state.result = state.current_player
+    return state
+
+
+def format_move(move):
+    # 着法 (x, y, piece_type) -> "x,y,piece_type"
+    x, y, piece_type = move
+    return f'{x},{y},{piece_type}'
@@ -0,0 +1,144 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# 分阶段性能统计：记录落子各阶段（校验、推动、消除、胜负判定）与绘制各阶段的调用次数和耗时直方图
+# 不依赖pygame；界面中按 F3 显示性能面板，stats()/dump() 导出为JSON，便于排查卡顿
+# 用法：start = profiler.start() ... start = profiler.lap('rules.push', start) ...
+# 性能面板自身的重绘不计入统计，否则面板内容每次刷新都会变化
+
+import json
+import time
+from collections import deque
+
+BUCKETS = 32  # 第 k 个桶为 [2^(k-1), 2^k) 微秒，第0个桶为不足1微秒
+FPS_WINDOW = 1.0  # 统计帧率的时间窗口（秒）
+
+
+class Histogram:
+    __slots__ = ('count', 'total', 'min', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0  # 纳秒
+        self.min = None
+        self.max = 0
+        self.buckets = [0] * BUCKETS
+
+    def add(self, ns):
+        self.count += 1
+        self.total += ns
+        if self.min is None or ns < self.min:
+            self.min = ns
+        if ns > self.max:
+            self.max = ns
+        self.buckets[min((ns // 1000).bit_length(), BUCKETS - 1)] += 1
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p):
+        # 由直方图估计的分位数（取所在桶的上界，不超过最大值），单位纳秒
+        if not self.count:
+            return 0
+        target = self.count * p
+        seen = 0
+        for k, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target:
+                return min((1 << k) * 1000, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total_ms': round(self.total / 1e6, 3),
+            'mean_us': round(self.mean() / 1e3, 3),
+            'min_us': round((self.min or 0) / 1e3, 3),
+            'p50_us': round(self.percentile(0.5) / 1e3, 3),
+            'p95_us': round(self.percentile(0.95) / 1e3, 3),
+            'max_us': round(self.max / 1e3, 3),
+            # 桶的上界（微秒）-> 次数，只列出非空的桶
+            'buckets_us': {str(1 << k): count for k, count in enumerate(self.buckets) if count},
+        }
+
+
+class Profiler:
+    def __init__(self, enabled=True):
+        self.enabled = enabled  # 关闭后 start() 返回None，各处的 lap() 均不再记录
+        self.phases = {}  # 阶段名 -> Histogram
+        self.frame_times = deque()  # 最近 FPS_WINDOW 秒内各帧结束的时间，用于计算帧率
+
+    def start(self):
+        return time.perf_counter_ns() if self.enabled else None
+
+    def lap(self, name, start, pending=None):
+        # 记录从 start 到现在的耗时，返回现在的时间作为下一阶段的起点
+        # 传入 pending 列表时暂存，之后由 commit() 记录（或直接丢弃）
+        if start is None:
+            return None
+        now = time.perf_counter_ns()
+        if pending is None:
+            self.record(name, now - start)
+        else:
+            pending.append((name, now - start))
+        return now
+
+    def commit(self, pending):
+        for name, ns in pending:
+            self.record(name, ns)
+
+    def record(self, name, ns):
+        histogram = self.phases.get(name)
+        if histogram is None:
+            histogram = self.phases[name] = Histogram()
+        histogram.add(ns)
+
+    def frame(self, start):
+        # 一帧（处理事件、绘制、更新屏幕）结束
+        if start is None:
+            return
+        self.lap('frame', start)
+        now = time.perf_counter()
+        self.frame_times.append(now)
+        while self.frame_times and self.frame_times[0] < now - FPS_WINDOW:
+            self.frame_times.popleft()
+
+    def fps(self):
+        # 最近 FPS_WINDOW 秒内实际绘制的帧数；界面空闲时不绘制，帧率为0
+        now = time.perf_counter()
+        return sum(1 for t in self.frame_times if t >= now - FPS_WINDOW) / FPS_WINDOW
+
+    def stats(self):
+        return {
+            'fps': round(self.fps(), 1),
+            'phases': {name: histogram.to_dict() for name, histogram in sorted(self.phases.items())},
+        }
+
+    def dump(self, path=None):
+        # 导出为JSON文本；指定 path 时同时写入文件
+        text = json.dumps(self.stats(), ensure_ascii=False, indent=2)
+        if path is not None:
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(text + '\n')
+        return text
+
+    def reset(self):
+        self.phases = {}
+        self.frame_times.clear()
+
+
+profiler = Profiler()
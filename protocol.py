@@ -0,0 +1,223 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# 联机对战的二进制消息协议
+# 每条消息：2字节长度（大端，含类型字节）+ 1字节消息类型 + 消息体
+# 着法编码为 2字节格子序号（y * width + x）+ 1字节棋子类型序号
+# 观战者只接收每步的变化（落子、推动链、被消除的格子），并定期接收一次完整局面（关键帧）
+
+import struct
+
+from bitboard import PIECE_NAMES
+from config import PLAYER_GRAY
+from engine import GameState, PIECE_TYPES
+from zobrist import ZOBRIST_FLAGS
+
+HEADER = struct.Struct('>HB')
+MAX_MESSAGE_SIZE = 8192  # 超过该长度的消息视为协议错误（最大棋盘的关键帧约4KB）
+
+# 消息类型
+MSG_JOIN = 1  # 客户端 -> 服务器：加入房间，消息体为 UTF-8 房间名，空表示自动匹配
+MSG_JOINED = 2  # 服务器 -> 客户端：JOINED 结构，分配到的玩家与棋盘大小
+MSG_START = 3  # 服务器 -> 客户端：双方到齐，对局开始
+MSG_MOVE = 4  # 客户端 -> 服务器：MOVE 结构
+MSG_MOVED = 5  # 服务器 -> 客户端：MOVED 结构，服务器确认并执行的着法
+MSG_REJECT = 6  # 服务器 -> 客户端：1字节拒绝原因
+MSG_LEFT = 7  # 服务器 -> 客户端：对手已离开
+MSG_WATCH = 8  # 客户端 -> 服务器：观战，消息体为 UTF-8 房间名
+MSG_KEYFRAME = 9  # 服务器 -> 观战者：完整局面
+MSG_DELTA = 10  # 服务器 -> 观战者：一步着法造成的变化
+
+JOINED = struct.Struct('>BBB')  # 玩家, 棋盘宽, 棋盘高
+MOVE = struct.Struct('>HB')  # 格子序号, 棋子类型序号
+MOVED = struct.Struct('>HBBB')  # 格子序号, 棋子类型序号, 落子玩家, 胜者（0为未分胜负）
+KEYFRAME = struct.Struct('>BBBBBI')  # 棋盘宽, 棋盘高, 当前玩家, 胜者, 标志位, 已下步数；其后每格1字节棋子编号
+DELTA = struct.Struct('>HBBBBHH')  # 落子格子, 棋子编号, 当前玩家, 胜者, 标志位, 推动数, 消除数（大棋盘一步可消除数百枚）
+DELTA_PUSH = struct.Struct('>HbbB')  # 推动链起点格子, dx, dy, 链长
+DELTA_CELL = struct.Struct('>H')  # 被消除的格子
+
+# 拒绝原因
+REJECT_ILLEGAL = 1  # 着法不合法
+REJECT_NOT_YOUR_TURN = 2  # 不是该玩家的回合
+REJECT_NOT_STARTED = 3  # 对局尚未开始或已结束
+REJECT_ROOM_FULL = 4  # 房间已满
+REJECT_NO_ROOM = 5  # 观战的房间不存在
+
+REJECT_MESSAGES = {
+    REJECT_ILLEGAL: "不能在此落子",
+    REJECT_NOT_YOUR_TURN: "还未轮到你",
+    REJECT_NOT_STARTED: "对局未在进行",
+    REJECT_ROOM_FULL: "房间已满",
+    REJECT_NO_ROOM: "房间不存在",
+}
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def pack_message(msg_type, payload=b''):
+    return HEADER.pack(len(payload) + 1, msg_type) + payload
+
+
+def encode_move(move, width):
+    x, y, piece_type = move
+    return MOVE.pack(y * width + x, PIECE_TYPES.index(piece_type))
+
+
+def decode_move(payload, width):
+    if len(payload) != MOVE.size:
+        raise ProtocolError("着法消息长度错误")
+    index, piece_index = MOVE.unpack(payload)
+    if piece_index >= len(PIECE_TYPES):
+        raise ProtocolError(f"未知的棋子类型：{piece_index}")
+    return index % width, index // width, PIECE_TYPES[piece_index]
+
+
+def encode_moved(move, width, player, result):
+    x, y, piece_type = move
+    return MOVED.pack(y * width + x, PIECE_TYPES.index(piece_type), player, result or 0)
+
+
+def decode_moved(payload, width):
+    # 返回 (着法, 落子玩家, 胜者或None)
+    index, piece_index, player, result = MOVED.unpack(payload)
+    return (index % width, index // width, PIECE_TYPES[piece_index]), player, result or None
+
+
+def encode_flags(state):
+    # 枝/干的使用与冷却标志压缩为1字节
+    flags = 0
+    for i, name in enumerate(ZOBRIST_FLAGS):
+        if getattr(state, name):
+            flags |= 1 << i
+    return flags
+
+
+def decode_flags(state, flags):
+    for i, name in enumerate(ZOBRIST_FLAGS):
+        state.set_flag(name, bool(flags >> i & 1))
+
+
+def set_turn(state, player, result):
+    if state.current_player != player:
+        state.switch_player()
+    state.result = result or None
+
+
+def encode_keyframe(state, move_count):
+    # 棋子编号：0为空，1起为 PIECE_NAMES 中的序号加1
+    cells = bytes(0 if piece is None else PIECE_NAMES.index(piece) + 1 for row in state.board for _, piece in row)
+    header = KEYFRAME.pack(state.width, state.height, state.current_player, state.result or 0,
+                           encode_flags(state), move_count)
+    return header + cells
+
+
+def decode_keyframe(payload, state=None):
+    # 返回 (局面, 已下步数)；传入 state 时就地更新（棋盘大小须相同）
+    width, height, player, result, flags, move_count = KEYFRAME.unpack_from(payload)
+    if len(payload) != KEYFRAME.size + width * height:
+        raise ProtocolError("关键帧长度错误")
+    if state is None:
+        state = GameState(width, height)
+    for index, code in enumerate(payload[KEYFRAME.size:]):
+        state.set_piece(index % width, index // width, PIECE_NAMES[code - 1] if code else None)
+    decode_flags(state, flags)
+    set_turn(state, player, result)
+    state.legal_mask_cache = None
+    return state, move_count
+
+
+def delta_size(delta):
+    # 编码后的增量消息体长度；超过 MAX_MESSAGE_SIZE 时改发关键帧
+    return DELTA.size + len(delta.pushes) * DELTA_PUSH.size + len(delta.eliminated) * DELTA_CELL.size
+
+
+def encode_delta(state, delta):
+    # 由落子后的局面与 MoveDelta 编码一步的变化
+    x, y = delta.placed
+    width = state.width
+    # FLAG_NAMES 第一项为落子前的当前玩家，即落子方
+    piece = f"{'gray' if delta.flags[0] == PLAYER_GRAY else 'green'}_{delta.move[2]}"
+    parts = [DELTA.pack(y * width + x, PIECE_NAMES.index(piece) + 1, state.current_player, state.result or 0,
+                        encode_flags(state), len(delta.pushes), len(delta.eliminated))]
+    for push_chain, dx, dy in delta.pushes:
+        cx, cy = push_chain[0]
+        parts.append(DELTA_PUSH.pack(cy * width + cx, dx, dy, len(push_chain)))
+    for cx, cy, _ in delta.eliminated:
+        parts.append(DELTA_CELL.pack(cy * width + cx))
+    return b''.join(parts)
+
+
+def apply_delta(state, payload):
+    # 在观战者的局面上重放一步变化，返回发生变化的格子集合供界面重绘
+    width = state.width
+    index, code, player, result, flags, push_count, eliminated_count = DELTA.unpack_from(payload)
+    if len(payload) != DELTA.size + push_count * DELTA_PUSH.size + eliminated_count * DELTA_CELL.size:
+        raise ProtocolError("增量消息长度错误")
+    board = state.board
+    changed = {(index % width, index // width)}
+    state.set_piece(index % width, index // width, PIECE_NAMES[code - 1])
+    offset = DELTA.size
+    for _ in range(push_count):
+        start, dx, dy, length = DELTA_PUSH.unpack_from(payload, offset)
+        offset += DELTA_PUSH.size
+        chain = [(start % width + i * dx, start // width + i * dy) for i in range(length)]
+        # 从链尾开始逐个后移
+        for cx, cy in reversed(chain):
+            state.set_piece(cx + dx, cy + dy, board[cy][cx][1])
+            state.set_piece(cx, cy, None)
+            changed.add((cx, cy))
+            changed.add((cx + dx, cy + dy))
+    for _ in range(eliminated_count):
+        cell, = DELTA_CELL.unpack_from(payload, offset)
+        offset += DELTA_CELL.size
+        state.set_piece(cell % width, cell // width, None)
+        changed.add((cell % width, cell // width))
+    decode_flags(state, flags)
+    set_turn(state, player, result)
+    state.legal_mask_cache = None
+    return changed
+
+
+async def read_message(reader):
+    # 从 asyncio.StreamReader 读取一条消息，返回 (类型, 消息体)
+    length, msg_type = HEADER.unpack(await reader.readexactly(HEADER.size))
+    if length < 1 or length > MAX_MESSAGE_SIZE:
+        raise ProtocolError(f"消息长度错误：{length}")
+    payload = await reader.readexactly(length - 1) if length > 1 else b''
+    return msg_type, payload
+
+
+class MessageBuffer:
+    # 供阻塞式套接字使用：累积收到的字节，切分出完整的消息
+    def __init__(self):
+        self.data = bytearray()
+
+    def feed(self, data):
+        self.data += data
+        messages = []
+        while len(self.data) >= HEADER.size:
+            length, msg_type = HEADER.unpack_from(self.data)
+            if length < 1 or length > MAX_MESSAGE_SIZE:
+                raise ProtocolError(f"消息长度错误：{length}")
+            end = 2 + length
+            if len(self.data) < end:
+                break
+            messages.append((msg_type, bytes(self.data[HEADER.size:end])))
+            del self.data[:end]
+        return messages
@@ -0,0 +1,169 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# 二进制棋谱库：大量对局存放在一个文件中，读取时通过 mmap 按需访问，不整体载入内存
+# 着法编码：格子序号 << 2 | 棋子类型序号；棋盘不超过64格时每步1字节，否则每步2字节（小端）
+# 文件结构（小端）：
+#   文件头 HEADER：魔数, 版本, 棋盘宽, 棋盘高, 每步字节数, 对局数, 索引位置
+#   着法流：各局着法依次相连
+#   索引：对局数 + 1 个 8字节偏移（第 i 局着法位于 offsets[i]:offsets[i + 1]），其后每局1字节结果
+
+import mmap
+import struct
+import sys
+from array import array
+
+from config import BOARD_WIDTH, BOARD_HEIGHT
+from engine import GameState, PIECE_TYPES
+
+MAGIC = b'TGDB'
+VERSION = 1
+HEADER = struct.Struct('<4sHBBB7xQQ')
+OFFSET = struct.Struct('<Q')
+
+
+def move_size(width, height):
+    return 1 if width * height <= 64 else 2
+
+
+def encode_move(move, width):
+    x, y, piece_type = move
+    return (y * width + x) << 2 | PIECE_TYPES.index(piece_type)
+
+
+def decode_move(code, width):
+    index = code >> 2
+    return index % width, index // width, PIECE_TYPES[code & 3]
+
+
+def encode_moves(moves, width, height):
+    codes = [encode_move(move, width) for move in moves]
+    if move_size(width, height) == 1:
+        return bytes(codes)
+    return struct.pack(f'<{len(codes)}H', *codes)
+
+
+def decode_moves(data, width, height):
+    if move_size(width, height) == 1:
+        codes = data
+    else:
+        codes = struct.unpack(f'<{len(data) // 2}H', data)
+    return [decode_move(code, width) for code in codes]
+
+
+class GameRecordWriter:
+    # 逐局追加写入，关闭时写出索引并回填文件头
+    def __init__(self, path, width=BOARD_WIDTH, height=BOARD_HEIGHT):
+        self.width = width
+        self.height = height
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, width, height, move_size(width, height), 0, 0))
+        self.offsets = array('Q', [HEADER.size])  # 紧凑存放，百万局也只占几兆内存
+        self.results = bytearray()
+
+    def add(self, moves, result=None):
+        # result 为胜者（PLAYER_GRAY/PLAYER_GREEN），未分胜负为None
+        data = encode_moves(moves, self.width, self.height)
+        self.file.write(data)
+        self.offsets.append(self.offsets[-1] + len(data))
+        self.results.append(result or 0)
+
+    def close(self):
+        if self.file is None:
+            return
+        index_offset = self.offsets[-1]
+        if sys.byteorder == 'big':
+            self.offsets.byteswap()
+        self.file.write(self.offsets.tobytes())
+        self.file.write(self.results)
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, self.width, self.height, move_size(self.width, self.height),
+                                    len(self.results), index_offset))
+        self.file.close()
+        self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class GameDatabase:
+    # 只读打开棋谱库；对局与着法在访问时才从映射的文件中解码
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.width, self.height, self.move_size, self.count, self.index_offset = \
+            HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"不是TreeGo棋谱库文件：{path}")
+        self.results_offset = self.index_offset + OFFSET.size * (self.count + 1)
+
+    def __len__(self):
+        return self.count
+
+    def move_range(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        start, = OFFSET.unpack_from(self.data, self.index_offset + OFFSET.size * index)
+        end, = OFFSET.unpack_from(self.data, self.index_offset + OFFSET.size * (index + 1))
+        return start, end
+
+    def moves(self, index):
+        start, end = self.move_range(index)
+        return decode_moves(self.data[start:end], self.width, self.height)
+
+    def move_count(self, index):
+        start, end = self.move_range(index)
+        return (end - start) // self.move_size
+
+    def result(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return self.data[self.results_offset + index] or None
+
+    def games(self, start=0, stop=None):
+        # 依次返回 (着法列表, 结果)
+        for index in range(start, self.count if stop is None else min(stop, self.count)):
+            yield self.moves(index), self.result(index)
+
+    def replay(self, index):
+        # 用规则引擎逐步重放一局，每步返回 (落子前的局面, 着法)；局面对象在各步之间复用，不保留撤销栈
+        state = GameState(self.width, self.height)
+        for move in self.moves(index):
+            yield state, move
+            if not state.apply(move):
+                raise ValueError(f"第 {index} 局中的着法不合法：{move}")
+            state.history.clear()
+
+    def positions(self, start=0, stop=None):
+        # 依次重放多局，返回 (对局序号, 落子前的局面, 着法, 该局结果)
+        for index in range(start, self.count if stop is None else min(stop, self.count)):
+            result = self.result(index)
+            for state, move in self.replay(index):
+                yield index, state, move, result
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
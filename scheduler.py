@@ -0,0 +1,39 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# 事件驱动的主循环调度：没有动画或计时器时阻塞等待输入，不再以固定帧率空转重绘
+# timeout 为等待的毫秒数：None 表示一直等到有事件，0 表示不等待
+
+import pygame
+
+
+def wait_events(timeout=None):
+    # 返回本轮需要处理的事件列表，超时则返回空列表
+    if timeout == 0:
+        return pygame.event.get()
+    if timeout is None:
+        event = pygame.event.wait()
+    else:
+        event = pygame.event.wait(max(int(timeout), 1))  # pygame 中 0 表示一直等待
+    if event.type == pygame.NOEVENT:
+        return []
+    return [event] + pygame.event.get()
+
+
+def remaining_time(start, duration):
+    # 计时器剩余的毫秒数，至少为0
+    return max(start + duration - pygame.time.get_ticks(), 0)
@@ -0,0 +1,228 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# 联机对战服务器：单进程 asyncio，同时承载多局对局
+#   python server.py --host 0.0.0.0 --port 7788
+# 客户端发送 JOIN 加入指定房间（或自动匹配），先到者执灰方；
+# 着法由服务器用规则引擎校验并执行后广播给双方，客户端只显示服务器确认的着法
+# 观战者发送 WATCH 订阅房间，先收到一个关键帧，之后每步只收到变化；
+# 每步的消息只编码一次，原样写给所有观战者，跟不上的观战者跳过增量，缓冲清空后补发关键帧
+
+import argparse
+import asyncio
+
+from config import BOARD_WIDTH, BOARD_HEIGHT, PLAYER_GRAY, PLAYER_GREEN, SERVER_HOST, SERVER_PORT
+from engine import GameState, board_size
+from protocol import (
+    JOINED, MAX_MESSAGE_SIZE, MSG_DELTA, MSG_JOIN, MSG_JOINED, MSG_KEYFRAME, MSG_LEFT, MSG_MOVE, MSG_MOVED,
+    MSG_REJECT, MSG_START, MSG_WATCH, REJECT_ILLEGAL, REJECT_NO_ROOM, REJECT_NOT_STARTED, REJECT_NOT_YOUR_TURN,
+    REJECT_ROOM_FULL,
+    ProtocolError, decode_move, delta_size, encode_delta, encode_keyframe, encode_moved, pack_message, read_message,
+)
+
+
+KEYFRAME_INTERVAL = 32  # 每隔这么多步向所有观战者发送一次关键帧
+SPECTATOR_BUFFER_LIMIT = 64 * 1024  # 观战者发送缓冲超过该字节数时暂停发送增量
+
+
+class GameRoom:
+    __slots__ = ('name', 'state', 'writers', 'spectators', 'moves')  # 每个房间只保存局面与连接，空闲连接开销很小
+
+    def __init__(self, name):
+        self.name = name
+        self.state = None  # 双方到齐后创建局面
+        self.writers = {}  # 玩家 -> asyncio.StreamWriter
+        self.spectators = {}  # 观战者 asyncio.StreamWriter -> 是否需要补发关键帧
+        self.moves = 0
+
+    def is_full(self):
+        return len(self.writers) == 2
+
+    def broadcast(self, message):
+        for writer in self.writers.values():
+            writer.write(message)
+        for writer in self.spectators:
+            writer.write(message)
+
+    def broadcast_delta(self, delta):
+        # 一步着法的变化只编码一次；关键帧同样只在需要时编码一次
+        # 变化过多（大棋盘上大面积消除）以致增量消息超长时，所有观战者改收关键帧
+        keyframe_due = self.moves % KEYFRAME_INTERVAL == 0 or delta_size(delta) >= MAX_MESSAGE_SIZE
+        delta_message = keyframe_message = None
+        for writer, needs_keyframe in self.spectators.items():
+            if writer.transport.get_write_buffer_size() > SPECTATOR_BUFFER_LIMIT:
+                self.spectators[writer] = True
+                continue
+            if needs_keyframe or keyframe_due:
+                if keyframe_message is None:
+                    keyframe_message = pack_message(MSG_KEYFRAME, encode_keyframe(self.state, self.moves))
+                writer.write(keyframe_message)
+                self.spectators[writer] = False
+            else:
+                if delta_message is None:
+                    delta_message = pack_message(MSG_DELTA, encode_delta(self.state, delta))
+                writer.write(delta_message)
+
+
+class GameServer:
+    def __init__(self, width=BOARD_WIDTH, height=BOARD_HEIGHT):
+        self.width = width  # 本服务器上所有对局的棋盘大小
+        self.height = height
+        self.rooms = {}  # 房间名 -> GameRoom
+        self.waiting_room = None  # 自动匹配中等待对手的房间
+        self.next_room_id = 0
+        self.connections = 0
+        self.server = None
+
+    async def start(self, host=SERVER_HOST, port=SERVER_PORT):
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server
+
+    async def serve_forever(self, host=SERVER_HOST, port=SERVER_PORT):
+        server = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+    def join(self, name):
+        # 返回 (房间, 分配的玩家)，房间已满时返回 (None, None)
+        if not name:
+            room = self.waiting_room
+            if room is None:
+                self.next_room_id += 1
+                room = self.waiting_room = GameRoom(f"#{self.next_room_id}")
+                self.rooms[room.name] = room
+        else:
+            room = self.rooms.get(name)
+            if room is None:
+                room = self.rooms[name] = GameRoom(name)
+        if room.is_full():
+            return None, None
+        player = PLAYER_GREEN if PLAYER_GRAY in room.writers else PLAYER_GRAY
+        return room, player
+
+    def leave(self, room, player):
+        room.writers.pop(player, None)
+        if room is self.waiting_room:
+            self.waiting_room = None
+        # 一方离开后对局结束，留下的一方可以返回菜单
+        room.broadcast(pack_message(MSG_LEFT))
+        room.state = None
+        self.discard_if_empty(room)
+
+    def discard_if_empty(self, room):
+        if not room.writers and not room.spectators and self.rooms.get(room.name) is room:
+            del self.rooms[room.name]
+
+    def start_game(self, room):
+        if room is self.waiting_room:
+            self.waiting_room = None
+        room.state = GameState(self.width, self.height)
+        room.moves = 0
+        room.broadcast(pack_message(MSG_START))
+        keyframe = pack_message(MSG_KEYFRAME, encode_keyframe(room.state, 0))
+        for writer in room.spectators:
+            writer.write(keyframe)
+            room.spectators[writer] = False
+
+    def play(self, room, player, payload):
+        # 校验并执行着法，返回拒绝原因，成功时返回None
+        state = room.state
+        if state is None or state.winner() is not None:
+            return REJECT_NOT_STARTED
+        if state.current_player != player:
+            return REJECT_NOT_YOUR_TURN
+        move = decode_move(payload, state.width)
+        delta = state.apply_move(move)
+        if delta is None:
+            return REJECT_ILLEGAL
+        state.history.clear()  # 服务器不需要撤销，不保留撤销栈
+        room.moves += 1
+        moved = pack_message(MSG_MOVED, encode_moved(move, state.width, player, state.winner()))
+        for writer in room.writers.values():
+            writer.write(moved)
+        if room.spectators:
+            room.broadcast_delta(delta)
+        return None
+
+    async def watch(self, reader, writer, name):
+        # 观战：订阅房间直到连接断开
+        room = self.rooms.get(name)
+        if room is None:
+            writer.write(pack_message(MSG_REJECT, bytes([REJECT_NO_ROOM])))
+            return
+        room.spectators[writer] = False
+        try:
+            if room.state is not None:
+                writer.write(pack_message(MSG_KEYFRAME, encode_keyframe(room.state, room.moves)))
+            while True:
+                await read_message(reader)  # 观战者无需发送消息，只用于检测断开
+        finally:
+            del room.spectators[writer]
+            self.discard_if_empty(room)
+
+    async def handle_connection(self, reader, writer):
+        self.connections += 1
+        room = player = None
+        try:
+            msg_type, payload = await read_message(reader)
+            if msg_type == MSG_WATCH:
+                await self.watch(reader, writer, payload.decode('utf-8'))
+                return
+            if msg_type != MSG_JOIN:
+                return
+            room, player = self.join(payload.decode('utf-8'))
+            if room is None:
+                writer.write(pack_message(MSG_REJECT, bytes([REJECT_ROOM_FULL])))
+                return
+            room.writers[player] = writer
+            writer.write(pack_message(MSG_JOINED, JOINED.pack(player, self.width, self.height)))
+            if room.is_full():
+                self.start_game(room)
+
+            while True:
+                msg_type, payload = await read_message(reader)
+                if msg_type == MSG_MOVE:
+                    reason = self.play(room, player, payload)
+                    if reason is not None:
+                        writer.write(pack_message(MSG_REJECT, bytes([reason])))
+                else:
+                    raise ProtocolError(f"未知的消息类型：{msg_type}")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ProtocolError, UnicodeDecodeError):
+            pass
+        finally:
+            self.connections -= 1
+            if room is not None and room.writers.get(player) is writer:
+                self.leave(room, player)
+            writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TreeGo 联机对战服务器")
+    parser.add_argument('--host', default=SERVER_HOST)
+    parser.add_argument('--port', type=int, default=SERVER_PORT)
+    parser.add_argument('--size', type=board_size, default=(BOARD_WIDTH, BOARD_HEIGHT), metavar='WxH',
+                        help="棋盘大小，如 12 或 16x12")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(GameServer(*args.size).serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
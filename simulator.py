@@ -0,0 +1,291 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# 批量模拟器：N 局对局以 NumPy 数组同时推进，用于规则平衡性统计
+# 棋盘为 N x H x W 的棋子编码，枝/干的使用与冷却标志为 N x 2 数组（下标 0 为灰方，1 为青方）
+# 规则与 engine.GameState 完全一致：落子 -> 推动 -> 消除 -> 胜负判定
+
+import numpy as np
+
+from config import BOARD_WIDTH, BOARD_HEIGHT, PLAYER_GRAY, PLAYER_GREEN
+from engine import GameState
+
+# 棋子编码
+EMPTY = 0
+PIECE_CODES = {
+    'gray_leaf': 1, 'gray_branch': 2, 'gray_trunk': 3,
+    'green_leaf': 4, 'green_branch': 5, 'green_trunk': 6,
+}
+CODE_PIECES = {code: name for name, code in PIECE_CODES.items()}
+# 编码 -> 颜色（PLAYER_GRAY / PLAYER_GREEN，空为0）与棋子种类（1叶、2枝、3干）
+COLOR_OF = np.array([0, PLAYER_GRAY, PLAYER_GRAY, PLAYER_GRAY, PLAYER_GREEN, PLAYER_GREEN, PLAYER_GREEN], dtype=np.int8)
+KIND_OF = np.array([0, 1, 2, 3, 1, 2, 3], dtype=np.int8)
+LEAF, BRANCH, TRUNK = 1, 2, 3
+PIECE_TYPES = ['leaf', 'branch', 'trunk']
+
+PLAYER_SUM = PLAYER_GRAY + PLAYER_GREEN  # 对方编码 = PLAYER_SUM - 本方编码
+
+DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]  # 与 GameState.push_pieces 顺序一致
+
+
+def shift(mask, dy, dx):
+    # 将 N x H x W 掩码整体平移，移出的部分丢弃，空出的部分补False
+    result = np.zeros_like(mask)
+    height, width = mask.shape[1], mask.shape[2]
+    src_y = slice(max(0, -dy), height - max(0, dy))
+    dst_y = slice(max(0, dy), height - max(0, -dy))
+    src_x = slice(max(0, -dx), width - max(0, dx))
+    dst_x = slice(max(0, dx), width - max(0, -dx))
+    result[:, dst_y, dst_x] = mask[:, src_y, src_x]
+    return result
+
+
+def dilate(mask, reach_x, reach_y):
+    # 横向 reach_x、纵向 reach_y 范围内的膨胀（含自身）
+    row = mask.copy()
+    for dx in range(1, reach_x + 1):
+        row |= shift(mask, 0, dx) | shift(mask, 0, -dx)
+    result = row.copy()
+    for dy in range(1, reach_y + 1):
+        result |= shift(row, dy, 0) | shift(row, -dy, 0)
+    return result
+
+
+class BatchSimulator:
+    def __init__(self, games, width=BOARD_WIDTH, height=BOARD_HEIGHT, seed=None):
+        self.games = games
+        self.width = width
+        self.height = height
+        self.rng = np.random.default_rng(seed)
+        # 根源区域
+        self.green_root = np.zeros((height, width), dtype=bool)
+        self.green_root[0, width // 4:width * 3 // 4] = True
+        self.gray_root = np.zeros((height, width), dtype=bool)
+        self.gray_root[height - 1, width // 4:width * 3 // 4] = True
+        self.in_root = self.green_root | self.gray_root
+        self.reset()
+
+    def reset(self):
+        width, height = self.width, self.height
+        self.board = np.zeros((self.games, height, width), dtype=np.int8)
+        self.board[:, 1, width // 2 - 1:width // 2 + 1] = PIECE_CODES['green_leaf']
+        self.board[:, height - 2, width // 2 - 1:width // 2 + 1] = PIECE_CODES['gray_leaf']
+        self.current_player = np.full(self.games, PLAYER_GRAY, dtype=np.int8)
+        self.branch_used = np.zeros((self.games, 2), dtype=bool)
+        self.branch_cooldown = np.zeros((self.games, 2), dtype=bool)
+        self.trunk_used = np.zeros((self.games, 2), dtype=bool)
+        self.trunk_cooldown = np.zeros((self.games, 2), dtype=bool)
+        self.result = np.zeros(self.games, dtype=np.int8)  # 胜者，0为未结束
+        self.finished = np.zeros(self.games, dtype=bool)  # 已分胜负或无子可落
+        self.moves_played = np.zeros(self.games, dtype=np.int32)
+
+    def own_root(self, player):
+        # 每局当前玩家自己的根源区域，N x H x W
+        return np.where((player == PLAYER_GRAY)[:, None, None], self.gray_root, self.green_root)
+
+    def opponent_root(self, player):
+        return np.where((player == PLAYER_GRAY)[:, None, None], self.green_root, self.gray_root)
+
+    def legal_mask(self, player):
+        # 与 BitBoard.legal_mask 相同：叶/干的3x3区域、枝的5x3区域，排除己方根源与已占格子
+        color = COLOR_OF[self.board]
+        kind = KIND_OF[self.board]
+        own = color == player[:, None, None]
+        growers = own & (kind != BRANCH) & ~self.opponent_root(player)
+        zone = dilate(growers, 1, 1) | dilate(own & (kind == BRANCH), 2, 1)
+        return zone & (self.board == EMPTY) & ~self.own_root(player)
+
+    def choose_moves(self, policy='random'):
+        # 为每局选择一步着法，返回 (x, y, 棋子种类) 数组；无子可落的对局 x 为 -1
+        player = self.current_player
+        legal = self.legal_mask(player)
+        keys = self.rng.random(legal.shape)
+        if policy == 'light':
+            # 优先选择能推动敌方叶、枝的格子
+            enemy = (COLOR_OF[self.board] == (PLAYER_SUM - player)[:, None, None]) & (KIND_OF[self.board] != TRUNK)
+            pushing = shift(enemy, 1, 0) | shift(enemy, -1, 0) | shift(enemy, 0, 1) | shift(enemy, 0, -1)
+            keys += pushing
+        keys[~legal] = -1
+        flat = keys.reshape(self.games, -1)
+        index = flat.argmax(axis=1)
+        has_move = flat[np.arange(self.games), index] >= 0
+        x = np.where(has_move, index % self.width, -1)
+        y = index // self.width
+
+        # 在可用的棋子种类中均匀选择
+        side = player - 1
+        rows = np.arange(self.games)
+        available = np.stack([
+            np.ones(self.games, dtype=bool),
+            ~(self.branch_used[rows, side] | self.branch_cooldown[rows, side]),
+            ~(self.trunk_used[rows, side] | self.trunk_cooldown[rows, side]),
+        ], axis=1)
+        pick = (self.rng.random(self.games) * available.sum(axis=1)).astype(np.int64)
+        kind = (available.cumsum(axis=1) > pick[:, None]).argmax(axis=1) + 1
+        return x, y, kind
+
+    def step(self, policy='random'):
+        # 所有未结束的对局各走一步，返回本步实际落子的 (x, y, kind)
+        x, y, kind = self.choose_moves(policy)
+        stuck = ~self.finished & (x < 0)
+        self.finished |= stuck  # 无子可落，按和局结束
+        active = np.nonzero(~self.finished)[0]
+        if len(active):
+            self.apply(active, x[active], y[active], kind[active])
+        return x, y, kind
+
+    def apply(self, games, x, y, kind):
+        # 对指定对局执行着法（调用方保证合法）
+        player = self.current_player[games]
+        side = player - 1
+        board = self.board
+
+        # 标记枝/干已使用
+        self.branch_used[games[kind == BRANCH], side[kind == BRANCH]] = True
+        self.trunk_used[games[kind == TRUNK], side[kind == TRUNK]] = True
+
+        # 放置棋子
+        board[games, y, x] = (player - 1) * 3 + kind
+
+        # 更新冷却
+        self.branch_cooldown[games, side] = False
+        self.trunk_cooldown[games, side] = False
+
+        # 推动逻辑
+        for dx, dy in DIRECTIONS:
+            self.push(games, player, x, y, dx, dy)
+
+        # 消除逻辑：先当前玩家后敌方玩家，每方优先纵向
+        for color in (player, PLAYER_SUM - player):
+            self.eliminate(games, color, vertical=True)
+            self.eliminate(games, color, vertical=False)
+
+        # 判定胜利
+        won = self.is_win(games, player)
+        self.result[games[won]] = player[won]
+        self.finished[games[won]] = True
+
+        # 切换玩家后再次判定
+        rest = games[~won]
+        self.current_player[rest] = PLAYER_SUM - self.current_player[rest]
+        won = self.is_win(rest, self.current_player[rest])
+        self.result[rest[won]] = self.current_player[rest[won]]
+        self.finished[rest[won]] = True
+        self.moves_played[games] += 1
+
+    def push(self, games, player, x, y, dx, dy):
+        # 沿 (dx, dy) 推动相邻的敌方叶、枝链
+        board = self.board
+        enemy = PLAYER_SUM - player
+        length = np.zeros(len(games), dtype=np.int64)
+        chaining = np.ones(len(games), dtype=bool)
+        for k in range(1, max(self.width, self.height)):
+            cx, cy = x + k * dx, y + k * dy
+            inside = (cx >= 0) & (cx < self.width) & (cy >= 0) & (cy < self.height)
+            code = board[games, np.clip(cy, 0, self.height - 1), np.clip(cx, 0, self.width - 1)]
+            chaining &= inside & (COLOR_OF[code] == enemy) & (KIND_OF[code] != TRUNK)
+            length += chaining
+            if not chaining.any():
+                break
+
+        # 链尾之后的落点必须在棋盘内、为空且不在敌方自己的根源区域
+        nx, ny = x + (length + 1) * dx, y + (length + 1) * dy
+        inside = (nx >= 0) & (nx < self.width) & (ny >= 0) & (ny < self.height)
+        nx_c, ny_c = np.clip(nx, 0, self.width - 1), np.clip(ny, 0, self.height - 1)
+        enemy_root = np.where(player == PLAYER_GRAY, self.green_root[ny_c, nx_c], self.gray_root[ny_c, nx_c])
+        valid = (length > 0) & inside & (board[games, ny_c, nx_c] == EMPTY) & ~enemy_root
+
+        # 从链尾开始逐个后移
+        for k in range(int(length[valid].max()) if valid.any() else 0, 0, -1):
+            moving = np.nonzero(valid & (length >= k))[0]
+            fx, fy = x[moving] + k * dx, y[moving] + k * dy
+            board[games[moving], fy + dy, fx + dx] = board[games[moving], fy, fx]
+            board[games[moving], fy, fx] = EMPTY
+
+    def eliminate(self, games, color, vertical):
+        # 与 GameState.eliminate_pieces 结果相同的逐格扫描，在所有对局与所有列（或行）上同时进行
+        board = self.board[games]
+        if not vertical:
+            board = board.transpose(0, 2, 1)
+        in_root = self.in_root if vertical else self.in_root.T
+        length, lines = board.shape[1], board.shape[2]
+        count = np.zeros((len(games), lines), dtype=np.int32)
+        root_count = np.zeros((len(games), lines), dtype=np.int32)
+        removed = np.zeros(board.shape, dtype=bool)
+        for b in range(length):
+            match = COLOR_OF[board[:, b, :]] == color[:, None]
+            count = np.where(match, count + 1, 0)
+            root_count = np.where(match, root_count + in_root[b], 0)
+            reset = root_count > 1
+            count[reset] = 0
+            root_count[reset] = 0
+            hit = count >= 3
+            if hit.any():
+                for i in range(b - 2, b + 1):
+                    removed[:, i, :] |= hit
+                    board[:, i, :][hit] = EMPTY
+        if not removed.any():
+            return
+        if not vertical:
+            board = board.transpose(0, 2, 1)
+            removed = removed.transpose(0, 2, 1)
+        # 枝或干被消除后进入冷却
+        original = self.board[games]
+        for side, prefix in ((0, 'gray'), (1, 'green')):
+            lost_branch = ((original == PIECE_CODES[f'{prefix}_branch']) & removed).any(axis=(1, 2))
+            lost_trunk = ((original == PIECE_CODES[f'{prefix}_trunk']) & removed).any(axis=(1, 2))
+            self.branch_used[games[lost_branch], side] = False
+            self.branch_cooldown[games[lost_branch], side] = True
+            self.trunk_used[games[lost_trunk], side] = False
+            self.trunk_cooldown[games[lost_trunk], side] = True
+        self.board[games] = board
+
+    def is_win(self, games, player):
+        # 占领对方根源区域，或根源区域外没有敌方棋子
+        color = COLOR_OF[self.board[games]]
+        mine = color == player[:, None, None]
+        captured = np.where(player == PLAYER_GRAY,
+                            mine[:, self.green_root].all(axis=1),
+                            mine[:, self.gray_root].all(axis=1))
+        enemy = color == (PLAYER_SUM - player)[:, None, None]
+        enemy_left = (enemy & ~self.own_root(player)).any(axis=(1, 2))
+        return captured | ~enemy_left
+
+    def run(self, max_moves=200, policy='random'):
+        # 推进全部对局直到结束或达到步数上限，返回 (胜者数组, 步数数组)
+        for _ in range(max_moves):
+            if self.finished.all():
+                break
+            self.step(policy)
+        return self.result.copy(), self.moves_played.copy()
+
+    def to_state(self, game):
+        # 导出单局为 GameState，便于与规则引擎核对
+        state = GameState(self.width, self.height)
+        for yy in range(self.height):
+            for xx in range(self.width):
+                state.set_piece(xx, yy, CODE_PIECES.get(int(self.board[game, yy, xx])))
+        state.current_player = int(self.current_player[game])
+        for side, prefix in ((0, 'gray'), (1, 'green')):
+            setattr(state, f'{prefix}_branch_used', bool(self.branch_used[game, side]))
+            setattr(state, f'{prefix}_branch_cooldown', bool(self.branch_cooldown[game, side]))
+            setattr(state, f'{prefix}_trunk_used', bool(self.trunk_used[game, side]))
+            setattr(state, f'{prefix}_trunk_cooldown', bool(self.trunk_cooldown[game, side]))
+        state.result = int(self.result[game]) or None
+        state.legal_mask_cache = None
+        state.hash = state.compute_hash()
+        return state
@@ -0,0 +1,98 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# 格子图集：每种（格子类型, 棋子, 预览圆点）组合只绘制一次，
+# 绘制棋盘时每个格子只需一次贴图，多个格子可交给 Surface.blits 一次完成
+
+import pygame
+import pygame.gfxdraw
+
+from config import WHITE, BLACK, LIGHT_GREEN, LIGHT_GRAY, DARK_GREEN, DARK_GRAY, PLAYER_GRAY
+
+CELL_COLORS = {None: WHITE, 'green_root': LIGHT_GREEN, 'gray_root': LIGHT_GRAY}
+PREVIEW_RADIUS = 5  # 可落子预览小圆点大小
+
+
+class SpriteAtlas:
+    def __init__(self, grid_size, antialias=False):
+        self.grid_size = grid_size
+        self.antialias = antialias  # 抗锯齿较慢，但每种图块只绘制一次
+        self.sprites = {}
+
+    def sprite(self, cell_type, piece, preview_player):
+        # preview_player 为显示预览圆点的玩家，None 表示不显示
+        key = (cell_type, piece, preview_player)
+        surface = self.sprites.get(key)
+        if surface is None:
+            surface = self.sprites[key] = self.render(cell_type, piece, preview_player)
+        return surface
+
+    def render(self, cell_type, piece, preview_player):
+        size = self.grid_size
+        surface = pygame.Surface((size, size))
+        # 绘制格子
+        pygame.draw.rect(surface, CELL_COLORS[cell_type], (0, 0, size, size))
+        pygame.draw.rect(surface, BLACK, (0, 0, size, size), 1)
+
+        center = size // 2
+        radius = size // 2 - 5  # 留出边框
+        if piece is not None:
+            color = DARK_GRAY if piece.startswith('gray') else DARK_GREEN
+            if piece.endswith('leaf'):
+                self.circle(surface, color, center, radius)
+            elif piece.endswith('trunk'):
+                # 干棋子（正方形）
+                pygame.draw.rect(surface, color, (center - radius, center - radius, radius * 2, radius * 2))
+            else:
+                # 枝棋子（三角形）
+                points = [
+                    (center, center - radius),  # 顶点
+                    (center - radius, center + radius),  # 左下
+                    (center + radius, center + radius)   # 右下
+                ]
+                if self.antialias:
+                    pygame.gfxdraw.aapolygon(surface, points, color)
+                    pygame.gfxdraw.filled_polygon(surface, points, color)
+                else:
+                    pygame.draw.polygon(surface, color, points)
+
+        # 绘制可落子区域预览
+        if preview_player is not None:
+            self.circle(surface, DARK_GRAY if preview_player == PLAYER_GRAY else DARK_GREEN, center, PREVIEW_RADIUS)
+        return surface.convert() if pygame.display.get_surface() else surface
+
+    def circle(self, surface, color, center, radius):
+        if self.antialias:
+            pygame.gfxdraw.aacircle(surface, center, center, radius, color)
+            pygame.gfxdraw.filled_circle(surface, center, center, radius, color)
+        else:
+            pygame.draw.circle(surface, color, (center, center), radius)
+
+
+_atlases = {}
+
+
+def sprite_atlas(grid_size, antialias=False):
+    # 同一格子大小共用一套图块
+    atlas = _atlases.get((grid_size, antialias))
+    if atlas is None:
+        atlas = _atlases[(grid_size, antialias)] = SpriteAtlas(grid_size, antialias)
+    return atlas
+
+
+def clear_atlases():
+    _atlases.clear()
@@ -0,0 +1,82 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# 位棋盘的可落子掩码（BitBoard.legal_mask）与逐格判定（GameState.is_valid_position）在随机对局中一致
+#   python -m pytest tests
+
+import random
+import unittest
+
+from bitboard import BitBoard
+from engine import PIECE_TYPES, GameState
+
+SIZES = [(8, 8), (12, 12), (5, 7), (16, 9), (4, 4)]
+GAMES = 10  # 每种棋盘大小的随机对局数
+MAX_MOVES = 80
+
+
+def scanned_cells(state):
+    # 逐格判定当前玩家可落子的空格子
+    return {(x, y) for y in range(state.height) for x in range(state.width)
+            if state.board[y][x][1] is None and state.is_valid_position(x, y)}
+
+
+def mask_cells(mask, width):
+    cells = set()
+    while mask:
+        low = mask & -mask
+        index = low.bit_length() - 1
+        cells.add((index % width, index // width))
+        mask ^= low
+    return cells
+
+
+class LegalMaskTest(unittest.TestCase):
+    def assert_matches(self, state):
+        expected = scanned_cells(state)
+        self.assertEqual(mask_cells(state.legal_mask(), state.width), expected)
+        self.assertEqual(mask_cells(BitBoard.from_state(state).legal_mask(state.current_player), state.width),
+                         expected)
+        # 每种棋子的合法着法：格子相同，枝、干另受使用与冷却限制
+        expected_moves = {(x, y, piece_type) for x, y in expected for piece_type in PIECE_TYPES
+                          if state.can_use(piece_type)}
+        self.assertEqual(set(state.legal_moves()), expected_moves)
+        for piece_type in PIECE_TYPES:
+            moves = {(x, y) for x, y, move_type in state.legal_moves() if move_type == piece_type}
+            self.assertEqual(moves, expected if state.can_use(piece_type) else set())
+
+    def test_matches_scan_in_random_games(self):
+        rng = random.Random(3)
+        for width, height in SIZES:
+            for _ in range(GAMES):
+                state = GameState(width, height)
+                for _ in range(MAX_MOVES):
+                    if state.winner() is not None:
+                        break
+                    self.assert_matches(state)
+                    # 对方视角同样一致
+                    other = state.copy()
+                    other.switch_player()
+                    self.assert_matches(other)
+                    moves = state.legal_moves()
+                    if not moves:
+                        break
+                    state.apply_move(rng.choice(moves))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# 开局库查库：不得因出现次数多而选择胜率低的着法
+#   python -m pytest tests
+
+import os
+import tempfile
+import unittest
+
+from book import OpeningBook, write_book
+from engine import GameState
+from records import encode_move
+
+LOSING_MOVE = (5, 6, 'leaf')  # 8x8 初始局面下灰方走这步会消除己方全部棋子，当即落败
+GOOD_MOVE = (2, 5, 'branch')
+RARE_MOVE = (3, 5, 'leaf')
+
+
+class OpeningBookTest(unittest.TestCase):
+    def setUp(self):
+        self.state = GameState()
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'test.book')
+        self.books = []
+
+    def tearDown(self):
+        for book in self.books:
+            book.close()
+        self.directory.cleanup()
+
+    def open_book(self, entries):
+        # entries 为 {着法: (次数, 得分)}，得分为胜2分、和1分
+        stats = {(self.state.hash, encode_move(move, self.state.width)): list(entry) for move, entry in entries.items()}
+        write_book(self.path, stats, self.state.width, self.state.height, min_count=1)
+        book = OpeningBook(self.path)
+        self.books.append(book)
+        return book
+
+    def test_losing_move_really_loses(self):
+        self.state.apply(LOSING_MOVE)
+        self.assertIsNotNone(self.state.winner())
+        self.assertNotEqual(self.state.winner(), GameState().current_player)
+
+    def test_frequent_losing_move_not_chosen(self):
+        book = self.open_book({LOSING_MOVE: (24, 0), GOOD_MOVE: (8, 12)})
+        self.assertEqual(book.choose_move(self.state), GOOD_MOVE)
+
+    def test_higher_win_rate_preferred(self):
+        book = self.open_book({GOOD_MOVE: (20, 24), RARE_MOVE: (6, 10)})
+        self.assertEqual(book.choose_move(self.state), RARE_MOVE)
+
+    def test_small_samples_ignored(self):
+        book = self.open_book({GOOD_MOVE: (20, 24), RARE_MOVE: (2, 4)})
+        self.assertEqual(book.choose_move(self.state), GOOD_MOVE)
+
+    def test_falls_back_to_search_when_nothing_qualifies(self):
+        book = self.open_book({LOSING_MOVE: (24, 0), RARE_MOVE: (2, 4)})
+        self.assertIsNone(book.choose_move(self.state))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# 胜负判定计数器：落子、推动、消除与撤销后，增量维护的计数器须与从头统计一致，胜负结果须与计数器相符
+#   python -m pytest tests
+
+import random
+import unittest
+
+from engine import GameState
+
+SIZES = [(8, 8), (12, 12), (16, 9), (5, 7)]
+GAMES = 12  # 每种棋盘大小的随机对局数
+MAX_MOVES = 80
+COUNTERS = ('gray_count', 'green_count', 'gray_count_in_green_root', 'green_count_in_gray_root')
+
+
+def counters(state):
+    return {name: getattr(state, name) for name in COUNTERS}
+
+
+def recounted(state):
+    fresh = state.copy()
+    fresh.count_pieces()
+    return counters(fresh)
+
+
+class CountersTest(unittest.TestCase):
+    def test_counters_match_a_full_recount(self):
+        rng = random.Random(1)
+        decided = 0
+        for width, height in SIZES:
+            for _ in range(GAMES):
+                state = GameState(width, height)
+                self.assertEqual(counters(state), recounted(state))
+                for _ in range(MAX_MOVES):
+                    moves = state.legal_moves()
+                    if not moves:
+                        break
+                    before = counters(state)
+                    for move in rng.sample(moves, min(len(moves), 8)):
+                        state.apply_move(move)
+                        self.assertEqual(counters(state), recounted(state), (width, height, move))
+                        state.unmake()
+                        self.assertEqual(counters(state), before)
+                    state.apply_move(rng.choice(moves))
+                # 对局结束时行棋方即为胜者，计数器应判定其获胜
+                if state.result is not None:
+                    decided += 1
+                    self.assertEqual(state.result, state.current_player)
+                    self.assertTrue(state.is_win())
+        self.assertGreater(decided, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# 位掩码消除（GameState.eliminate_pieces）与逐格扫描的参照实现在随机密集棋盘上结果一致
+#   python -m pytest tests
+
+import random
+import unittest
+
+from config import PLAYER_GRAY, PLAYER_GREEN
+from engine import GameState
+
+SIZES = [(8, 8), (12, 12), (5, 7), (16, 9)]
+BOARDS = 400  # 每种棋盘大小的随机棋盘数
+SIDES = {PLAYER_GRAY: ('gray_leaf', 'gray_branch', 'gray_trunk'),
+         PLAYER_GREEN: ('green_leaf', 'green_branch', 'green_trunk')}
+
+
+def scan_eliminate(board, width, height, current_player):
+    # 参照实现：逐格扫描（原 eliminate_lines 的规则），直接修改 board，返回被消除的 [(x, y, 棋子)]
+    # 先当前玩家后敌方，每方先纵向后横向；连续段末尾凑满三枚即消除；同一段中有两枚根源区域内的棋子时重新计数
+    def in_root(x, y):
+        return y in (0, height - 1) and width // 4 <= x < width * 3 // 4
+
+    enemy = PLAYER_GREEN if current_player == PLAYER_GRAY else PLAYER_GRAY
+    eliminated = []
+    for player in (current_player, enemy):
+        for vertical in (True, False):
+            outer, inner = (width, height) if vertical else (height, width)
+            for a in range(outer):
+                count = root_count = 0
+                for b in range(inner):
+                    x, y = (a, b) if vertical else (b, a)
+                    if board[y][x] in SIDES[player]:
+                        count += 1
+                        root_count += in_root(x, y)
+                    else:
+                        count = root_count = 0
+                    if root_count > 1:
+                        count = root_count = 0
+                    if count >= 3:
+                        for i in range(b - 2, b + 1):
+                            cx, cy = (a, i) if vertical else (i, a)
+                            if board[cy][cx] is not None:
+                                eliminated.append((cx, cy, board[cy][cx]))
+                                board[cy][cx] = None
+    return eliminated
+
+
+def random_state(rng, width, height):
+    state = GameState(width, height)
+    density = rng.random()
+    for y in range(height):
+        for x in range(width):
+            piece = None
+            if rng.random() < density:
+                side = SIDES[rng.choice((PLAYER_GRAY, PLAYER_GREEN))]
+                piece = side[0] if rng.random() < 0.5 else rng.choice(side)  # 叶居多，使连线更常见
+            state.set_piece(x, y, piece)
+    if rng.random() < 0.5:
+        state.switch_player()
+    return state
+
+
+class EliminationTest(unittest.TestCase):
+    def test_matches_scan_on_random_boards(self):
+        rng = random.Random(7)
+        eliminations = 0
+        for width, height in SIZES:
+            for _ in range(BOARDS):
+                state = random_state(rng, width, height)
+                board = [[piece for _, piece in row] for row in state.board]
+                expected = scan_eliminate(board, width, height, state.current_player)
+                event = state.eliminate_pieces()
+                self.assertEqual(event.cells, expected)
+                self.assertEqual([[piece for _, piece in row] for row in state.board], board)
+                # 被消除的枝、干进入冷却并可再次使用
+                for _, _, piece in expected:
+                    if not piece.endswith('_leaf'):
+                        self.assertFalse(getattr(state, f'{piece}_used'))
+                        self.assertTrue(getattr(state, f'{piece}_cooldown'))
+                # 增量维护的哈希、位掩码与从头计算一致
+                fresh = state.copy()
+                fresh.count_pieces()
+                self.assertEqual(state.masks, fresh.masks)
+                self.assertEqual(state.hash, state.compute_hash())
+                eliminations += bool(expected)
+        self.assertGreater(eliminations, len(SIZES) * BOARDS // 4)  # 确实覆盖了大量发生消除的棋盘
+
+    def test_eliminated_pieces_restored_by_unmake(self):
+        # 落子引起的消除在撤销时完整恢复
+        rng = random.Random(8)
+        found = 0
+        for _ in range(200):
+            state = GameState()
+            for _ in range(60):
+                moves = state.legal_moves()
+                if not moves:
+                    break
+                before = ([row[:] for row in state.board], state.hash, dict(state.masks))
+                delta = state.apply_move(rng.choice(moves))
+                if delta.eliminated:
+                    found += 1
+                    state.unmake()
+                    self.assertEqual(([row[:] for row in state.board], state.hash, dict(state.masks)), before)
+                    state.apply_move(delta.move)
+        self.assertGreater(found, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
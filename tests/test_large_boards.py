@@ -0,0 +1,83 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# 大棋盘：各棋子的位掩码随落子、推动、消除与撤销增量维护，须与逐格扫描棋盘的结果一致，可落子格子也由位掩码求出
+#   python -m pytest tests
+
+import random
+import unittest
+
+from engine import GameState, MAX_BOARD_SIZE, MIN_BOARD_SIZE, board_size
+
+SIZES = [(MAX_BOARD_SIZE, MAX_BOARD_SIZE), (40, 24), (9, 33), (MIN_BOARD_SIZE, MIN_BOARD_SIZE)]
+GAMES = 3  # 每种棋盘大小的随机对局数
+MAX_MOVES = 60
+
+
+def scanned_masks(state):
+    masks = {name: 0 for name in state.masks}
+    for y, row in enumerate(state.board):
+        for x, (_, piece) in enumerate(row):
+            if piece is not None:
+                masks[piece] |= 1 << (y * state.width + x)
+    return masks
+
+
+def play_on(state, rng, moves):
+    # 随机对局在大棋盘上往往几步就分出胜负，优先选择不结束对局的着法，使棋盘上的棋子足够多
+    rng.shuffle(moves)
+    for move in moves:
+        state.apply_move(move)
+        if state.result is None:
+            return
+        state.unmake()
+    state.apply_move(moves[0])
+
+
+class LargeBoardTest(unittest.TestCase):
+    def test_masks_match_the_board(self):
+        rng = random.Random(1)
+        for width, height in SIZES:
+            for _ in range(GAMES):
+                state = GameState(width, height)
+                self.assertEqual(state.masks, scanned_masks(state))
+                for _ in range(MAX_MOVES):
+                    moves = state.legal_moves()
+                    if not moves:
+                        break
+                    before = dict(state.masks)
+                    for move in rng.sample(moves, min(len(moves), 4)):
+                        state.apply_move(move)
+                        self.assertEqual(state.masks, scanned_masks(state), (width, height, move))
+                        state.unmake()
+                        self.assertEqual(state.masks, before)
+                    play_on(state, rng, moves)
+                    self.assertEqual(state.masks, scanned_masks(state))
+                    for x, y, _ in state.legal_moves():
+                        self.assertIsNone(state.board[y][x][1])
+                self.assertGreater(len(state.history), 10)
+
+    def test_board_size_argument(self):
+        self.assertEqual(board_size('16'), (16, 16))
+        self.assertEqual(board_size('40x24'), (40, 24))
+        for text in (str(MIN_BOARD_SIZE - 1), f'{MAX_BOARD_SIZE + 1}x8', '8x0'):
+            with self.assertRaises(ValueError):
+                board_size(text)
+
+
+if __name__ == "__main__":
+    unittest.main()
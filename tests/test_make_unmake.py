@@ -0,0 +1,82 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# 规则引擎的落子与撤销：apply_move 之后 unmake 必须完整恢复局面（棋盘、位掩码、哈希、计数器与各项标志）
+#   python -m pytest tests
+
+import random
+import unittest
+
+from engine import FLAG_NAMES, GameState
+
+SIZES = [(8, 8), (12, 12), (16, 9), (5, 7)]
+GAMES = 12  # 每种棋盘大小的随机对局数
+MAX_MOVES = 80
+
+
+def snapshot(state):
+    # 局面的全部内容（legal_mask_cache 只是缓存，不参与比较）
+    flags = {name: getattr(state, name) for name in FLAG_NAMES if name != 'legal_mask_cache'}
+    return [row[:] for row in state.board], dict(state.masks), flags
+
+
+class MakeUnmakeTest(unittest.TestCase):
+    def test_every_move_round_trips(self):
+        rng = random.Random(1)
+        for width, height in SIZES:
+            for _ in range(GAMES):
+                state = GameState(width, height)
+                for _ in range(MAX_MOVES):
+                    moves = state.legal_moves()
+                    if not moves:
+                        break
+                    before = snapshot(state)
+                    for move in rng.sample(moves, min(len(moves), 8)):
+                        self.assertIsNotNone(state.apply_move(move))
+                        state.unmake()
+                        self.assertEqual(snapshot(state), before, (width, height, move))
+                    state.apply_move(rng.choice(moves))
+
+    def test_unwinding_a_game_restores_the_initial_position(self):
+        rng = random.Random(2)
+        for width, height in SIZES:
+            state = GameState(width, height)
+            initial = snapshot(state)
+            positions = []
+            for _ in range(MAX_MOVES):
+                moves = state.legal_moves()
+                if not moves:
+                    break
+                positions.append(snapshot(state))
+                state.apply_move(rng.choice(moves))
+            while positions:
+                state.unmake()
+                self.assertEqual(snapshot(state), positions.pop())
+            self.assertEqual(snapshot(state), initial)
+            self.assertEqual(state.history, [])
+
+    def test_illegal_move_changes_nothing(self):
+        state = GameState()
+        before = snapshot(state)
+        self.assertIsNone(state.apply_move((0, 0, 'leaf')))  # 远离己方棋子
+        self.assertIsNone(state.apply_move((3, 7, 'leaf')))  # 己方根源区域
+        self.assertEqual(snapshot(state), before)
+        self.assertEqual(state.history, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# 观战增量消息：对随机对局的每一步编码增量并在观战者的局面副本上重放，结果须与对局方的局面一致
+#   python -m pytest tests
+
+import random
+import unittest
+
+from config import PLAYER_GRAY
+from engine import FLAG_NAMES, GameState, MoveDelta
+from protocol import MAX_MESSAGE_SIZE, apply_delta, decode_keyframe, delta_size, encode_delta, encode_keyframe
+
+SIZES = [(8, 8), (12, 12), (16, 9), (5, 7)]
+GAMES = 8  # 每种棋盘大小的随机对局数
+MAX_MOVES = 120
+
+
+def snapshot(state):
+    # 观战者能看到的全部内容：棋盘、位掩码、哈希与标志
+    flags = {name: getattr(state, name) for name in FLAG_NAMES if name != 'legal_mask_cache'}
+    return [row[:] for row in state.board], dict(state.masks), flags
+
+
+def spectator(state):
+    # 观战者加入时收到的关键帧
+    copy, move_count = decode_keyframe(encode_keyframe(state, len(state.history)))
+    assert move_count == len(state.history)
+    return copy
+
+
+class DeltaRoundTripTest(unittest.TestCase):
+    def replay(self, state, delta, watcher):
+        payload = encode_delta(state, delta)
+        self.assertEqual(delta_size(delta), len(payload))
+        changed = apply_delta(watcher, payload)
+        self.assertEqual(snapshot(watcher), snapshot(state))
+        self.assertIn(delta.placed, changed)
+        return changed
+
+    def test_keyframe_round_trips(self):
+        rng = random.Random(1)
+        for width, height in SIZES:
+            state = GameState(width, height)
+            for _ in range(30):
+                moves = state.legal_moves()
+                if not moves:
+                    break
+                state.apply_move(rng.choice(moves))
+                self.assertEqual(snapshot(spectator(state)), snapshot(state))
+
+    def test_deltas_follow_random_games(self):
+        rng = random.Random(2)
+        for width, height in SIZES:
+            for _ in range(GAMES):
+                state = GameState(width, height)
+                watcher = spectator(state)
+                for _ in range(MAX_MOVES):
+                    moves = state.legal_moves()
+                    if not moves:
+                        break
+                    delta = state.apply_move(rng.choice(moves))
+                    self.assertIsNotNone(delta)
+                    self.replay(state, delta, watcher)
+                    self.assertEqual(watcher.result, state.result)
+                    self.assertEqual(watcher.legal_mask(), state.legal_mask())
+
+    def test_mass_elimination_on_the_largest_board(self):
+        # 64x64 棋盘上摆满灰方叶的纵向三连，一步消除远超255枚，增量消息仍须正确（超长时服务器改发关键帧）
+        state = GameState(64, 64)
+        for x in range(0, 64, 2):
+            for y in range(10, 52, 4):
+                for dy in range(3):
+                    state.set_piece(x, y + dy, 'gray_leaf')
+        watcher = spectator(state)
+        self.assertEqual(state.current_player, PLAYER_GRAY)
+        move = (1, 30, 'leaf')
+        delta = MoveDelta(move, move[:2], tuple(getattr(state, name) for name in FLAG_NAMES))
+        state.set_piece(1, 30, 'gray_leaf')
+        delta.eliminated = state.eliminate_pieces()
+        state.switch_player()
+        self.assertGreater(len(delta.eliminated), 255)
+        changed = self.replay(state, delta, watcher)
+        self.assertEqual(len(changed), len(delta.eliminated) + 1)
+        self.assertLess(delta_size(delta), MAX_MESSAGE_SIZE)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# 棋谱库：写入长短与结果各异的对局，再经 mmap 读回，着法、结果与棋盘大小须与写入时一致
+#   python -m pytest tests
+
+import os
+import random
+import tempfile
+import unittest
+
+from config import PLAYER_GRAY, PLAYER_GREEN
+from engine import GameState
+from records import GameDatabase, GameRecordWriter, move_size
+
+SIZES = [(8, 8), (12, 12), (5, 7), (64, 64)]  # 8x8 每步1字节，其余每步2字节
+
+
+def random_game(rng, width, height, length):
+    # 返回 (着法列表, 胜者或None)
+    state = GameState(width, height)
+    moves = []
+    while len(moves) < length:
+        legal = state.legal_moves()
+        if not legal:
+            break
+        move = rng.choice(legal)
+        state.apply_move(move)
+        moves.append(move)
+    return moves, state.result
+
+
+class RecordsRoundTripTest(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.tgdb')
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+
+    def write(self, width, height, games):
+        with GameRecordWriter(self.path, width, height) as writer:
+            for moves, result in games:
+                writer.add(moves, result)
+
+    def test_games_round_trip(self):
+        rng = random.Random(1)
+        for width, height in SIZES:
+            games = [([], None), ([], PLAYER_GREEN)]  # 空对局
+            games += [random_game(rng, width, height, length) for length in (1, 2, 7, 40, 300)]
+            games += [(moves, result) for moves, result in [random_game(rng, width, height, 20)]
+                      for result in (None, PLAYER_GRAY, PLAYER_GREEN)]
+            self.write(width, height, games)
+            with GameDatabase(self.path) as database:
+                self.assertEqual((database.width, database.height), (width, height))
+                self.assertEqual(database.move_size, move_size(width, height))
+                self.assertEqual(len(database), len(games))
+                for index, (moves, result) in enumerate(games):
+                    self.assertEqual(database.moves(index), moves)
+                    self.assertEqual(database.move_count(index), len(moves))
+                    self.assertEqual(database.result(index), result)
+                self.assertEqual(list(database.games()), games)
+                self.assertEqual(list(database.games(2, 4)), games[2:4])
+                self.assertEqual([move for _, move in database.replay(6)], games[6][0])
+                with self.assertRaises(IndexError):
+                    database.moves(len(games))
+
+    def test_empty_database(self):
+        self.write(12, 12, [])
+        with GameDatabase(self.path) as database:
+            self.assertEqual((database.width, database.height), (12, 12))
+            self.assertEqual(len(database), 0)
+            self.assertEqual(list(database.games()), [])
+            with self.assertRaises(IndexError):
+                database.result(0)
+
+    def test_rejects_other_files(self):
+        with open(self.path, 'wb') as file:
+            file.write(b'\0' * 64)
+        with self.assertRaises(ValueError):
+            GameDatabase(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
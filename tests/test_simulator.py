@@ -0,0 +1,84 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# NumPy 批量模拟器（simulator.BatchSimulator）与规则引擎（engine.GameState）逐步对照：
+# 每一步的合法着法、落子后的棋盘与标志、最终胜者均须一致
+#   python -m pytest tests
+
+import unittest
+
+import numpy as np
+
+from engine import GameState
+from simulator import CODE_PIECES, PIECE_TYPES, BatchSimulator
+
+GAMES = 24
+MAX_MOVES = 150
+CASES = [((8, 8), 'random', 1), ((8, 8), 'light', 2), ((5, 7), 'random', 3), ((16, 9), 'light', 4)]
+FLAGS = ('branch_used', 'branch_cooldown', 'trunk_used', 'trunk_cooldown')
+
+
+class BatchSimulatorTest(unittest.TestCase):
+    def assert_same_position(self, simulator, game, state):
+        board = [[CODE_PIECES.get(int(code)) for code in row] for row in simulator.board[game]]
+        self.assertEqual(board, [[piece for _, piece in row] for row in state.board])
+        self.assertEqual(int(simulator.current_player[game]), state.current_player)
+        for side, prefix in ((0, 'gray'), (1, 'green')):
+            for flag in FLAGS:
+                self.assertEqual(bool(getattr(simulator, flag)[game, side]), getattr(state, f'{prefix}_{flag}'),
+                                 f'{prefix}_{flag}')
+        self.assertEqual(int(simulator.result[game]) or None, state.winner())
+
+    def assert_same_legal_moves(self, simulator, game, state):
+        legal = simulator.legal_mask(simulator.current_player)[game]
+        cells = {(int(x), int(y)) for y, x in zip(*np.nonzero(legal))}
+        self.assertEqual(cells, {(x, y) for x, y, _ in state.legal_moves()})
+
+    def run_case(self, size, policy, seed):
+        width, height = size
+        simulator = BatchSimulator(GAMES, width, height, seed=seed)
+        states = [GameState(width, height) for _ in range(GAMES)]
+        for _ in range(MAX_MOVES):
+            if simulator.finished.all():
+                break
+            playing = np.nonzero(~simulator.finished)[0]
+            for game in playing:
+                self.assert_same_legal_moves(simulator, game, states[game])
+            x, y, kind = simulator.step(policy)
+            for game in playing:
+                state = states[game]
+                if x[game] < 0:
+                    self.assertEqual(state.legal_moves(), [])  # 无子可落
+                    continue
+                move = (int(x[game]), int(y[game]), PIECE_TYPES[kind[game] - 1])
+                self.assertIn(move, state.legal_moves())
+                self.assertTrue(state.apply(move))
+                self.assert_same_position(simulator, game, state)
+        for game, state in enumerate(states):
+            self.assertEqual(int(simulator.result[game]) or None, state.winner())
+        return simulator
+
+    def test_matches_engine(self):
+        decided = 0
+        for size, policy, seed in CASES:
+            with self.subTest(size=size, policy=policy):
+                decided += int((self.run_case(size, policy, seed).result > 0).sum())
+        self.assertGreater(decided, len(CASES) * GAMES // 2)  # 确实覆盖了大量分出胜负的对局
+
+
+if __name__ == "__main__":
+    unittest.main()
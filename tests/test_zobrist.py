@@ -0,0 +1,91 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# Zobrist 哈希与置换表：落子、推动、消除、撤销与切换行棋方后，增量维护的哈希须与从头计算一致
+#   python -m pytest tests
+
+import random
+import unittest
+
+from engine import GameState
+from transposition import EXACT, LOWER_BOUND, TranspositionTable
+
+SIZES = [(8, 8), (12, 12), (16, 9), (5, 7)]
+GAMES = 12  # 每种棋盘大小的随机对局数
+MAX_MOVES = 80
+
+
+class ZobristHashTest(unittest.TestCase):
+    def test_incremental_hash_matches_full_recompute(self):
+        rng = random.Random(1)
+        for width, height in SIZES:
+            for _ in range(GAMES):
+                state = GameState(width, height)
+                self.assertEqual(state.hash, state.compute_hash())
+                for _ in range(MAX_MOVES):
+                    moves = state.legal_moves()
+                    if not moves:
+                        break
+                    before = state.hash
+                    for move in rng.sample(moves, min(len(moves), 8)):
+                        state.apply_move(move)
+                        self.assertEqual(state.hash, state.compute_hash(), (width, height, move))
+                        state.unmake()
+                        self.assertEqual(state.hash, before)
+                    state.apply_move(rng.choice(moves))
+                    self.assertEqual(state.hash, state.compute_hash())
+
+    def test_side_to_move_changes_the_hash(self):
+        state = GameState()
+        initial = state.hash
+        state.switch_player()
+        self.assertNotEqual(state.hash, initial)
+        self.assertEqual(state.hash, state.compute_hash())
+        state.switch_player()
+        self.assertEqual(state.hash, initial)
+
+
+class TranspositionTableTest(unittest.TestCase):
+    def test_store_and_probe(self):
+        table = TranspositionTable(4)
+        self.assertIsNone(table.probe(12345))
+        table.store(12345, 3, 10, EXACT, (1, 2, 'leaf'))
+        self.assertEqual(table.probe(12345), (12345, 3, 10, EXACT, (1, 2, 'leaf')))
+        self.assertEqual((table.hits, table.probes), (1, 2))
+
+    def test_table_size_is_bounded(self):
+        table = TranspositionTable(4)
+        for key in range(1000):
+            table.store(key, key % 7, 0, EXACT, None)
+        self.assertEqual(len(table.deep), 16)
+        self.assertEqual(len(table.recent), 16)
+
+    def test_deeper_entry_keeps_its_slot(self):
+        # 同一桶内：较浅的结果进入总是替换槽，不会挤掉较深的结果
+        table = TranspositionTable(4)
+        table.store(1, 8, 5, EXACT, None)
+        table.store(17, 2, 6, LOWER_BOUND, None)
+        table.store(33, 1, 7, LOWER_BOUND, None)
+        self.assertEqual(table.probe(1)[1], 8)
+        self.assertIsNone(table.probe(17))
+        self.assertEqual(table.probe(33)[2], 7)
+        table.clear()
+        self.assertIsNone(table.probe(1))
+
+
+if __name__ == "__main__":
+    unittest.main()
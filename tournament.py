@@ -0,0 +1,200 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# 无界面的AI自对弈比赛：
+#   python tournament.py --pairing alphabeta:random --pairing mcts@0.5:alphabeta --games 20 --time 0.2 --output results.jsonl
+# 对阵中的AI可写作 name@秒数 单独指定每步思考时间，否则使用 --time
+# 每局一行JSON实时写出，全部结束后为每组对阵写出胜率、Elo估计与平均步数
+# 进程池中的进程在多局之间复用，同一进程内的AI实例（及其置换表）也被复用
+# 指定 --records 时全部对局的着法另存为二进制棋谱库（见 records.py）
+
+import argparse
+import json
+import math
+import multiprocessing
+import sys
+import time
+
+from ai import AlphaBetaAI, RandomAI
+from config import BOARD_WIDTH, BOARD_HEIGHT, PLAYER_GRAY, PLAYER_GREEN
+from engine import GameState, board_size
+from mcts import MCTSAI
+from records import GameRecordWriter
+from book import load_book
+
+ENGINE_NAMES = ['random', 'alphabeta', 'mcts', 'mcts-eval']
+
+_worker_engines = {}  # 每个进程内缓存的AI实例，以 (执子方, AI名, 思考时间) 为键，同名对阵的双方各用各的实例
+
+
+def create_engine(name, time_limit, seed, book=None):
+    if name == 'random':
+        return RandomAI(seed)
+    if name == 'alphabeta':
+        return AlphaBetaAI(time_limit, book=book)
+    if name == 'mcts':
+        return MCTSAI(time_limit, workers=1, slices=1, seed=seed, book=book)  # 比赛本身已并行，MCTS不再开进程池
+    if name == 'mcts-eval':
+        return MCTSAI(time_limit, workers=1, slices=1, policy='eval', seed=seed, book=book)  # 以批量估值代替模拟对局
+    raise ValueError(f"未知的AI：{name}")
+
+
+def parse_engine(spec, default_time):
+    # "alphabeta@0.5" -> ('alphabeta', 0.5)
+    name, _, time_limit = spec.partition('@')
+    return name, float(time_limit) if time_limit else default_time
+
+
+def get_engine(color, name, time_limit, seed, book_path=None):
+    key = (color, name, time_limit)
+    engine = _worker_engines.get(key)
+    if engine is None:
+        book = load_book(book_path) if book_path else None
+        engine = _worker_engines[key] = create_engine(name, time_limit, seed, book)
+    elif hasattr(engine, 'rng'):
+        engine.rng.seed(seed)
+    return engine
+
+
+def play_game(task):
+    # 在工作进程中下完一局，返回结果记录
+    pairing, index, gray_name, green_name, time_limit, seed, max_moves, book_path, size = task
+    engines = {
+        PLAYER_GRAY: get_engine(PLAYER_GRAY, *parse_engine(gray_name, time_limit), seed, book_path),
+        PLAYER_GREEN: get_engine(PLAYER_GREEN, *parse_engine(green_name, time_limit), seed + 1, book_path),
+    }
+    state = GameState(*size)
+    start = time.perf_counter()
+    played = []
+    while state.winner() is None and len(played) < max_moves:
+        move = engines[state.current_player].choose_move(state)
+        if move is None or not state.apply(move):
+            break  # 无子可落，按和局处理
+        played.append(move)
+    winner = state.winner()
+    record = {
+        'type': 'game',
+        'pairing': pairing,
+        'game': index,
+        'gray': gray_name,
+        'green': green_name,
+        'winner': None if winner is None else ('gray' if winner == PLAYER_GRAY else 'green'),
+        'moves': len(played),
+        'seed': seed,
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+    return record, played
+
+
+def state_result(winner):
+    # 比赛记录中的胜方名称 -> 棋谱库中的玩家编码
+    return {'gray': PLAYER_GRAY, 'green': PLAYER_GREEN}.get(winner)
+
+
+def elo_difference(score):
+    # 由得分率估计Elo差，得分率为0或1时截断
+    score = min(max(score, 0.001), 0.999)
+    return -400 * math.log10(1 / score - 1)
+
+
+def summarize(pairing, records):
+    # 以对阵中第一个AI的视角统计，第一个AI在偶数局执灰方、奇数局执青方
+    wins = losses = draws = 0
+    for record in records:
+        first_color = 'gray' if record['game'] % 2 == 0 else 'green'
+        if record['winner'] is None:
+            draws += 1
+        elif record['winner'] == first_color:
+            wins += 1
+        else:
+            losses += 1
+    games = len(records)
+    score = (wins + 0.5 * draws) / games if games else 0.5
+    return {
+        'type': 'summary',
+        'pairing': pairing,
+        'games': games,
+        'wins': wins,
+        'losses': losses,
+        'draws': draws,
+        'win_rate': round(score, 4),
+        'elo': round(elo_difference(score), 1),
+        'average_length': round(sum(record['moves'] for record in records) / games, 2) if games else 0,
+    }
+
+
+def build_tasks(pairings, games, time_limit, seed, max_moves, book_path=None, size=(BOARD_WIDTH, BOARD_HEIGHT)):
+    tasks = []
+    for pairing in pairings:
+        first, second = pairing.split(':')
+        for index in range(games):
+            # 交替先后手
+            gray_name, green_name = (first, second) if index % 2 == 0 else (second, first)
+            tasks.append((pairing, index, gray_name, green_name, time_limit, seed + 1000 * len(tasks), max_moves,
+                          book_path, size))
+    return tasks
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TreeGo AI 自对弈比赛")
+    parser.add_argument('--pairing', action='append', required=True,
+                        help=f"对阵，格式为 A:B，可选 {', '.join(ENGINE_NAMES)}，可重复指定")
+    parser.add_argument('--games', type=int, default=10, help="每组对阵的局数")
+    parser.add_argument('--time', type=float, default=0.2, help="每步思考时间（秒）")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-moves', type=int, default=300, help="超过该步数按和局处理")
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--output', help="JSONL输出文件，默认输出到标准输出")
+    parser.add_argument('--records', help="同时把全部对局的着法写入二进制棋谱库文件")
+    parser.add_argument('--book', help="开局库文件，alphabeta 与 mcts 先查库再搜索")
+    parser.add_argument('--size', type=board_size, default=(BOARD_WIDTH, BOARD_HEIGHT), metavar='WxH',
+                        help="棋盘大小，如 12 或 16x12")
+    args = parser.parse_args(argv)
+
+    for pairing in args.pairing:
+        specs = pairing.split(':')
+        try:
+            valid = len(specs) == 2 and all(parse_engine(spec, args.time)[0] in ENGINE_NAMES for spec in specs)
+        except ValueError:
+            valid = False
+        if not valid:
+            parser.error(f"无效的对阵：{pairing}")
+
+    tasks = build_tasks(args.pairing, args.games, args.time, args.seed, args.max_moves, args.book, args.size)
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    records = {pairing: [] for pairing in args.pairing}
+    writer = GameRecordWriter(args.records, *args.size) if args.records else None
+    try:
+        with multiprocessing.Pool(args.workers) as pool:
+            for record, played in pool.imap_unordered(play_game, tasks):
+                if writer is not None:
+                    writer.add(played, state_result(record['winner']))
+                records[record['pairing']].append(record)
+                output.write(json.dumps(record, ensure_ascii=False) + '\n')
+                output.flush()
+        for pairing in args.pairing:
+            summary = summarize(pairing, records[pairing])
+            output.write(json.dumps(summary, ensure_ascii=False) + '\n')
+    finally:
+        if writer is not None:
+            writer.close()
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# 置换表：固定容量，每个桶含一个深度优先槽和一个总是替换槽
+# 表项为元组 (key, depth, score, bound, move)
+
+# 分值边界类型
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+
+class TranspositionTable:
+    def __init__(self, size_bits=20):
+        self.size = 1 << size_bits  # 桶数量
+        self.mask = self.size - 1
+        self.deep = [None] * self.size  # 深度优先槽
+        self.recent = [None] * self.size  # 总是替换槽
+        self.hits = 0
+        self.probes = 0
+
+    def probe(self, key):
+        # 查找局面，未命中返回None
+        self.probes += 1
+        index = key & self.mask
+        entry = self.deep[index]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        entry = self.recent[index]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        return None
+
+    def store(self, key, depth, score, bound, move):
+        index = key & self.mask
+        entry = (key, depth, score, bound, move)
+        deep = self.deep[index]
+        if deep is None or deep[0] == key or depth >= deep[1]:
+            # 更深（或同一局面）的结果占据深度优先槽，原有项降级到总是替换槽
+            if deep is not None and deep[0] != key:
+                self.recent[index] = deep
+            self.deep[index] = entry
+        else:
+            self.recent[index] = entry
+
+    def clear(self):
+        self.deep = [None] * self.size
+        self.recent = [None] * self.size
+        self.hits = 0
+        self.probes = 0
@@ -0,0 +1,50 @@
+# TreeGo - A board game
+# This file is part of TreeGo
+# Copyright (C) 2024 God_archer (1040257528@qq.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# Zobrist 哈希键：每个（格子, 棋子）、行棋方与枝/干的使用、冷却标志各对应一个64位随机数
+# 局面哈希为所有成立项的异或，落子、推动、消除时只需异或变化的项
+
+import random
+
+from bitboard import PIECE_NAMES
+
+# 参与哈希的局面标志
+ZOBRIST_FLAGS = [
+    'gray_branch_used', 'green_branch_used', 'gray_branch_cooldown', 'green_branch_cooldown',
+    'gray_trunk_used', 'green_trunk_used', 'gray_trunk_cooldown', 'green_trunk_cooldown',
+]
+
+ZOBRIST_SEED = 20240101  # 固定种子，保证不同进程、不同次运行得到相同的哈希
+
+
+class ZobristKeys:
+    def __init__(self, cells, seed=ZOBRIST_SEED):
+        rng = random.Random(seed)
+        self.pieces = {name: [rng.getrandbits(64) for _ in range(cells)] for name in PIECE_NAMES}
+        self.side = rng.getrandbits(64)  # 青方行棋时异或
+        self.flags = {name: rng.getrandbits(64) for name in ZOBRIST_FLAGS}
+
+
+_keys_by_size = {}
+
+
+def zobrist_keys(cells):
+    # 同一棋盘大小共用一套哈希键
+    keys = _keys_by_size.get(cells)
+    if keys is None:
+        keys = _keys_by_size[cells] = ZobristKeys(cells)
+    return keys